@@ -1,6 +1,9 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
 
+from app.services.monitoring_scheduler import MonitoringScheduler
+
 router = APIRouter(prefix="/models", tags=["models"])
 
 
@@ -8,15 +11,53 @@ class ModelRegistration(BaseModel):
     model_name: str
     prediction_url: HttpUrl
     description: str | None = None
+    interval_seconds: Optional[float] = None
+
+
+class ModelReference(BaseModel):
+    prediction_url: HttpUrl
 
 
 @router.post("/register")
 def register_model(data: ModelRegistration):
     """
-    Registers an external model for monitoring
+    Registers an external model for continuous monitoring.
+
+    `interval_seconds` is the slowest the model will be probed: a
+    healthy model backs off up to it, an unhealthy one is probed more
+    often. Only the global probe budget can stretch it further.
+    """
+    schedule = MonitoringScheduler.register(
+        str(data.prediction_url),
+        interval_seconds=data.interval_seconds,
+        model_name=data.model_name,
+    )
+    return {"status": "registered", **schedule}
+
+
+@router.post("/unregister")
+def unregister_model(data: ModelReference):
+    """
+    Stops monitoring a model
+    """
+    if not MonitoringScheduler.unregister(str(data.prediction_url)):
+        raise HTTPException(status_code=404, detail="Model not registered")
+    return {"status": "unregistered", "prediction_url": str(data.prediction_url)}
+
+
+@router.get("")
+def list_models():
+    """
+    Monitored models and their schedules
+    """
+    return MonitoringScheduler.models()
+
+
+@router.get("/cadence")
+def model_cadence():
+    """
+    Current probe cadence per model and global probe budget usage.
+    `effective_interval_seconds` exceeds a model's registered interval
+    only while the fleet is over the budget (stretch_factor > 1).
     """
-    return {
-        "status": "registered",
-        "model_name": data.model_name,
-        "prediction_url": data.prediction_url,
-    }
+    return MonitoringScheduler.cadence()
@@ -1,13 +1,51 @@
-from fastapi import APIRouter
+import json
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
 
 from app.schemas.monitoring import PredictionLog
+from app.utils.config import get_settings
 from app.services.monitoring_service import MonitoringService
 from app.services.investigation_service import InvestigationService
+from app.services.monitoring_scheduler import MonitoringScheduler
+from app.services.fleet_service import FleetInvestigationService
+from app.services.result_cache import AnalysisResultCache
+from app.core.detection.drift_detector import DriftDetector
+from app.core.metrics.time_aggregates import TimeAggregateRegistry
+from app.core.probing.async_probe_engine import AsyncProbeEngine
+from app.core.probing.universal_model_caller import UniversalModelCaller
+from app.core.probing.circuit_breaker import CircuitBreakerRegistry
+from app.core.probing.latency_tracker import LatencyTracker
+from app.core.probing.hedging import HedgePolicy
+from app.core.probing.rate_limiter import ProbeRateLimiter
+from app.core.probing.response_cache import ResponseCache
+from app.core.storage.payload_cache_store import PayloadCacheStore
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 
+def _analysis_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    # ✅ FIX: align response with dashboard expectations
+    return {
+        "metrics": result["current_metrics"],
+        "window_metrics": result["window_metrics"],
+        "drift": result["drift"],
+        "metric_checks": result["metric_checks"],
+        "anomalies": result["anomalies"],
+        "baseline_exists": result["baseline_exists"],
+        "samples_collected": result["samples_collected"],
+        "probes_throttled": result["probes_throttled"],
+        "circuit_breaker": result["circuit_breaker"],
+        "latency_breakdown": result["latency_breakdown"],
+        "stages": result["stages"],
+        "partial": result["partial"],
+        "completeness": result["completeness"],
+        "sampling": result["sampling"],
+    }
+
+
 # 1️⃣ Live prediction ingestion (optional / future use)
 @router.post("/prediction")
 def log_prediction(data: PredictionLog):
@@ -17,42 +55,202 @@ def log_prediction(data: PredictionLog):
 # 2️⃣ Autonomous analysis (ONLY model URL)
 class MonitoringRequest(BaseModel):
     prediction_url: HttpUrl
+    refresh: bool = False  # bypass the result cache
+    deadline_ms: Optional[float] = None  # answer within this time, possibly degraded
+    sampling: Optional[str] = None  # "fixed" or "sequential"
   
-from fastapi import APIRouter
-from pydantic import BaseModel, HttpUrl
+@router.post("/analyze")
+async def analyze_model(request: MonitoringRequest):
+    print("🔥 ANALYZE ENDPOINT HIT")
+    print("MODEL URL:", request.prediction_url)
 
-from app.schemas.monitoring import PredictionLog
-from app.services.monitoring_service import MonitoringService
-from app.services.investigation_service import InvestigationService
+    if request.sampling not in (None, "fixed", "sequential"):
+        raise HTTPException(status_code=400, detail="sampling must be fixed or sequential")
 
-router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+    result, freshness = await AnalysisResultCache.get(
+        str(request.prediction_url),
+        refresh=request.refresh,
+        deadline_ms=request.deadline_ms,
+        sampling=request.sampling,
+    )
 
+    return {**freshness, **_analysis_response(result)}
 
-# 1️⃣ Live prediction ingestion (optional / future use)
-@router.post("/prediction")
-def log_prediction(data: PredictionLog):
-    return MonitoringService.ingest_prediction(data)
 
+# 3️⃣ Force payload-format re-detection for an endpoint
+@router.post("/redetect-payload")
+async def redetect_payload(request: MonitoringRequest):
+    PayloadCacheStore.invalidate(str(request.prediction_url))
+    ResponseCache.reset(str(request.prediction_url))
+    AnalysisResultCache.invalidate(str(request.prediction_url))
+    payload = await UniversalModelCaller.aresolve_payload(
+        AsyncProbeEngine.client(),
+        str(request.prediction_url),
+        force=True,
+    )
+    batch_key = await UniversalModelCaller.adetect_batch_key(
+        AsyncProbeEngine.client(),
+        str(request.prediction_url),
+    )
+    return {
+        "prediction_url": str(request.prediction_url),
+        "payload": payload,
+        "batch_key": batch_key,
+    }
+
+
+# 4️⃣ Circuit breaker state for every probed endpoint
+@router.get("/circuit-breakers")
+def circuit_breakers():
+    return CircuitBreakerRegistry.snapshot_all()
+
+
+# 5️⃣ Current probe timeouts and their sources (default vs adaptive)
+@router.get("/timeouts")
+def probe_timeouts(prediction_url: Optional[str] = None):
+    if prediction_url:
+        return {prediction_url: UniversalModelCaller.timeout_report(prediction_url)}
+
+    return {
+        url: UniversalModelCaller.timeout_report(url)
+        for url in LatencyTracker.tracked_urls()
+    }
 
-# 2️⃣ Autonomous analysis (ONLY model URL)
-class MonitoringRequest(BaseModel):
-    prediction_url: HttpUrl
-  
-@router.post("/analyze")
-def analyze_model(request: MonitoringRequest):
-    print("🔥 ANALYZE ENDPOINT HIT")
-    print("MODEL URL:", request.prediction_url)
 
-    service = InvestigationService()
-    result = service.investigate(
-        model_url=str(request.prediction_url)
+# 6️⃣ Hedged-request metrics (hedge rate / win rate per endpoint)
+@router.get("/hedging")
+def hedging_metrics():
+    return {
+        "enabled": HedgePolicy.enabled(),
+        "endpoints": HedgePolicy.snapshot_all(),
+    }
+
+
+# 7️⃣ Probe rate limits: throttle counts per endpoint / host
+@router.get("/rate-limits")
+def rate_limits():
+    return {
+        "mode": get_settings().probe_rate_limit_mode,
+        "buckets": ProbeRateLimiter.snapshot_all(),
+    }
+
+
+class RateLimitRequest(BaseModel):
+    key: str  # model URL or host
+    rate_per_second: float
+    burst: Optional[float] = None
+
+
+@router.post("/rate-limits")
+def configure_rate_limit(request: RateLimitRequest):
+    ProbeRateLimiter.configure(
+        request.key, request.rate_per_second, request.burst
     )
+    return ProbeRateLimiter.snapshot_all()[request.key]
 
-    # ✅ FIX: align response with dashboard expectations
+
+# 8️⃣ Response cache hit rates and determinism verdicts
+@router.get("/response-cache")
+def response_cache():
     return {
-        "metrics": result["current_metrics"],
-        "drift": result["drift"],
-        "anomalies": result["anomalies"],
-        "baseline_exists": result["baseline_exists"],
-        "samples_collected": result["samples_collected"],
+        "enabled": get_settings().response_cache_enabled,
+        "endpoints": ResponseCache.snapshot_all(),
+    }
+
+
+# 9️⃣ Latest scheduled analysis for a registered model (no probing)
+@router.get("/results")
+def scheduled_results(prediction_url: str, include_history: bool = False):
+    latest = MonitoringScheduler.latest(prediction_url)
+    if latest is None:
+        raise HTTPException(status_code=404, detail="No scheduled results yet")
+
+    age = datetime.utcnow() - datetime.fromisoformat(latest["generated_at"])
+    response = {
+        "generated_at": latest["generated_at"],
+        "age_seconds": round(age.total_seconds(), 3),
+        **_analysis_response(latest["result"]),
+    }
+    if include_history:
+        response["history"] = MonitoringScheduler.history(prediction_url)
+    return response
+
+
+# 🔟 Fleet analysis: many models, streamed back as each one completes
+class BatchMonitoringRequest(BaseModel):
+    prediction_urls: List[HttpUrl]
+    probe_runs: int = 5
+    max_concurrency: Optional[int] = None
+    stream_format: str = "ndjson"  # "ndjson" or "sse"
+
+
+@router.post("/analyze-batch")
+async def analyze_batch(request: BatchMonitoringRequest):
+    if not request.prediction_urls:
+        raise HTTPException(status_code=400, detail="No prediction_urls given")
+    if len(request.prediction_urls) > get_settings().fleet_max_urls:
+        raise HTTPException(status_code=400, detail="Too many prediction_urls")
+    if request.stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="stream_format must be ndjson or sse")
+
+    async def events():
+        async for item in FleetInvestigationService.stream(
+            [str(url) for url in request.prediction_urls],
+            probe_runs=request.probe_runs,
+            max_concurrency=request.max_concurrency,
+        ):
+            if "result" in item:
+                item["result"] = _analysis_response(item["result"])
+
+            if request.stream_format == "sse":
+                yield f"event: {item['type']}\ndata: {json.dumps(item)}\n\n"
+            else:
+                yield json.dumps(item) + "\n"
+
+    media_type = (
+        "text/event-stream" if request.stream_format == "sse" else "application/x-ndjson"
+    )
+    return StreamingResponse(events(), media_type=media_type)
+
+
+# 1️⃣1️⃣ Single-flight coalescing: shared vs executed investigations
+@router.get("/coalescing")
+def coalescing():
+    return InvestigationService.coalescing_stats()
+
+
+# 1️⃣2️⃣ /analyze result cache: hit / stale / miss counts
+@router.get("/analysis-cache")
+def analysis_cache():
+    return AnalysisResultCache.snapshot()
+
+
+# 1️⃣3️⃣ Multi-horizon drift: last minute vs hour, last hour vs day,
+# from the minute / hour / day aggregates only (no raw scan)
+WINDOW_HORIZONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+
+@router.get("/windows")
+def window_drift(prediction_url: str):
+    windows = {
+        name: TimeAggregateRegistry.window(prediction_url, seconds)
+        for name, seconds in WINDOW_HORIZONS.items()
+    }
+    if windows["1d"] is None:
+        raise HTTPException(status_code=404, detail="No samples recorded for this model")
+
+    detector = DriftDetector()
+    return {
+        "windows": {
+            name: {signal: agg.summary() for signal, agg in bucket.signals.items()}
+            for name, bucket in windows.items()
+        },
+        "drift": {
+            "1m_vs_1h": detector.compare_windows(
+                windows["1h"].signals, windows["1m"].signals
+            ),
+            "1h_vs_1d": detector.compare_windows(
+                windows["1d"].signals, windows["1h"].signals
+            ),
+        },
     }
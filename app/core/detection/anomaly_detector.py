@@ -12,6 +12,9 @@ class AnomalyDetector:
     2. ML-based anomaly detection (adaptive)
     """
 
+    LOW_CONFIDENCE_THRESHOLD = 0.5
+    HIGH_ERROR_RATE_THRESHOLD = 0.3
+
     def __init__(
         self,
         contamination: float = 0.05,
@@ -23,6 +26,10 @@ class AnomalyDetector:
         )
         self._is_fitted = False
 
+    @property
+    def is_fitted(self) -> bool:
+        return self._is_fitted
+
     # ------------------------
     # ML PART
     # ------------------------
@@ -52,8 +59,8 @@ class AnomalyDetector:
     # ------------------------
     # RULE-BASED PART
     # ------------------------
-    @staticmethod
-    def detect_rules(metrics: Dict[str, Any]) -> List[str]:
+    @classmethod
+    def detect_rules(cls, metrics: Dict[str, Any]) -> List[str]:
         """
         Rule-based anomaly detection (Tier-1 safe).
         """
@@ -63,11 +70,11 @@ class AnomalyDetector:
             anomalies.append("no_predictions")
 
         avg_conf = metrics.get("avg_confidence")
-        if avg_conf is not None and avg_conf < 0.5:
+        if avg_conf is not None and avg_conf < cls.LOW_CONFIDENCE_THRESHOLD:
             anomalies.append("low_confidence")
 
         error_rate = metrics.get("error_rate")
-        if error_rate is not None and error_rate > 0.3:
+        if error_rate is not None and error_rate > cls.HIGH_ERROR_RATE_THRESHOLD:
             anomalies.append("high_error_rate")
 
         return anomalies
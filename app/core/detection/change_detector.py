@@ -0,0 +1,262 @@
+import hashlib
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Per signal: floor on the scale used to standardize values, absolute
+# and relative to the reference mean (a quiet warmup must not make the
+# first small wobble look like a huge shift)
+SIGNAL_SCALES = {
+    "confidence": {"min_std": 0.02, "relative_std": 0.0},
+    "error": {"min_std": 0.2, "relative_std": 0.0},
+    "latency_ms": {"min_std": 1.0, "relative_std": 0.1},
+}
+
+
+class Cusum:
+    """
+    Two-sided tabular CUSUM on one standardized signal, O(1) state.
+
+    The first change_warmup_samples values set the reference mean / std; after that
+    each value z = (x - mean) / std (clipped to ±CLIP, so one outlier
+    cannot alarm alone) updates
+
+        up   = max(0, up   + z - k)
+        down = max(0, down - z - k)
+
+    and an alarm fires when either exceeds h. The change is dated at the
+    last time that sum was zero. After an alarm the detector restarts
+    and re-learns the reference from the new regime.
+    """
+
+    CLIP = 4.0
+
+    def __init__(self, signal: str):
+        self.signal = signal
+        self._reset()
+        self.last_change: Optional[Dict[str, Any]] = None
+
+    # -------------------------------------------------
+    def _reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.up = 0.0
+        self.down = 0.0
+        self.up_start: Optional[float] = None
+        self.down_start: Optional[float] = None
+
+    # -------------------------------------------------
+    def _scale(self) -> float:
+        floors = SIGNAL_SCALES.get(self.signal, {"min_std": 0.0, "relative_std": 0.0})
+        std = math.sqrt(self.m2 / self.count) if self.count else 0.0
+        return max(std, floors["min_std"], floors["relative_std"] * abs(self.mean), 1e-9)
+
+    # -------------------------------------------------
+    def update(self, value: float, ts: float) -> Optional[Dict[str, Any]]:
+        """
+        Feeds one value; returns the change record if this value raised
+        an alarm.
+        """
+        settings = get_settings()
+
+        if self.count < settings.change_warmup_samples:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+            return None
+
+        z = max(-self.CLIP, min(self.CLIP, (value - self.mean) / self._scale()))
+        k = settings.change_drift_allowance
+
+        if self.up == 0.0:
+            self.up_start = ts
+        if self.down == 0.0:
+            self.down_start = ts
+        self.up = max(0.0, self.up + z - k)
+        self.down = max(0.0, self.down - z - k)
+
+        threshold = settings.change_threshold
+        if self.up <= threshold and self.down <= threshold:
+            return None
+
+        increase = self.up > threshold
+        self.last_change = {
+            "direction": "increase" if increase else "decrease",
+            "detected_at": ts,
+            "estimated_change_at": self.up_start if increase else self.down_start,
+            "reference_mean": round(self.mean, 6),
+            "statistic": round(self.up if increase else self.down, 3),
+        }
+        self._reset()
+        return self.last_change
+
+    # -------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    # -------------------------------------------------
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Cusum":
+        detector = cls(data["signal"])
+        detector.__dict__.update(data)
+        return detector
+
+    # -------------------------------------------------
+    def describe_change(self) -> Optional[Dict[str, Any]]:
+        if self.last_change is None:
+            return None
+        return {
+            **self.last_change,
+            "detected_at": datetime.utcfromtimestamp(self.last_change["detected_at"]).isoformat(),
+            "estimated_change_at": datetime.utcfromtimestamp(
+                self.last_change["estimated_change_at"]
+            ).isoformat(),
+        }
+
+    # -------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "warming_up": self.count < get_settings().change_warmup_samples,
+            "reference_mean": round(self.mean, 6),
+            "up": round(self.up, 3),
+            "down": round(self.down, 3),
+            "last_change": self.describe_change(),
+        }
+
+
+class ChangeDetectorRegistry:
+    """
+    CUSUM detectors per model and signal (confidence, error, latency),
+    fed by every probe and ingested prediction. LRU-bounded in memory;
+    each model's state is written to CHANGE_DIR at most every
+    change_persist_interval_seconds and reloaded on first use.
+    """
+
+    CHANGE_DIR = Path("data/monitoring/change_detectors")
+
+    _models: "OrderedDict[str, Dict[str, Cusum]]" = OrderedDict()
+    _saved_at: Dict[str, float] = {}
+
+    # -------------------------------------------------
+    @classmethod
+    def _path(cls, model_key: str) -> Path:
+        return cls.CHANGE_DIR / f"{hashlib.md5(model_key.encode()).hexdigest()}.json"
+
+    # -------------------------------------------------
+    @classmethod
+    def _get(cls, model_key: str) -> Dict[str, Cusum]:
+        detectors = cls._models.get(model_key)
+
+        if detectors is None:
+            detectors = cls._load(model_key)
+            cls._models[model_key] = detectors
+            while len(cls._models) > get_settings().change_registry_max_models:
+                evicted, _ = cls._models.popitem(last=False)
+                cls._saved_at.pop(evicted, None)
+
+        cls._models.move_to_end(model_key)
+        return detectors
+
+    # -------------------------------------------------
+    @classmethod
+    def _load(cls, model_key: str) -> Dict[str, Cusum]:
+        detectors = {signal: Cusum(signal) for signal in SIGNAL_SCALES}
+        path = cls._path(model_key)
+        if not path.exists():
+            return detectors
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+            detectors.update({s: Cusum.from_dict(d) for s, d in stored["signals"].items()})
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning(f"Change detector state unreadable — starting fresh | model={model_key}")
+        return detectors
+
+    # -------------------------------------------------
+    @classmethod
+    def _save(cls, model_key: str) -> None:
+        cls.CHANGE_DIR.mkdir(parents=True, exist_ok=True)
+        path = cls._path(model_key)
+        tmp_file = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {
+                    "model": model_key,
+                    "signals": {s: d.to_dict() for s, d in cls._models[model_key].items()},
+                },
+                f,
+            )
+        os.replace(tmp_file, path)
+        cls._saved_at[model_key] = time.time()
+
+    # -------------------------------------------------
+    @classmethod
+    def update(
+        cls,
+        model_key: str,
+        confidence: Optional[float],
+        error: bool,
+        latency_ms: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        if not settings.change_detection_enabled:
+            return
+
+        ts = ts if ts is not None else time.time()
+        detectors = cls._get(model_key)
+        values = {
+            "confidence": confidence,
+            "error": 1.0 if error else 0.0,
+            "latency_ms": latency_ms,
+        }
+
+        alarmed = False
+        for signal, value in values.items():
+            if value is not None:
+                alarmed = detectors[signal].update(float(value), ts) is not None or alarmed
+
+        now = time.time()
+        if alarmed or now - cls._saved_at.get(model_key, 0.0) >= settings.change_persist_interval_seconds:
+            try:
+                cls._save(model_key)
+            except OSError:
+                logger.warning(f"Could not persist change detectors | model={model_key}")
+
+    # -------------------------------------------------
+    @classmethod
+    def report(cls, model_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Drift-output block: per-signal state, plus the changes detected
+        within the last change_alert_seconds.
+        """
+        settings = get_settings()
+        if not settings.change_detection_enabled:
+            return None
+
+        detectors = cls._get(model_key)
+        since = time.time() - settings.change_alert_seconds
+        changes = {
+            signal: detector.describe_change()
+            for signal, detector in detectors.items()
+            if detector.last_change is not None
+            and detector.last_change["detected_at"] >= since
+        }
+
+        return {
+            "method": "CUSUM",
+            "drift_detected": bool(changes),
+            "changes": changes,
+            "signals": {signal: d.snapshot() for signal, d in detectors.items()},
+        }
@@ -0,0 +1,109 @@
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+from app.core.detection.anomaly_detector import AnomalyDetector
+from app.core.detection.drift_detector import DriftDetector
+from app.core.storage.baseline_store import BaselineStore
+from app.utils.config import get_settings
+
+
+class DetectorState:
+    """
+    Long-lived detection state for one model: detector instances, the
+    loaded (and pre-converted) baseline, and the metrics history the
+    IsolationForest is fitted on.
+    """
+
+    def __init__(self, model_url: str):
+        settings = get_settings()
+
+        self.model_url = model_url
+        self.drift_detector = DriftDetector()
+        self.anomaly_detector = AnomalyDetector()
+        self.history: deque = deque(maxlen=settings.anomaly_history_size)
+        self.since_fit = 0
+
+        self.baseline_version = BaselineStore.latest_version(model_url)
+        self.baseline = (
+            DriftDetector.prepare(BaselineStore.load(model_url))
+            if self.baseline_version is not None
+            else None
+        )
+
+    # -------------------------------------------------
+    def detect_anomalies(self, metrics: Dict[str, Any]) -> List[str]:
+        """
+        Scores the metrics against the forest fitted on earlier
+        snapshots, then adds them to the history and refits every
+        `anomaly_refit_every` snapshots once enough have been seen.
+        """
+        settings = get_settings()
+        anomalies = self.anomaly_detector.detect(metrics)
+
+        self.history.append({
+            "avg_confidence": metrics.get("avg_confidence", 0.0),
+            "confidence_std": metrics.get("confidence_std", 0.0),
+            "total_samples": metrics.get("total_samples", 0),
+        })
+        self.since_fit += 1
+
+        if (
+            len(self.history) >= settings.anomaly_min_fit_samples
+            and (not self.anomaly_detector.is_fitted
+                 or self.since_fit >= settings.anomaly_refit_every)
+        ):
+            self.anomaly_detector.fit(list(self.history))
+            self.since_fit = 0
+
+        return anomalies
+
+
+class DetectorRegistry:
+    """
+    Per-model DetectorState cache with LRU eviction.
+
+    State is dropped when the model's baseline changes — immediately
+    for saves in this process (BaselineStore change hook), and on the
+    next lookup when another process wrote a newer baseline file.
+    """
+
+    _states: "OrderedDict[str, DetectorState]" = OrderedDict()
+
+    # -------------------------------------------------
+    @classmethod
+    def get(cls, model_url: str) -> DetectorState:
+        state = cls._states.get(model_url)
+
+        if (
+            state is None
+            or state.baseline_version != BaselineStore.latest_version(model_url)
+        ):
+            state = DetectorState(model_url)
+            cls._states[model_url] = state
+
+        cls._states.move_to_end(model_url)
+        while len(cls._states) > get_settings().detector_registry_max_models:
+            cls._states.popitem(last=False)
+
+        return state
+
+    # -------------------------------------------------
+    @classmethod
+    def invalidate(cls, model_url: str) -> None:
+        cls._states.pop(model_url, None)
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot(cls, model_url: str) -> Optional[Dict[str, Any]]:
+        state = cls._states.get(model_url)
+        if state is None:
+            return None
+
+        return {
+            "baseline_version": state.baseline_version,
+            "history_size": len(state.history),
+            "anomaly_model_fitted": state.anomaly_detector.is_fitted,
+        }
+
+
+BaselineStore.on_change(DetectorRegistry.invalidate)
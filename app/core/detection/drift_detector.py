@@ -1,6 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import numpy as np
-from scipy.stats import ks_2samp
+from scipy.stats import ks_2samp, kstwo, norm
+
+from app.core.detection.feature_drift import FeatureDriftEngine, FeatureMatrix
+from app.core.detection.histogram_drift import HistogramDrift
+from app.core.metrics.quantile_sketch import QuantileSketch
+from app.core.metrics.time_aggregates import SignalAggregate
 
 
 class DriftDetector:
@@ -8,19 +13,220 @@ class DriftDetector:
     Detects model drift using:
 
     1. Output-level drift (confidence variance explosion)
-    2. Feature-level drift (mean shift)
-    3. Statistical distribution drift (KS-test on confidence scores)
+    2. Feature-level drift (mean shift, variance ratio, KS, Wasserstein;
+       all features at once, see FeatureDriftEngine)
+    3. Statistical distribution drift (KS-test on confidence scores,
+       from the baseline's quantile sketch when it has one)
+    4. Binned distribution drift (PSI / Jensen-Shannon on confidence,
+       against bins precomputed with the baseline)
+
+    compare_windows() runs the same kind of comparison between two time
+    windows using only their aggregates (count / sum / sum of squares and
+    sketches), e.g. the last minute against the last hour.
     """
 
+    QUANTILES = (0.1, 0.5, 0.9)
+
     def __init__(
         self,
         confidence_threshold: float = 1.5,
         feature_drift_threshold: float = 0.2,
         significance_level: float = 0.05,
+        psi_threshold: float = 0.2,
+        js_threshold: float = 0.1,
+        histogram_min_samples: int = 30,
     ):
         self.confidence_threshold = confidence_threshold
         self.feature_drift_threshold = feature_drift_threshold
         self.significance_level = significance_level
+        self.psi_threshold = psi_threshold
+        self.js_threshold = js_threshold
+        self.histogram_min_samples = histogram_min_samples
+
+    @staticmethod
+    def prepare(baseline: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Converts a baseline's raw score lists to float arrays (and its
+        features to a FeatureMatrix, its histograms to arrays) once, so
+        repeated detect() calls against it skip the conversion.
+        Baselines saved before histograms existed get them derived here.
+        """
+        if baseline is None:
+            return None
+
+        prepared = dict(baseline)
+        if isinstance(baseline.get("sketches"), dict):
+            prepared["sketches"] = {
+                name: QuantileSketch.from_dict(data)
+                for name, data in baseline["sketches"].items()
+            }
+        if isinstance(baseline.get("confidence_scores"), list):
+            prepared["confidence_scores"] = np.asarray(baseline["confidence_scores"], dtype=float)
+        if isinstance(baseline.get("features"), dict):
+            prepared["features"] = FeatureMatrix.from_features(baseline["features"])
+
+        histogram = DriftDetector._histogram(prepared, "confidence")
+        if histogram is not None:
+            prepared["histograms"] = {
+                **(baseline.get("histograms") or {}),
+                "confidence": HistogramDrift.prepare(histogram),
+            }
+        return prepared
+
+    @staticmethod
+    def _sketch(metrics: Dict[str, Any], signal: str) -> Optional[QuantileSketch]:
+        sketch = (metrics.get("sketches") or {}).get(signal)
+        if isinstance(sketch, dict):
+            return QuantileSketch.from_dict(sketch)
+        return sketch
+
+    @staticmethod
+    def _histogram(baseline: Dict[str, Any], signal: str) -> Optional[Dict[str, Any]]:
+        """
+        The baseline's stored reference histogram for a signal, else one
+        built from its sketch or (confidence only) raw scores.
+        """
+        histogram = (baseline.get("histograms") or {}).get(signal)
+        if histogram is not None:
+            return histogram
+
+        sketch = DriftDetector._sketch(baseline, signal)
+        scores = baseline.get("confidence_scores") if signal == "confidence" else None
+        if sketch is None and isinstance(scores, (list, np.ndarray)):
+            sketch = QuantileSketch.of(np.asarray(scores, dtype=float))
+        return HistogramDrift.reference(sketch) if sketch is not None else None
+
+    @classmethod
+    def confidence_test(
+        cls,
+        baseline: Dict[str, Any],
+        current: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Two-sample KS test of baseline vs current confidence.
+
+        With a baseline sketch, the statistic comes from the sketch CDFs
+        (less their rank error bounds) and the p-value from the KS distribution at
+        the effective sample size; while both sketches still hold every
+        sample the exact test is used. Baselines without a sketch fall
+        back to the raw score lists. None if either side has < 2 samples.
+        """
+        base = cls._sketch(baseline, "confidence")
+        curr_scores = current.get("confidence_scores")
+
+        if base is None:
+            base_scores = baseline.get("confidence_scores")
+            if (
+                not isinstance(base_scores, (list, np.ndarray))
+                or not isinstance(curr_scores, (list, np.ndarray))
+                or len(base_scores) < 2
+                or len(curr_scores) < 2
+            ):
+                return None
+            stat, p_value = ks_2samp(
+                np.asarray(base_scores, dtype=float),
+                np.asarray(curr_scores, dtype=float),
+            )
+            return {"method": "KS-test", "statistic": float(stat), "p_value": float(p_value)}
+
+        curr = cls._sketch(current, "confidence")
+        if curr is None and isinstance(curr_scores, (list, np.ndarray)):
+            curr = QuantileSketch.of(np.asarray(curr_scores, dtype=float), k=base.k)
+        if curr is None or base.n < 2 or curr.n < 2:
+            return None
+
+        stat, p_value, method = cls._sketch_ks(base, curr)
+
+        return {
+            "method": method,
+            "statistic": float(stat),
+            "p_value": float(p_value),
+            "quantiles": {
+                f"p{int(q * 100)}": {
+                    "baseline": round(base.quantile(q), 6),
+                    "current": round(curr.quantile(q), 6),
+                }
+                for q in cls.QUANTILES
+            },
+        }
+
+    @staticmethod
+    def _sketch_ks(base: QuantileSketch, curr: QuantileSketch) -> Tuple[float, float, str]:
+        if base.exact and curr.exact:
+            stat, p_value = ks_2samp(base.retained(), curr.retained())
+            return float(stat), float(p_value), "KS-test"
+
+        # Only the part of the distance the sketches' rank error cannot explain
+        stat = max(
+            0.0,
+            QuantileSketch.ks_statistic(base, curr) - base.rank_error - curr.rank_error,
+        )
+        effective_n = max(1, round(base.n * curr.n / (base.n + curr.n)))
+        return stat, float(kstwo.sf(stat, effective_n)), "KS-test (sketch)"
+
+    def compare_windows(
+        self,
+        reference: Dict[str, SignalAggregate],
+        recent: Dict[str, SignalAggregate],
+    ) -> Dict[str, Any]:
+        """
+        Drift of a recent window against a reference window, per signal:
+        Welch z-test on the means and, for sketched signals, a KS test
+        on the sketches. Needs nothing but the two windows' aggregates.
+        """
+        drift_signals: Dict[str, Any] = {}
+
+        for signal, ref in reference.items():
+            cur = recent.get(signal)
+            if cur is None or ref.count < 2 or cur.count < 2:
+                continue
+
+            se = np.sqrt(ref.variance / ref.count + cur.variance / cur.count)
+            shift = cur.mean - ref.mean
+            if se > 0:
+                mean_p = float(2 * norm.sf(abs(shift) / se))
+            else:
+                mean_p = 1.0 if shift == 0 else 0.0
+
+            entry = {
+                "reference": ref.summary(),
+                "recent": cur.summary(),
+                "mean_shift": round(shift, 6),
+                "mean_shift_p_value": round(mean_p, 6),
+            }
+            drifted = mean_p < self.significance_level
+
+            if ref.sketch is not None and cur.sketch is not None:
+                stat, ks_p, method = self._sketch_ks(ref.sketch, cur.sketch)
+                entry.update({
+                    "method": method,
+                    "ks_statistic": round(stat, 6),
+                    "ks_p_value": round(ks_p, 6),
+                })
+                drifted = drifted or ks_p < self.significance_level
+
+            entry["drift_detected"] = drifted
+            entry["significance_level"] = self.significance_level
+            drift_signals[signal] = entry
+
+        if not drift_signals:
+            drift_signals["status"] = "no_drift_detected"
+
+        return drift_signals
+
+    @staticmethod
+    def drift_detected(drift: Dict[str, Any]) -> bool:
+        """
+        True if any signal in a detect() result reports drift.
+        """
+        for signal in drift.values():
+            if isinstance(signal, dict) and (
+                signal.get("status") == "drift_detected" or signal.get("drift_detected")
+            ):
+                return True
+            if isinstance(signal, list) and signal:
+                return True
+        return False
 
     def detect(
         self,
@@ -50,43 +256,14 @@ class DriftDetector:
                 }
 
         
-        # 2️⃣ Feature-level drift (mean shift)
+        # 2️⃣ Feature-level drift (columnar: mean shift, variance, KS, Wasserstein)
         
-        baseline_features = baseline.get("features", {})
-        current_features = current.get("features", {})
-
-        feature_drifts = []
-
-        if isinstance(baseline_features, dict) and isinstance(current_features, dict):
-            for feature, base_values in baseline_features.items():
-
-                if (
-                    feature not in current_features
-                    or not base_values
-                    or not current_features[feature]
-                ):
-                    continue
-
-                base_arr = np.array(base_values, dtype=float)
-                curr_arr = np.array(current_features[feature], dtype=float)
-
-                base_mean = np.mean(base_arr)
-                curr_mean = np.mean(curr_arr)
-
-                if base_mean == 0:
-                    drift_score = abs(curr_mean)
-                else:
-                    drift_score = abs(curr_mean - base_mean) / abs(base_mean)
-
-                if drift_score > self.feature_drift_threshold:
-                    feature_drifts.append(
-                        {
-                            "feature": feature,
-                            "baseline_mean": round(float(base_mean), 6),
-                            "current_mean": round(float(curr_mean), 6),
-                            "drift_score": round(float(drift_score), 6),
-                        }
-                    )
+        feature_drifts = FeatureDriftEngine.compare(
+            baseline.get("features"),
+            current.get("features"),
+            mean_shift_threshold=self.feature_drift_threshold,
+            significance_level=self.significance_level,
+        )
 
         if feature_drifts:
             drift_signals["feature_mean_shift"] = feature_drifts
@@ -94,29 +271,40 @@ class DriftDetector:
         
         # 3️⃣ Statistical drift (KS-test on confidence scores)
         
-        baseline_conf = baseline.get("confidence_scores")
-        current_conf = current.get("confidence_scores")
-
-        if (
-            isinstance(baseline_conf, list)
-            and isinstance(current_conf, list)
-            and len(baseline_conf) > 1
-            and len(current_conf) > 1
-        ):
-            stat, p_value = ks_2samp(
-                np.array(baseline_conf, dtype=float),
-                np.array(current_conf, dtype=float),
-            )
+        test = self.confidence_test(baseline, current)
 
+        if test is not None:
             drift_signals["confidence_distribution"] = {
-                "method": "KS-test",
-                "statistic": round(float(stat), 6),
-                "p_value": round(float(p_value), 6),
-                "drift_detected": p_value < self.significance_level,
+                **test,
+                "statistic": round(test["statistic"], 6),
+                "p_value": round(test["p_value"], 6),
+                "drift_detected": test["p_value"] < self.significance_level,
                 "significance_level": self.significance_level,
             }
 
         
+        # 4️⃣ Binned drift (PSI / Jensen-Shannon on confidence scores)
+        
+        reference = self._histogram(baseline, "confidence")
+        current_conf = current.get("confidence_scores")
+
+        if reference is not None and isinstance(current_conf, (list, np.ndarray)):
+            binned = HistogramDrift.compare(reference, current_conf)
+
+            if binned is not None:
+                drift_signals["confidence_histogram"] = {
+                    "method": "PSI / Jensen-Shannon",
+                    **binned,
+                    "drift_detected": binned["samples"] >= self.histogram_min_samples
+                    and (
+                        binned["psi"] > self.psi_threshold
+                        or binned["js_divergence"] > self.js_threshold
+                    ),
+                    "psi_threshold": self.psi_threshold,
+                    "js_threshold": self.js_threshold,
+                }
+
+        
         # Final safety net
         
         if not drift_signals:
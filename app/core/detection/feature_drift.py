@@ -0,0 +1,162 @@
+from typing import Dict, Any, Iterable, List, Union
+
+import numpy as np
+from scipy.stats import kstwobign
+
+
+class FeatureMatrix:
+    """
+    Columnar feature store: a (features × samples) float32 matrix with a
+    name → row index, so each feature's samples are contiguous. Features
+    with fewer samples are NaN-padded.
+    """
+
+    def __init__(self, names: List[str], matrix: np.ndarray):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.matrix = matrix
+
+    # -------------------------------------------------
+    @classmethod
+    def from_features(cls, features: Dict[str, Iterable[float]]) -> "FeatureMatrix":
+        columns = [np.asarray(values, dtype=np.float32).ravel() for values in features.values()]
+        width = max((c.size for c in columns), default=0)
+
+        matrix = np.full((len(columns), width), np.nan, dtype=np.float32)
+        for i, column in enumerate(columns):
+            matrix[i, : column.size] = column
+        return cls(list(features), matrix)
+
+    # -------------------------------------------------
+    @classmethod
+    def of(cls, features: Union["FeatureMatrix", Dict[str, Any], None]) -> "FeatureMatrix":
+        if isinstance(features, FeatureMatrix):
+            return features
+        return cls.from_features(features if isinstance(features, dict) else {})
+
+    # -------------------------------------------------
+    def rows(self, names: List[str]) -> np.ndarray:
+        return self.matrix[[self.index[name] for name in names]]
+
+    # -------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class FeatureDriftEngine:
+    """
+    Drift statistics for every shared feature at once:
+
+    - relative mean shift (|Δmean| / |baseline mean|)
+    - variance ratio (current / baseline)
+    - two-sample KS statistic + asymptotic p-value
+    - Wasserstein-1 distance
+
+    A feature drifts when its mean shift exceeds the threshold or its
+    KS p-value is below the significance level. Drifting features are
+    returned ranked by mean shift, then KS statistic.
+    """
+
+    # -------------------------------------------------
+    @staticmethod
+    def _distribution_stats(base: np.ndarray, curr: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        KS and Wasserstein-1 per feature (row) from one sort of the
+        pooled samples; NaN padding sorts last and is masked out.
+        """
+        pooled = np.concatenate([base, curr], axis=1)
+        n_base = (~np.isnan(base)).sum(axis=1, keepdims=True)
+        n_curr = (~np.isnan(curr)).sum(axis=1, keepdims=True)
+
+        order = np.argsort(pooled, axis=1)
+        values = np.sort(pooled, axis=1)
+        valid = ~np.isnan(values)
+
+        # Each sorted sample moves F_base - F_curr by +1/n_base (baseline)
+        # or -1/n_curr (current); its origin is read off its sort index.
+        # Padding sorts last, so it never reaches a valid position's sum.
+        step_size = np.where(order < base.shape[1], 1.0 / n_base, -1.0 / n_curr)
+        gap = np.abs(np.cumsum(step_size, axis=1))
+
+        # ECDFs are only compared after the last of a run of ties
+        step = np.diff(values, axis=1)
+        at_step = valid.copy()
+        at_step[:, :-1] &= step != 0
+
+        statistic = np.where(at_step, gap, 0.0).max(axis=1)
+        wasserstein = np.where(valid[:, 1:], gap[:, :-1] * step, 0.0).sum(axis=1)
+
+        n_base, n_curr = n_base[:, 0], n_curr[:, 0]
+        effective_n = n_base * n_curr / (n_base + n_curr)
+        return {
+            "ks_statistic": statistic,
+            "ks_p_value": kstwobign.sf(statistic * np.sqrt(effective_n)),
+            "wasserstein": wasserstein,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def compare(
+        cls,
+        baseline: Union[FeatureMatrix, Dict[str, Any], None],
+        current: Union[FeatureMatrix, Dict[str, Any], None],
+        mean_shift_threshold: float,
+        significance_level: float,
+    ) -> List[Dict[str, Any]]:
+        baseline = FeatureMatrix.of(baseline)
+        current = FeatureMatrix.of(current)
+
+        names = [name for name in baseline.names if name in current.index]
+        if not names:
+            return []
+
+        base = baseline.rows(names)
+        curr = current.rows(names)
+        usable = (~np.isnan(base)).any(axis=1) & (~np.isnan(curr)).any(axis=1)
+        if not usable.any():
+            return []
+
+        names = [name for name, ok in zip(names, usable) if ok]
+        base, curr = base[usable], curr[usable]
+
+        base_mean = np.nanmean(base, axis=1, dtype=np.float64)
+        curr_mean = np.nanmean(curr, axis=1, dtype=np.float64)
+        base_var = np.nanvar(base, axis=1, dtype=np.float64)
+        curr_var = np.nanvar(curr, axis=1, dtype=np.float64)
+
+        mean_shift = np.where(
+            base_mean == 0,
+            np.abs(curr_mean),
+            np.abs(curr_mean - base_mean) / np.where(base_mean == 0, 1.0, np.abs(base_mean)),
+        )
+        variance_ratio = np.where(
+            base_var > 0,
+            curr_var / np.where(base_var > 0, base_var, 1.0),
+            np.where(curr_var > 0, np.inf, 1.0),
+        )
+        stats = cls._distribution_stats(base, curr)
+
+        drifted = (mean_shift > mean_shift_threshold) | (
+            stats["ks_p_value"] < significance_level
+        )
+        ranked = [
+            j for j in np.lexsort((-stats["ks_statistic"], -mean_shift)) if drifted[j]
+        ]
+
+        return [
+            {
+                "feature": names[j],
+                "baseline_mean": round(float(base_mean[j]), 6),
+                "current_mean": round(float(curr_mean[j]), 6),
+                "drift_score": round(float(mean_shift[j]), 6),
+                "variance_ratio": (
+                    round(float(variance_ratio[j]), 6)
+                    if np.isfinite(variance_ratio[j])
+                    else None
+                ),
+                "ks_statistic": round(float(stats["ks_statistic"][j]), 6),
+                "ks_p_value": round(float(stats["ks_p_value"][j]), 6),
+                "wasserstein": round(float(stats["wasserstein"][j]), 6),
+            }
+            for j in ranked
+        ]
@@ -0,0 +1,86 @@
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from app.core.metrics.quantile_sketch import QuantileSketch
+
+
+class HistogramDrift:
+    """
+    Binned drift: Population Stability Index and Jensen-Shannon divergence.
+
+    Bin edges (baseline deciles) and reference frequencies are computed
+    once, when the baseline is built, and stored with it. A check only
+    bins the current values (searchsorted + bincount), O(n) with a state
+    of a few numbers.
+    """
+
+    BINS = 10
+    EPSILON = 1e-4  # floor for empty bins in PSI
+
+    # -------------------------------------------------
+    @classmethod
+    def reference(cls, sketch: QuantileSketch, bins: int = BINS) -> Optional[Dict[str, Any]]:
+        """
+        Quantile bin edges and the baseline's share of samples per bin.
+        Bin i holds values in (edges[i-1], edges[i]]; the outer bins are open.
+        """
+        if sketch.n == 0:
+            return None
+
+        edges = np.unique([sketch.quantile(i / bins) for i in range(1, bins)])
+        cdf = sketch.cdf(edges)
+        frequencies = np.diff(np.concatenate([[0.0], cdf, [1.0]]))
+
+        return {
+            "edges": edges.tolist(),
+            "frequencies": frequencies.round(6).tolist(),
+            "samples": sketch.n,
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def prepare(reference: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **reference,
+            "edges": np.asarray(reference["edges"], dtype=float),
+            "frequencies": np.asarray(reference["frequencies"], dtype=float),
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def compare(cls, reference: Dict[str, Any], values: Any) -> Optional[Dict[str, Any]]:
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return None
+
+        edges = np.asarray(reference["edges"], dtype=float)
+        expected = np.asarray(reference["frequencies"], dtype=float)
+        counts = np.bincount(
+            np.searchsorted(edges, values, side="left"), minlength=expected.size
+        )
+        actual = counts / values.size
+
+        floored_e = np.maximum(expected, cls.EPSILON)
+        floored_a = np.maximum(actual, cls.EPSILON)
+        psi = float(np.sum((floored_a - floored_e) * np.log(floored_a / floored_e)))
+
+        mixture = (expected + actual) / 2
+        js = 0.5 * (cls._kl(expected, mixture) + cls._kl(actual, mixture))
+
+        return {
+            "psi": round(psi, 6),
+            "js_divergence": round(js, 6),
+            "bins": int(expected.size),
+            "samples": int(values.size),
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def _kl(p: np.ndarray, q: np.ndarray) -> float:
+        """
+        KL(p || q) in bits; terms with p == 0 contribute nothing.
+        """
+        mask = p > 0
+        return float(np.sum(p[mask] * np.log2(p[mask] / q[mask])))
@@ -0,0 +1,178 @@
+import math
+import random
+from typing import Dict, Any, Iterable, List, Tuple
+
+import numpy as np
+
+from app.utils.config import get_settings
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty).
+
+    Keeps O(k) items in levels of compactors; an item at level h
+    stands for 2**h samples. Rank error is roughly 1.7 / k with high
+    probability, independent of the number of samples. Sketches merge
+    by concatenating levels, so baselines from different windows or
+    workers can be combined, and serialize to a few KB of JSON.
+
+    Each compaction at level h shifts any rank by ±2**h with a random
+    sign; the sum of their variances is tracked so rank_error gives a
+    data-dependent (~95%) bound instead of the worst case.
+    """
+
+    C = 2.0 / 3.0
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self.error_var = 0.0
+        self._rng = random.Random()
+
+    # -------------------------------------------------
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.C ** depth)))
+
+    # -------------------------------------------------
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+
+                items = sorted(self.levels[level])
+                leftover = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randint(0, 1)
+
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = leftover
+                self.error_var += 4.0 ** level
+            level += 1
+
+    # -------------------------------------------------
+    def update(self, value: float) -> None:
+        self.levels[0].append(float(value))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    # -------------------------------------------------
+    def update_many(self, values: Iterable[float]) -> "QuantileSketch":
+        for value in values:
+            self.update(value)
+        return self
+
+    # -------------------------------------------------
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self.error_var += other.error_var
+        self._compress()
+        return self
+
+    # -------------------------------------------------
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorted retained items and their cumulative weights.
+        """
+        values = np.concatenate([np.asarray(items, dtype=float) for items in self.levels])
+        weights = np.concatenate([
+            np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    # -------------------------------------------------
+    def cdf(self, points: np.ndarray) -> np.ndarray:
+        """
+        Estimated fraction of samples <= each point.
+        """
+        values, cumulative = self._weighted()
+        if values.size == 0:
+            return np.zeros(len(points))
+
+        idx = np.searchsorted(values, points, side="right")
+        cum = np.concatenate([[0.0], cumulative])
+        return cum[idx] / cumulative[-1]
+
+    # -------------------------------------------------
+    def quantile(self, q: float) -> float:
+        values, cumulative = self._weighted()
+        if values.size == 0:
+            return float("nan")
+
+        idx = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[min(idx, values.size - 1)])
+
+    # -------------------------------------------------
+    @property
+    def exact(self) -> bool:
+        """
+        True until the first compaction: every sample is still retained.
+        """
+        return len(self.levels) == 1
+
+    # -------------------------------------------------
+    @property
+    def rank_error(self) -> float:
+        """
+        ~95% bound on the normalized rank (CDF) error of any query.
+        """
+        return 2.0 * math.sqrt(self.error_var) / self.n if self.n else 0.0
+
+    # -------------------------------------------------
+    def retained(self) -> np.ndarray:
+        return np.concatenate([np.asarray(items, dtype=float) for items in self.levels])
+
+    # -------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "kll",
+            "k": self.k,
+            "n": self.n,
+            "error_var": self.error_var,
+            "levels": self.levels,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(k=data["k"])
+        sketch.n = data["n"]
+        sketch.error_var = data.get("error_var", 0.0)
+        sketch.levels = [[float(v) for v in items] for items in data["levels"]] or [[]]
+        return sketch
+
+    # -------------------------------------------------
+    @classmethod
+    def of(cls, values: Iterable[float], k: int = 200) -> "QuantileSketch":
+        return cls(k=k).update_many(values)
+
+    # -------------------------------------------------
+    @classmethod
+    def for_signals(cls, **signals: Iterable[float]) -> Dict[str, Dict[str, Any]]:
+        """
+        Serialized sketch per numeric signal (empty signals skipped).
+        """
+        k = get_settings().quantile_sketch_k
+        sketches = {name: cls.of(values, k=k) for name, values in signals.items()}
+        return {name: s.to_dict() for name, s in sketches.items() if s.n}
+
+    # -------------------------------------------------
+    @staticmethod
+    def ks_statistic(a: "QuantileSketch", b: "QuantileSketch") -> float:
+        """
+        Two-sample KS distance sup |F_a - F_b|, evaluated at every
+        retained item of both sketches.
+        """
+        points = np.union1d(a.retained(), b.retained())
+        if points.size == 0:
+            return 0.0
+        return float(np.max(np.abs(a.cdf(points) - b.cdf(points))))
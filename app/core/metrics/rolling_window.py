@@ -0,0 +1,238 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from app.core.metrics.quantile_sketch import QuantileSketch
+from app.utils.config import get_settings
+
+SIGNALS = ("confidence", "error", "latency_ms")
+
+
+class Welford:
+    """
+    Running mean / variance with O(1) add and remove (so it can track
+    the contents of a ring buffer as old values are evicted).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    # -------------------------------------------------
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    # -------------------------------------------------
+    def remove(self, x: float) -> None:
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (x - self.mean))
+
+    # -------------------------------------------------
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    # -------------------------------------------------
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 6),
+            "std": round(math.sqrt(self.variance), 6),
+        }
+
+
+class RingBuffer:
+    """
+    Fixed-size float64 ring of (timestamp, value) with a Welford
+    accumulator over its current contents. NaN values are stored
+    (to keep positions aligned across signals) but not accumulated.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = np.full(capacity, np.nan)
+        self.times = np.zeros(capacity)
+        self.head = 0
+        self.size = 0
+        self.stats = Welford()
+
+    # -------------------------------------------------
+    def push(self, value: float, ts: float) -> None:
+        if self.size == self.capacity:
+            evicted = self.values[self.head]
+            if not math.isnan(evicted):
+                self.stats.remove(evicted)
+        else:
+            self.size += 1
+
+        self.values[self.head] = value
+        self.times[self.head] = ts
+        if not math.isnan(value):
+            self.stats.add(value)
+        self.head = (self.head + 1) % self.capacity
+
+    # -------------------------------------------------
+    def window(self, n: Optional[int] = None, since: Optional[float] = None) -> np.ndarray:
+        """
+        Values oldest → newest: the last `n`, and/or those with a
+        timestamp >= `since`.
+        """
+        order = (np.arange(self.size) + self.head - self.size) % self.capacity
+        if n is not None:
+            order = order[-n:]
+        if since is not None:
+            order = order[self.times[order] >= since]
+        return self.values[order]
+
+
+class RollingMetrics:
+    """
+    Rolling per-model signals: confidence, error flag (0/1) and latency.
+    """
+
+    def __init__(self, capacity: int):
+        self.buffers = {signal: RingBuffer(capacity) for signal in SIGNALS}
+        self.lifetime = {signal: Welford() for signal in SIGNALS}
+
+    # -------------------------------------------------
+    def record(
+        self,
+        confidence: Optional[float],
+        error: bool,
+        latency_ms: Optional[float],
+        ts: float,
+    ) -> None:
+        values = {
+            "confidence": float(confidence) if confidence is not None else math.nan,
+            "error": 1.0 if error else 0.0,
+            "latency_ms": float(latency_ms) if latency_ms is not None else math.nan,
+        }
+        for signal, value in values.items():
+            self.buffers[signal].push(value, ts)
+            if not math.isnan(value):
+                self.lifetime[signal].add(value)
+
+    # -------------------------------------------------
+    def metrics(self, n: Optional[int] = None, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Metrics over the window, in BaselineBuilder.build() shape.
+        """
+        since = time.time() - seconds if seconds is not None else None
+        buffer = self.buffers["confidence"]
+        confidence = buffer.window(n, since)
+        errors = self.buffers["error"].window(n, since)
+        latency = self.buffers["latency_ms"].window(n, since)
+        confidence = confidence[~np.isnan(confidence)]
+        latency = latency[~np.isnan(latency)]
+
+        if confidence.size == 0:
+            return {
+                "avg_confidence": 0.0,
+                "confidence_std": 0.0,
+                "total_samples": 0,
+                "error_rate": 1.0,
+                "confidence_scores": [],
+                "features": {},
+                "avg_latency_ms": None,
+                "p95_latency_ms": None,
+            }
+
+        # Whole buffer → the running accumulator already has mean / std
+        if since is None and (n is None or n >= buffer.size):
+            avg, std = buffer.stats.mean, math.sqrt(buffer.stats.variance)
+        else:
+            avg, std = float(confidence.mean()), float(confidence.std())
+
+        return {
+            "avg_confidence": avg,
+            "confidence_std": std,
+            "total_samples": int(confidence.size),
+            "error_rate": round(float(errors.mean()), 3),
+            "confidence_scores": confidence.tolist(),
+            "features": {},
+            "avg_latency_ms": round(float(latency.mean()), 3) if latency.size else None,
+            "p95_latency_ms": (
+                round(float(np.percentile(latency, 95)), 3) if latency.size else None
+            ),
+            "sketches": QuantileSketch.for_signals(
+                confidence=confidence.tolist(), latency_ms=latency.tolist()
+            ),
+        }
+
+    # -------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buffered": self.buffers["confidence"].size,
+            "window": {s: b.stats.snapshot() for s, b in self.buffers.items()},
+            "lifetime": {s: w.snapshot() for s, w in self.lifetime.items()},
+        }
+
+
+class RollingMetricsRegistry:
+    """
+    RollingMetrics per model, LRU-bounded. Keyed by model URL for
+    probes; ingested predictions use their model_id.
+    """
+
+    _models: "OrderedDict[str, RollingMetrics]" = OrderedDict()
+
+    # -------------------------------------------------
+    @classmethod
+    def _get(cls, model_key: str) -> RollingMetrics:
+        settings = get_settings()
+        rolling = cls._models.get(model_key)
+
+        if rolling is None:
+            rolling = RollingMetrics(settings.rolling_window_capacity)
+            cls._models[model_key] = rolling
+            while len(cls._models) > settings.rolling_registry_max_models:
+                cls._models.popitem(last=False)
+
+        cls._models.move_to_end(model_key)
+        return rolling
+
+    # -------------------------------------------------
+    @classmethod
+    def record(
+        cls,
+        model_key: str,
+        confidence: Optional[float],
+        error: bool,
+        latency_ms: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        cls._get(model_key).record(
+            confidence, error, latency_ms, ts if ts is not None else time.time()
+        )
+
+    # -------------------------------------------------
+    @classmethod
+    def window_metrics(cls, model_key: str) -> Dict[str, Any]:
+        """
+        Metrics over the configured analysis window: the last
+        rolling_window_samples samples, further limited to the last
+        rolling_window_seconds when that is set.
+        """
+        settings = get_settings()
+        return cls._get(model_key).metrics(
+            n=settings.rolling_window_samples,
+            seconds=settings.rolling_window_seconds,
+        )
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot(cls, model_key: str) -> Optional[Dict[str, Any]]:
+        rolling = cls._models.get(model_key)
+        return rolling.snapshot() if rolling is not None else None
@@ -0,0 +1,229 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional
+
+from app.core.metrics.quantile_sketch import QuantileSketch
+from app.utils.config import get_settings
+
+# Bucket resolutions, finest first; each level rolls up into the next
+LEVELS = (("minute", 60), ("hour", 3600), ("day", 86400))
+
+# Signals that get a sketch per bucket (the error flag only needs its mean)
+SKETCHED = ("confidence", "latency_ms")
+
+
+class SignalAggregate:
+    """
+    count / sum / sum of squares of one signal, plus an optional small
+    quantile sketch. Aggregates merge exactly (the sketch within its
+    rank error), so any window is a merge of the buckets it covers.
+    """
+
+    def __init__(self, sketched: bool):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.sketch = QuantileSketch(k=get_settings().aggregate_sketch_k) if sketched else None
+
+    # -------------------------------------------------
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        if self.sketch is not None:
+            self.sketch.update(value)
+
+    # -------------------------------------------------
+    def merge(self, other: "SignalAggregate") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    # -------------------------------------------------
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    # -------------------------------------------------
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return max(0.0, (self.total_sq - self.total * self.total / self.count) / (self.count - 1))
+
+    # -------------------------------------------------
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "count": self.count,
+            "mean": round(self.mean, 6) if self.count else None,
+            "std": round(math.sqrt(self.variance), 6) if self.count else None,
+        }
+        if self.sketch is not None:
+            summary["p50"] = round(self.sketch.quantile(0.5), 6) if self.count else None
+            summary["p95"] = round(self.sketch.quantile(0.95), 6) if self.count else None
+        return summary
+
+
+class Bucket:
+    """
+    Aggregates of every signal over [start, start + resolution).
+    """
+
+    def __init__(self, start: float):
+        self.start = start
+        self.signals = {
+            signal: SignalAggregate(sketched=signal in SKETCHED)
+            for signal in ("confidence", "error", "latency_ms")
+        }
+
+    # -------------------------------------------------
+    def add(self, values: Dict[str, Optional[float]]) -> None:
+        for signal, value in values.items():
+            if value is not None:
+                self.signals[signal].add(value)
+
+    # -------------------------------------------------
+    def merge(self, other: "Bucket") -> None:
+        for signal, aggregate in other.signals.items():
+            self.signals[signal].merge(aggregate)
+
+
+class TimeAggregates:
+    """
+    Minute → hour → day buckets for one model.
+
+    Samples land in the open minute bucket. When a bucket closes it is
+    kept (up to the level's retention) and merged into the open bucket
+    of the next level, so every level holds all data up to its last
+    closed child. Late samples are counted in the open minute.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        retention = {
+            "minute": settings.aggregate_minutes_retained,
+            "hour": settings.aggregate_hours_retained,
+            "day": settings.aggregate_days_retained,
+        }
+        self.closed = {name: deque(maxlen=retention[name]) for name, _ in LEVELS}
+        self.open: Dict[str, Optional[Bucket]] = {name: None for name, _ in LEVELS}
+
+    # -------------------------------------------------
+    def _close(self, level: int) -> None:
+        name, _ = LEVELS[level]
+        bucket = self.open[name]
+        self.closed[name].append(bucket)
+        self.open[name] = None
+
+        if level + 1 == len(LEVELS):
+            return
+
+        parent_name, parent_size = LEVELS[level + 1]
+        parent_start = bucket.start - bucket.start % parent_size
+        parent = self.open[parent_name]
+        if parent is not None and parent_start > parent.start:
+            self._close(level + 1)
+            parent = None
+        if parent is None:
+            parent = self.open[parent_name] = Bucket(parent_start)
+        parent.merge(bucket)
+
+    # -------------------------------------------------
+    def record(self, values: Dict[str, Optional[float]], ts: float) -> None:
+        start = ts - ts % LEVELS[0][1]
+        bucket = self.open["minute"]
+
+        if bucket is not None and start > bucket.start:
+            self._close(0)
+            bucket = None
+        if bucket is None:
+            bucket = self.open["minute"] = Bucket(start)
+        bucket.add(values)
+
+    # -------------------------------------------------
+    def window(self, seconds: float, now: Optional[float] = None) -> Bucket:
+        """
+        Merged aggregates over the last `seconds`, read from the coarsest
+        level that is fine enough (and retained long enough) for the span.
+
+        A window is the last ceil(seconds / size) closed buckets of that
+        level plus the still-open buckets at and below it, so "1m" is the
+        last full minute plus the current partial one, and never just an
+        empty, freshly opened bucket.
+        """
+        now = now if now is not None else time.time()
+
+        level = len(LEVELS) - 1
+        for i, (name, size) in enumerate(LEVELS):
+            if seconds <= size * self.closed[name].maxlen:
+                level = i
+                break
+
+        name, size = LEVELS[level]
+        cutoff = now - now % size - math.ceil(seconds / size) * size
+
+        result = Bucket(cutoff)
+        for bucket in self.closed[name]:
+            if bucket.start >= cutoff:
+                result.merge(bucket)
+        for finer, _ in LEVELS[: level + 1]:
+            bucket = self.open[finer]
+            if bucket is not None and bucket.start >= cutoff:
+                result.merge(bucket)
+        return result
+
+
+class TimeAggregateRegistry:
+    """
+    TimeAggregates per model, LRU-bounded. Fed by every probe sample
+    and ingested prediction, like RollingMetricsRegistry.
+    """
+
+    _models: "OrderedDict[str, TimeAggregates]" = OrderedDict()
+
+    # -------------------------------------------------
+    @classmethod
+    def _get(cls, model_key: str, create: bool = True) -> Optional[TimeAggregates]:
+        aggregates = cls._models.get(model_key)
+
+        if aggregates is None:
+            if not create:
+                return None
+            aggregates = TimeAggregates()
+            cls._models[model_key] = aggregates
+            while len(cls._models) > get_settings().aggregate_registry_max_models:
+                cls._models.popitem(last=False)
+
+        cls._models.move_to_end(model_key)
+        return aggregates
+
+    # -------------------------------------------------
+    @classmethod
+    def record(
+        cls,
+        model_key: str,
+        confidence: Optional[float],
+        error: bool,
+        latency_ms: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        if not get_settings().aggregates_enabled:
+            return
+
+        cls._get(model_key).record(
+            {
+                "confidence": float(confidence) if confidence is not None else None,
+                "error": 1.0 if error else 0.0,
+                "latency_ms": float(latency_ms) if latency_ms is not None else None,
+            },
+            ts if ts is not None else time.time(),
+        )
+
+    # -------------------------------------------------
+    @classmethod
+    def window(cls, model_key: str, seconds: float) -> Optional[Bucket]:
+        aggregates = cls._get(model_key, create=False)
+        return aggregates.window(seconds) if aggregates is not None else None
@@ -27,13 +27,13 @@ class ModelProber:
 
         for payload in test_payloads:
             try:
-                start = time.time()
+                start = time.perf_counter()
                 response = requests.post(
                     prediction_url,
                     json=payload,
                     timeout=self.timeout,
                 )
-                latency = time.time() - start
+                latency = time.perf_counter() - start
                 total_latency += latency
 
                 if response.status_code != 200:
@@ -0,0 +1,298 @@
+import asyncio
+import time
+import httpx
+from typing import Dict, Any, List, Optional
+
+from app.core.probing.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from app.core.probing.response_cache import ResponseCache
+from app.core.probing.universal_model_caller import UniversalModelCaller
+from app.core.storage.payload_cache_store import PayloadCacheStore
+from app.utils.config import get_settings
+
+
+class AsyncProbeEngine:
+    """
+    Concurrent probe engine.
+
+    Fans out all probe calls for an endpoint at once over a shared,
+    pooled httpx.AsyncClient, bounded by a per-endpoint concurrency
+    limit. Returns the same normalized records as UniversalModelCaller.
+    """
+
+    _client: Optional[httpx.AsyncClient] = None
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    # -------------------------------------------------
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        if cls._client is None or cls._client.is_closed:
+            settings = get_settings()
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.probe_max_connections,
+                    max_keepalive_connections=settings.probe_max_connections,
+                ),
+            )
+        return cls._client
+
+    # -------------------------------------------------
+    @classmethod
+    async def aclose(cls) -> None:
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+        cls._semaphores.clear()
+
+    # -------------------------------------------------
+    @classmethod
+    def _semaphore(cls, model_url: str) -> asyncio.Semaphore:
+        if model_url not in cls._semaphores:
+            cls._semaphores[model_url] = asyncio.Semaphore(
+                get_settings().probe_concurrency_per_endpoint
+            )
+        return cls._semaphores[model_url]
+
+    # -------------------------------------------------
+    @classmethod
+    async def _call(
+        cls,
+        model_url: str,
+        payload: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        async with cls._semaphore(model_url):
+            return await UniversalModelCaller.acall(
+                cls.client(), model_url, payload
+            )
+
+    # -------------------------------------------------
+    @classmethod
+    async def _call_batch(
+        cls,
+        model_url: str,
+        batch_key: str,
+        payloads: List[Dict[str, Any]],
+        inputs: List[Any],
+    ) -> List[Dict[str, Any]]:
+        async with cls._semaphore(model_url):
+            results = await UniversalModelCaller.acall_batch(
+                cls.client(), model_url, batch_key, inputs
+            )
+
+        if results is not None:
+            return results
+
+        # Endpoint stopped answering in batch shape — remember that
+        # and fall back to one request per payload
+        PayloadCacheStore.put_batch(model_url, None)
+        return list(await asyncio.gather(
+            *(cls._call(model_url, payload) for payload in payloads)
+        ))
+
+    # -------------------------------------------------
+    @classmethod
+    async def probe(
+        cls,
+        model_url: str,
+        probe_runs: int = 5,
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        batch_size: Optional[int] = None,
+        use_cache: Optional[bool] = None,
+        deadline: Optional[float] = None,
+        inputs: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Sends `probe_runs` default-payload calls plus one call per
+        entry in `payloads`, all concurrently. Results keep submission
+        order.
+
+        With `inputs` (e.g. the texts of PayloadGenerator.generate()),
+        the default-payload calls carry those values in turn, in the
+        endpoint's detected format, instead of the detection input.
+
+        If the endpoint accepts list inputs, probes are packed into
+        batched requests of `batch_size` (default: probe_batch_size
+        setting; 1 disables batching).
+
+        With `use_cache` (default: response_cache_enabled setting),
+        answers for repeated payloads come from ResponseCache.
+
+        With a `deadline` (time.monotonic() value), probes still running
+        when it passes are cancelled and come back as deadline results.
+        """
+        # Dead endpoint → fail every probe at once, skip payload detection
+        breaker = CircuitBreakerRegistry.get(model_url)
+        total = probe_runs + len(payloads or [])
+        if breaker.rejecting():
+            breaker.record_rejections(total)
+            return [
+                UniversalModelCaller.circuit_open_result(model_url)
+                for _ in range(total)
+            ]
+
+        calls: List[Dict[str, Any]] = []
+
+        # Past the cooldown, a detection race on an uncached endpoint is
+        # the half-open trial itself, not extra requests ahead of it
+        trial = (
+            probe_runs > 0
+            and breaker.state != CircuitBreaker.CLOSED
+            and not UniversalModelCaller.payload_known(model_url)
+        )
+        if trial and not breaker.allow():
+            breaker.record_rejections(total - 1)
+            return [UniversalModelCaller.circuit_open_result(model_url) for _ in range(total)]
+
+        if probe_runs > 0:
+            # Resolve the auto-detected payload once, not per probe
+            resolving = (
+                UniversalModelCaller.arace_payload(cls.client(), model_url)
+                if trial
+                else UniversalModelCaller.aresolve_payload(cls.client(), model_url)
+            )
+            try:
+                default = await (
+                    asyncio.wait_for(resolving, cls._remaining(deadline))
+                    if deadline is not None
+                    else resolving
+                )
+            except asyncio.TimeoutError:
+                if trial:
+                    breaker.abandon()
+                return [UniversalModelCaller.deadline_result(model_url) for _ in range(total)]
+            except BaseException:
+                if trial:
+                    breaker.abandon()
+                raise
+
+            if trial:
+                if default is None and not UniversalModelCaller.payload_known(model_url):
+                    # Every candidate was rate limited — no verdict
+                    breaker.abandon()
+                    return [UniversalModelCaller.throttled_result(model_url) for _ in range(total)]
+                if default is None:
+                    breaker.record_failure()
+                    return [
+                        UniversalModelCaller.circuit_open_result(model_url)
+                        for _ in range(total)
+                    ]
+                breaker.record_success()
+            if inputs:
+                calls.extend(
+                    UniversalModelCaller.with_input(default, inputs[i % len(inputs)])
+                    for i in range(probe_runs)
+                )
+            else:
+                calls.extend([default] * probe_runs)
+
+        calls.extend(payloads or [])
+
+        settings = get_settings()
+        if batch_size is None:
+            batch_size = settings.probe_batch_size
+        if use_cache is None:
+            use_cache = settings.response_cache_enabled
+
+        if not use_cache:
+            return await cls._dispatch(model_url, calls, batch_size, deadline)
+
+        # Serve deterministic repeats from the response cache,
+        # send only the misses to the model
+        results: List[Optional[Dict[str, Any]]] = [
+            ResponseCache.get(model_url, payload) for payload in calls
+        ]
+        missing = [i for i, r in enumerate(results) if r is None]
+
+        fetched = await cls._dispatch(
+            model_url, [calls[i] for i in missing], batch_size, deadline
+        )
+        for i, record in zip(missing, fetched):
+            results[i] = record
+            if "error" not in record:
+                ResponseCache.put(model_url, calls[i], record)
+
+        return results
+
+    # -------------------------------------------------
+    @classmethod
+    async def _dispatch(
+        cls,
+        model_url: str,
+        calls: List[Dict[str, Any]],
+        batch_size: int,
+        deadline: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        if batch_size > 1 and len(calls) > 1:
+            inputs = [UniversalModelCaller.payload_input(p) for p in calls]
+            # Detection is a serial run of probe requests — on a cold
+            # cache, a deadline-bound call or an endpoint whose breaker
+            # is not closed sends single requests instead
+            detect = UniversalModelCaller.batch_key_known(model_url) or (
+                deadline is None
+                and CircuitBreakerRegistry.get(model_url).state == CircuitBreaker.CLOSED
+            )
+            if detect and all(i is not None for i in inputs):
+                batch_key = await UniversalModelCaller.adetect_batch_key(
+                    cls.client(), model_url
+                )
+                if batch_key is not None:
+                    starts = range(0, len(calls), batch_size)
+                    chunks = await cls._gather_until(
+                        [
+                            cls._call_batch(
+                                model_url,
+                                batch_key,
+                                calls[i:i + batch_size],
+                                inputs[i:i + batch_size],
+                            )
+                            for i in starts
+                        ],
+                        deadline,
+                    )
+                    return [
+                        record
+                        for i, chunk in zip(starts, chunks)
+                        for record in (
+                            chunk
+                            if chunk is not None
+                            else [UniversalModelCaller.deadline_result(model_url)]
+                            * len(calls[i:i + batch_size])
+                        )
+                    ]
+
+        records = await cls._gather_until(
+            [cls._call(model_url, payload) for payload in calls],
+            deadline,
+        )
+        return [
+            record if record is not None else UniversalModelCaller.deadline_result(model_url)
+            for record in records
+        ]
+
+    # -------------------------------------------------
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    # -------------------------------------------------
+    @classmethod
+    async def _gather_until(
+        cls,
+        coros: List[Any],
+        deadline: Optional[float],
+    ) -> List[Any]:
+        """
+        Like gather, but with a deadline: calls still running when it
+        passes are cancelled and returned as None (order preserved).
+        """
+        if deadline is None:
+            return list(await asyncio.gather(*coros))
+
+        tasks = [asyncio.create_task(c) for c in coros]
+        _, pending = await asyncio.wait(tasks, timeout=cls._remaining(deadline))
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return [None if task in pending else task.result() for task in tasks]
@@ -0,0 +1,187 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from app.utils.config import get_settings
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    closed    → calls pass; consecutive failures/timeouts are counted
+    open      → calls fail immediately until the cooldown elapses
+    half_open → a single trial call is let through; success closes
+                the breaker, failure re-opens it. A trial that is
+                cancelled, or outlives trial_timeout_seconds, frees
+                the slot for the next call instead of blocking it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        trial_timeout_seconds: float = 60.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.trial_timeout_seconds = trial_timeout_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_timeouts = 0
+        self.total_failures = 0
+        self.total_timeouts = 0
+        self.rejected_calls = 0
+        self.opened_at: Optional[float] = None
+        self._opened_wall: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    def _cooldown_elapsed(self) -> bool:
+        return (
+            self.opened_at is not None
+            and time.monotonic() - self.opened_at >= self.cooldown_seconds
+        )
+
+    # -------------------------------------------------
+    def rejecting(self) -> bool:
+        """
+        True while open and still cooling down (no trial is due yet).
+        """
+        with self._lock:
+            return self.state == self.OPEN and not self._cooldown_elapsed()
+
+    # -------------------------------------------------
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and self._cooldown_elapsed():
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if (
+                self.state == self.HALF_OPEN
+                and self._trial_in_flight
+                and time.monotonic() - self._trial_started >= self.trial_timeout_seconds
+            ):
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return True
+
+            self.rejected_calls += 1
+            return False
+
+    # -------------------------------------------------
+    def abandon(self) -> None:
+        """
+        A call ended without a verdict (cancelled): if it held the
+        half-open trial slot, give the slot to the next call.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    # -------------------------------------------------
+    def record_rejections(self, count: int) -> None:
+        with self._lock:
+            self.rejected_calls += count
+
+    # -------------------------------------------------
+    def record_success(self) -> None:
+        with self._lock:
+            # A late success from a call started before the breaker
+            # opened does not close it — only the half-open trial can
+            if self.state == self.OPEN:
+                return
+
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.consecutive_timeouts = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    # -------------------------------------------------
+    def record_failure(self, timed_out: bool = False) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            if timed_out:
+                self.consecutive_timeouts += 1
+                self.total_timeouts += 1
+
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._opened_wall = time.time()
+                self._trial_in_flight = False
+
+    # -------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = None
+            opened_at = None
+            if self.opened_at is not None:
+                elapsed = time.monotonic() - self.opened_at
+                retry_after = round(max(0.0, self.cooldown_seconds - elapsed), 3)
+                opened_at = datetime.fromtimestamp(
+                    self._opened_wall, tz=timezone.utc
+                ).isoformat()
+
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "consecutive_timeouts": self.consecutive_timeouts,
+                "total_failures": self.total_failures,
+                "total_timeouts": self.total_timeouts,
+                "rejected_calls": self.rejected_calls,
+                "failure_threshold": self.failure_threshold,
+                "opened_at": opened_at,
+                "retry_after_seconds": retry_after,
+            }
+
+
+class CircuitBreakerRegistry:
+    """
+    Process-wide breakers, one per model URL.
+    """
+
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_url: str) -> CircuitBreaker:
+        with cls._lock:
+            if model_url not in cls._breakers:
+                settings = get_settings()
+                cls._breakers[model_url] = CircuitBreaker(
+                    failure_threshold=settings.breaker_failure_threshold,
+                    cooldown_seconds=settings.breaker_cooldown_seconds,
+                    trial_timeout_seconds=settings.breaker_trial_timeout_seconds,
+                )
+            return cls._breakers[model_url]
+
+    @classmethod
+    def snapshot(cls, model_url: str) -> Dict[str, Any]:
+        return cls.get(model_url).snapshot()
+
+    @classmethod
+    def snapshot_all(cls) -> Dict[str, Dict[str, Any]]:
+        with cls._lock:
+            breakers = dict(cls._breakers)
+        return {url: b.snapshot() for url, b in breakers.items()}
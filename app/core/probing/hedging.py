@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, Any, Optional
+
+from app.core.probing.latency_tracker import LatencyTracker
+from app.utils.config import get_settings
+
+
+class HedgePolicy:
+    """
+    Hedged-request policy and counters, per endpoint.
+
+    A duplicate request is sent once the primary has been outstanding
+    longer than the endpoint's hedge percentile latency. Extra load is
+    capped: hedges may never exceed `probe_hedge_max_ratio` of the
+    primary requests sent to that endpoint.
+    """
+
+    _stats: Dict[str, Dict[str, int]] = {}
+    _lock = threading.Lock()
+
+    # -------------------------------------------------
+    @classmethod
+    def _entry(cls, model_url: str) -> Dict[str, int]:
+        if model_url not in cls._stats:
+            cls._stats[model_url] = {
+                "primary_requests": 0,
+                "hedged_requests": 0,
+                "hedge_wins": 0,
+            }
+        return cls._stats[model_url]
+
+    # -------------------------------------------------
+    @classmethod
+    def enabled(cls) -> bool:
+        return get_settings().probe_hedging_enabled
+
+    # -------------------------------------------------
+    @classmethod
+    def delay_for(cls, model_url: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging, or None while the endpoint
+        has too few latency samples to pick a delay.
+        """
+        settings = get_settings()
+        hist = LatencyTracker.histogram(model_url)
+
+        if hist.samples < settings.adaptive_timeout_min_samples:
+            return None
+
+        return hist.percentile(settings.probe_hedge_percentile) / 1000.0
+
+    # -------------------------------------------------
+    @classmethod
+    def record_primary(cls, model_url: str) -> None:
+        with cls._lock:
+            cls._entry(model_url)["primary_requests"] += 1
+
+    # -------------------------------------------------
+    @classmethod
+    def try_acquire(cls, model_url: str) -> bool:
+        """
+        Reserves one hedge if the endpoint is still under its budget.
+        """
+        max_ratio = get_settings().probe_hedge_max_ratio
+        with cls._lock:
+            entry = cls._entry(model_url)
+            if entry["hedged_requests"] + 1 > entry["primary_requests"] * max_ratio:
+                return False
+            entry["hedged_requests"] += 1
+            return True
+
+    # -------------------------------------------------
+    @classmethod
+    def release(cls, model_url: str) -> None:
+        """
+        Returns a reserved hedge that was not sent after all.
+        """
+        with cls._lock:
+            cls._entry(model_url)["hedged_requests"] -= 1
+
+    # -------------------------------------------------
+    @classmethod
+    def record_win(cls, model_url: str) -> None:
+        with cls._lock:
+            cls._entry(model_url)["hedge_wins"] += 1
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot(cls, model_url: str) -> Dict[str, Any]:
+        with cls._lock:
+            entry = dict(cls._entry(model_url))
+
+        primary = entry["primary_requests"]
+        hedged = entry["hedged_requests"]
+        delay = cls.delay_for(model_url)
+
+        return {
+            **entry,
+            "hedge_rate": round(hedged / primary, 4) if primary else 0.0,
+            "win_rate": round(entry["hedge_wins"] / hedged, 4) if hedged else 0.0,
+            "hedge_delay_ms": round(delay * 1000, 3) if delay is not None else None,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot_all(cls) -> Dict[str, Dict[str, Any]]:
+        with cls._lock:
+            urls = list(cls._stats)
+        return {url: cls.snapshot(url) for url in urls}
@@ -0,0 +1,162 @@
+import threading
+from collections import deque
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.utils.config import get_settings
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (1 ms → 120 s).
+
+    Counts are halved every `decay_every` samples so percentiles
+    follow the endpoint's recent behavior instead of its whole history.
+    """
+
+    EDGES_MS = np.geomspace(1.0, 120_000.0, 96)
+
+    def __init__(self, decay_every: int = 1000):
+        self.decay_every = decay_every
+        self.counts = np.zeros(len(self.EDGES_MS) + 1, dtype=np.float64)
+        self.samples = 0
+        self._since_decay = 0
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    def record(self, latency_ms: float) -> None:
+        bucket = int(np.searchsorted(self.EDGES_MS, latency_ms, side="left"))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.samples += 1
+            self._since_decay += 1
+            if self._since_decay >= self.decay_every:
+                self.counts *= 0.5
+                self._since_decay = 0
+
+    # -------------------------------------------------
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Upper bucket edge containing the q-th percentile, in ms.
+        """
+        with self._lock:
+            total = self.counts.sum()
+            if total == 0:
+                return None
+            cumulative = np.cumsum(self.counts)
+            bucket = int(np.searchsorted(cumulative, total * q / 100.0))
+
+        bucket = min(bucket, len(self.EDGES_MS) - 1)
+        return float(self.EDGES_MS[bucket])
+
+
+class LatencyTracker:
+    """
+    Per-endpoint latency histograms and the adaptive timeouts
+    derived from them: clamp(p99 × multiplier, min, max).
+
+    Endpoints with too few samples keep the caller's default timeout.
+    """
+
+    PHASES = ("connect_ms", "tls_ms", "ttfb_ms", "total_ms")
+    PHASE_WINDOW = 500
+
+    _histograms: Dict[str, LatencyHistogram] = {}
+    _phases: Dict[str, deque] = {}
+    _lock = threading.Lock()
+
+    # -------------------------------------------------
+    @classmethod
+    def histogram(cls, model_url: str) -> LatencyHistogram:
+        with cls._lock:
+            if model_url not in cls._histograms:
+                cls._histograms[model_url] = LatencyHistogram()
+            return cls._histograms[model_url]
+
+    # -------------------------------------------------
+    @classmethod
+    def record(cls, model_url: str, latency_ms: float) -> None:
+        cls.histogram(model_url).record(latency_ms)
+
+    # -------------------------------------------------
+    @classmethod
+    def record_phases(cls, model_url: str, phases: Dict[str, Any]) -> None:
+        with cls._lock:
+            if model_url not in cls._phases:
+                cls._phases[model_url] = deque(maxlen=cls.PHASE_WINDOW)
+            cls._phases[model_url].append(phases)
+
+    # -------------------------------------------------
+    @classmethod
+    def phase_summary(cls, model_url: str) -> Dict[str, Any]:
+        """
+        avg/p50/p95/p99 per phase over the endpoint's recent requests.
+        """
+        with cls._lock:
+            records = list(cls._phases.get(model_url, ()))
+
+        summary: Dict[str, Any] = {
+            "requests": len(records),
+            "reused_connections": sum(1 for r in records if r.get("reused_connection")),
+        }
+
+        for phase in cls.PHASES:
+            values = np.array(
+                [r[phase] for r in records if r.get(phase) is not None],
+                dtype=float,
+            )
+            if values.size == 0:
+                summary[phase] = None
+                continue
+
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[phase] = {
+                "avg": round(float(values.mean()), 3),
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+            }
+
+        return summary
+
+    # -------------------------------------------------
+    @classmethod
+    def timeout_for(
+        cls,
+        model_url: str,
+        default_seconds: float,
+    ) -> Tuple[float, str]:
+        """
+        Returns (timeout_seconds, source) where source is
+        "default" or "adaptive_p99".
+        """
+        settings = get_settings()
+        hist = cls.histogram(model_url)
+
+        if hist.samples < settings.adaptive_timeout_min_samples:
+            return float(default_seconds), "default"
+
+        p99_ms = hist.percentile(99)
+        timeout = p99_ms / 1000.0 * settings.adaptive_timeout_multiplier
+        timeout = min(
+            max(timeout, settings.adaptive_timeout_min_seconds),
+            settings.adaptive_timeout_max_seconds,
+        )
+        return round(timeout, 3), "adaptive_p99"
+
+    # -------------------------------------------------
+    @classmethod
+    def stats(cls, model_url: str) -> Dict[str, Any]:
+        hist = cls.histogram(model_url)
+        p50, p99 = hist.percentile(50), hist.percentile(99)
+        return {
+            "samples": hist.samples,
+            "p50_ms": round(p50, 3) if p50 is not None else None,
+            "p99_ms": round(p99, 3) if p99 is not None else None,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def tracked_urls(cls) -> List[str]:
+        with cls._lock:
+            return list(cls._histograms)
@@ -0,0 +1,60 @@
+import time
+from typing import Dict, Any, Optional
+
+
+class PhaseTimer:
+    """
+    Per-request phase timings from httpx/httpcore trace events,
+    on the monotonic perf_counter clock.
+
+    connect_ms covers TCP connect including name resolution (httpcore
+    resolves inside connect_tcp); connect_ms/tls_ms are 0.0 when a
+    pooled connection was reused.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self._marks: Dict[str, float] = {}
+
+    # -------------------------------------------------
+    async def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # e.g. "connection.connect_tcp.started", "http11.receive_response_headers.complete"
+        self._marks[event_name] = time.perf_counter()
+
+    # -------------------------------------------------
+    def stop(self) -> None:
+        self.end = time.perf_counter()
+
+    # -------------------------------------------------
+    def _span_ms(self, prefix: str) -> float:
+        started = self._marks.get(f"{prefix}.started")
+        complete = self._marks.get(f"{prefix}.complete")
+        if started is None or complete is None:
+            return 0.0
+        return (complete - started) * 1000
+
+    # -------------------------------------------------
+    def _first_byte(self) -> Optional[float]:
+        for protocol in ("http11", "http2"):
+            mark = self._marks.get(f"{protocol}.receive_response_headers.complete")
+            if mark is not None:
+                return mark
+        return None
+
+    # -------------------------------------------------
+    def phases(self) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        first_byte = self._first_byte()
+
+        return {
+            "connect_ms": round(self._span_ms("connection.connect_tcp"), 3),
+            "tls_ms": round(self._span_ms("connection.start_tls"), 3),
+            "ttfb_ms": (
+                round((first_byte - self.start) * 1000, 3)
+                if first_byte is not None
+                else None
+            ),
+            "total_ms": round((end - self.start) * 1000, 3),
+            "reused_connection": "connection.connect_tcp.started" not in self._marks,
+        }
@@ -0,0 +1,233 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Any, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from app.utils.config import get_settings
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second, holding at most `capacity`.
+    A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    # -------------------------------------------------
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    # -------------------------------------------------
+    def wait_time(self) -> float:
+        """
+        Seconds until one token is available (0.0 if available now).
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    # -------------------------------------------------
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+class ProbeRateLimiter:
+    """
+    Probe rate limits per endpoint (model URL) and per host.
+
+    Every outgoing model request, sync or async, needs a token from both
+    its endpoint bucket and its host bucket. Over-budget requests are queued until
+    tokens refill (mode "queue", bounded by a max wait) or rejected
+    at once (mode "shed").
+    """
+
+    _buckets: Dict[str, TokenBucket] = {}
+    _stats: Dict[str, Dict[str, float]] = {}
+    # The sync request path takes tokens from worker threads
+    _lock = threading.RLock()
+
+    # -------------------------------------------------
+    @classmethod
+    def _limits_for(cls, key: str, scope: str) -> Tuple[float, float]:
+        settings = get_settings()
+        override = settings.probe_rate_limits.get(key)
+
+        if scope == "endpoint":
+            rate, burst = (
+                settings.probe_rate_limit_per_endpoint,
+                settings.probe_burst_per_endpoint,
+            )
+        else:
+            rate, burst = (
+                settings.probe_rate_limit_per_host,
+                settings.probe_burst_per_host,
+            )
+
+        if override is not None:
+            rate, burst = override, max(override, 1.0)
+
+        return rate, burst
+
+    # -------------------------------------------------
+    @classmethod
+    def _bucket(cls, key: str, scope: str) -> TokenBucket:
+        if key not in cls._buckets:
+            cls._buckets[key] = TokenBucket(*cls._limits_for(key, scope))
+            cls._stats[key] = {
+                "scope": scope,
+                "allowed": 0,
+                "queued": 0,
+                "shed": 0,
+                "total_wait_ms": 0.0,
+            }
+        return cls._buckets[key]
+
+    # -------------------------------------------------
+    @classmethod
+    def configure(cls, key: str, rate: float, burst: Optional[float] = None) -> None:
+        """
+        Sets a limit for one model URL or host at runtime.
+        """
+        scope = "endpoint" if "://" in key else "host"
+        with cls._lock:
+            cls._bucket(key, scope)
+            cls._buckets[key] = TokenBucket(rate, burst if burst is not None else max(rate, 1.0))
+
+    # -------------------------------------------------
+    @classmethod
+    def _keys(cls, model_url: str) -> Tuple[str, str]:
+        return model_url, urlparse(model_url).netloc
+
+    # -------------------------------------------------
+    @classmethod
+    def try_acquire(cls, model_url: str) -> bool:
+        """
+        Takes a token only if one is available right now (no waiting).
+        """
+        endpoint, host = cls._keys(model_url)
+
+        with cls._lock:
+            buckets = (cls._bucket(endpoint, "endpoint"), cls._bucket(host, "host"))
+
+            if any(b.wait_time() > 0 for b in buckets):
+                return False
+
+            for bucket in buckets:
+                bucket.take()
+            cls._stats[endpoint]["allowed"] += 1
+            cls._stats[host]["allowed"] += 1
+            return True
+
+    # -------------------------------------------------
+    @classmethod
+    def _poll(
+        cls,
+        model_url: str,
+        started: float,
+        queued_on: Set[str],
+    ) -> Optional[float]:
+        """
+        One acquisition attempt: 0.0 when a token was taken, seconds to
+        wait before retrying, or None when the request is shed.
+        """
+        settings = get_settings()
+        endpoint, host = cls._keys(model_url)
+
+        with cls._lock:
+            buckets = {
+                endpoint: cls._bucket(endpoint, "endpoint"),
+                host: cls._bucket(host, "host"),
+            }
+            waits = {key: b.wait_time() for key, b in buckets.items()}
+            wait = max(waits.values())
+
+            if wait == 0:
+                waited_ms = (time.monotonic() - started) * 1000
+                for key, bucket in buckets.items():
+                    bucket.take()
+                    cls._stats[key]["allowed"] += 1
+                    if key in queued_on:
+                        cls._stats[key]["total_wait_ms"] += waited_ms
+                return 0.0
+
+            limiting = [key for key, w in waits.items() if w > 0]
+            waited = time.monotonic() - started
+
+            if (
+                settings.probe_rate_limit_mode == "shed"
+                or waited + wait > settings.probe_rate_limit_max_wait_seconds
+            ):
+                for key in limiting:
+                    cls._stats[key]["shed"] += 1
+                return None
+
+            for key in limiting:
+                if key not in queued_on:
+                    queued_on.add(key)
+                    cls._stats[key]["queued"] += 1
+            return wait
+
+    # -------------------------------------------------
+    @classmethod
+    async def acquire(cls, model_url: str) -> bool:
+        """
+        Waits for a token (queue mode) or rejects (shed mode / wait
+        would exceed probe_rate_limit_max_wait_seconds).
+        Returns False when the request was shed.
+        """
+        started = time.monotonic()
+        queued_on: Set[str] = set()
+
+        while True:
+            wait = cls._poll(model_url, started, queued_on)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            await asyncio.sleep(wait)
+
+    # -------------------------------------------------
+    @classmethod
+    def acquire_blocking(cls, model_url: str) -> bool:
+        """
+        acquire() for the synchronous request path: sleeps the calling
+        thread instead of the event loop.
+        """
+        started = time.monotonic()
+        queued_on: Set[str] = set()
+
+        while True:
+            wait = cls._poll(model_url, started, queued_on)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            time.sleep(wait)
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot_all(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {
+                **cls._stats[key],
+                "total_wait_ms": round(cls._stats[key]["total_wait_ms"], 3),
+                "rate_per_second": bucket.rate,
+                "burst": bucket.capacity,
+                "tokens": round(bucket.tokens, 3),
+            }
+            for key, bucket in cls._buckets.items()
+        }
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from app.utils.config import get_settings
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of normalized probe results,
+    keyed by (endpoint, sha256 of the canonical JSON payload).
+
+    TTL-bounded and LRU-bounded. Each endpoint's results are checked
+    for determinism: a fresh answer that differs from a cached one for
+    the same payload (on concurrent misses or the periodic verification
+    lookups) turns the cache off for that endpoint.
+    """
+
+    _entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    _stats: Dict[str, Dict[str, Any]] = {}
+
+    # -------------------------------------------------
+    @staticmethod
+    def payload_hash(payload: Dict[str, Any]) -> str:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    # -------------------------------------------------
+    @classmethod
+    def _endpoint(cls, model_url: str) -> Dict[str, Any]:
+        if model_url not in cls._stats:
+            cls._stats[model_url] = {
+                "hits": 0,
+                "misses": 0,
+                "lookups": 0,
+                "mismatches": 0,
+                "deterministic": True,
+            }
+        return cls._stats[model_url]
+
+    # -------------------------------------------------
+    @staticmethod
+    def _fingerprint(result: Dict[str, Any]) -> Tuple[Any, float]:
+        return str(result.get("prediction")), round(float(result.get("confidence", 0.0)), 6)
+
+    # -------------------------------------------------
+    @classmethod
+    def get(cls, model_url: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        settings = get_settings()
+        stats = cls._endpoint(model_url)
+
+        if not stats["deterministic"]:
+            return None
+
+        stats["lookups"] += 1
+        key = (model_url, cls.payload_hash(payload))
+        entry = cls._entries.get(key)
+
+        # Every Nth lookup goes to the model anyway to re-verify determinism
+        verify = stats["lookups"] % settings.response_cache_verify_every == 0
+
+        if (
+            entry is None
+            or verify
+            or time.monotonic() - entry[0] > settings.response_cache_ttl_seconds
+        ):
+            stats["misses"] += 1
+            return None
+
+        cls._entries.move_to_end(key)
+        stats["hits"] += 1
+        return {**entry[1], "cached": True}
+
+    # -------------------------------------------------
+    @classmethod
+    def put(cls, model_url: str, payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        settings = get_settings()
+        stats = cls._endpoint(model_url)
+
+        if not stats["deterministic"]:
+            return
+
+        key = (model_url, cls.payload_hash(payload))
+        previous = cls._entries.get(key)
+
+        fresh = (
+            previous is not None
+            and time.monotonic() - previous[0] <= settings.response_cache_ttl_seconds
+        )
+
+        if fresh and cls._fingerprint(previous[1]) != cls._fingerprint(result):
+            stats["mismatches"] += 1
+            stats["deterministic"] = False
+            cls._evict_endpoint(model_url)
+            return
+
+        cls._entries[key] = (
+            time.monotonic(),
+            {"prediction": result.get("prediction"), "confidence": result.get("confidence")},
+        )
+        cls._entries.move_to_end(key)
+
+        while len(cls._entries) > settings.response_cache_max_entries:
+            cls._entries.popitem(last=False)
+
+    # -------------------------------------------------
+    @classmethod
+    def _evict_endpoint(cls, model_url: str) -> None:
+        for key in [k for k in cls._entries if k[0] == model_url]:
+            del cls._entries[key]
+
+    # -------------------------------------------------
+    @classmethod
+    def reset(cls, model_url: str) -> None:
+        """
+        Forgets an endpoint's entries and determinism verdict.
+        """
+        cls._evict_endpoint(model_url)
+        cls._stats.pop(model_url, None)
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot_all(cls) -> Dict[str, Dict[str, Any]]:
+        counts: Dict[str, int] = {}
+        for url, _ in cls._entries:
+            counts[url] = counts.get(url, 0) + 1
+
+        return {
+            url: {
+                **stats,
+                "hit_rate": (
+                    round(stats["hits"] / stats["lookups"], 4)
+                    if stats["lookups"] else 0.0
+                ),
+                "entries": counts.get(url, 0),
+            }
+            for url, stats in cls._stats.items()
+        }
@@ -0,0 +1,176 @@
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+CONFIDENCE_KEYS = ("confidence", "score", "probability")
+PREDICTION_KEYS = ("prediction", "label", "output", "class")
+VECTOR_KEYS = ("probabilities", "probs", "scores", "probability")
+VECTOR_LABEL_KEYS = ("labels", "classes")
+
+MAX_DEPTH = 4
+
+Path = Tuple[Union[str, int], ...]
+
+
+class ExtractionError(Exception):
+    """
+    Raised when a response no longer matches the learned shape.
+    """
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ResponseExtractor:
+    """
+    Compiled extractor for one endpoint's response shape.
+
+    Learned from the first successful response, then applied directly
+    to every later response: walk a fixed path, read fixed keys.
+
+    Modes:
+    - "record" → dict holding a confidence key (and usually a label)
+    - "top_k"  → list of {label, score} dicts; highest score wins
+    - "vector" → probability vector; max is the confidence, argmax the
+                 prediction (named through a sibling labels list if any)
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        path: Path,
+        confidence_key: Optional[str] = None,
+        prediction_key: Optional[str] = None,
+        labels_key: Optional[str] = None,
+    ):
+        self.mode = mode
+        self.path = path
+        self.confidence_key = confidence_key
+        self.prediction_key = prediction_key
+        self.labels_key = labels_key
+
+    # -------------------------------------------------
+    @classmethod
+    def learn(cls, data: Any) -> Optional["ResponseExtractor"]:
+        """
+        Breadth-first search for the first node with a recognizable
+        shape. Lists are only descended through their first element,
+        matching the generic normalizer.
+        """
+        queue: List[Tuple[Path, Any]] = [((), data)]
+
+        while queue:
+            path, node = queue.pop(0)
+
+            extractor = cls._match(path, node)
+            if extractor is not None:
+                return extractor
+
+            if len(path) >= MAX_DEPTH:
+                continue
+
+            if isinstance(node, dict):
+                queue.extend(
+                    (path + (key,), value)
+                    for key, value in node.items()
+                    if isinstance(value, (dict, list))
+                )
+            elif isinstance(node, list) and node:
+                queue.append((path + (0,), node[0]))
+
+        return None
+
+    # -------------------------------------------------
+    @classmethod
+    def _match(cls, path: Path, node: Any) -> Optional["ResponseExtractor"]:
+        if isinstance(node, dict):
+            for key in CONFIDENCE_KEYS:
+                if _is_number(node.get(key)):
+                    # By presence: a falsy first label (0, "") is still the key
+                    prediction_key = next(
+                        (k for k in PREDICTION_KEYS if k in node), None
+                    )
+                    return cls("record", path, key, prediction_key)
+
+            for key in VECTOR_KEYS:
+                vector = node.get(key)
+                if (
+                    isinstance(vector, list)
+                    and len(vector) >= 2
+                    and all(_is_number(v) for v in vector)
+                ):
+                    labels_key = next(
+                        (
+                            k for k in VECTOR_LABEL_KEYS
+                            if isinstance(node.get(k), list)
+                            and len(node[k]) == len(vector)
+                        ),
+                        None,
+                    )
+                    return cls("vector", path, key, labels_key=labels_key)
+
+        if (
+            isinstance(node, list)
+            and len(node) >= 2
+            and all(isinstance(item, dict) for item in node)
+        ):
+            first = node[0]
+            confidence_key = next(
+                (k for k in CONFIDENCE_KEYS if _is_number(first.get(k))), None
+            )
+            prediction_key = next(
+                (k for k in PREDICTION_KEYS if k in first), None
+            )
+            if confidence_key and prediction_key:
+                return cls("top_k", path, confidence_key, prediction_key)
+
+        return None
+
+    # -------------------------------------------------
+    def _walk(self, data: Any) -> Any:
+        node = data
+        try:
+            for step in self.path:
+                node = node[step]
+        except (KeyError, IndexError, TypeError):
+            raise ExtractionError(f"path {self.path} not found")
+        return node
+
+    # -------------------------------------------------
+    def extract(self, data: Any) -> Dict[str, Any]:
+        node = self._walk(data)
+
+        try:
+            if self.mode == "record":
+                confidence = node[self.confidence_key]
+                if self.prediction_key is not None:
+                    prediction = node[self.prediction_key]
+                elif any(k in node for k in PREDICTION_KEYS):
+                    raise ExtractionError("record gained a prediction key")
+                else:
+                    prediction = "unknown"
+
+            elif self.mode == "top_k":
+                best = max(node, key=lambda item: item[self.confidence_key])
+                confidence = best[self.confidence_key]
+                prediction = best[self.prediction_key]
+
+            else:
+                vector = node[self.confidence_key]
+                index = max(range(len(vector)), key=vector.__getitem__)
+                confidence = vector[index]
+                prediction = (
+                    node[self.labels_key][index]
+                    if self.labels_key is not None
+                    else str(index)
+                )
+
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ExtractionError(f"{self.mode} shape changed")
+
+        if not _is_number(confidence):
+            raise ExtractionError("confidence is not numeric")
+
+        return {
+            "prediction": prediction if prediction is not None else "unknown",
+            "confidence": float(confidence),
+        }
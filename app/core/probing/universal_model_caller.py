@@ -1,7 +1,20 @@
+import asyncio
+import time
 import requests
-from typing import Dict, Any, Optional
+import httpx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import urlparse
 
+from app.core.probing.circuit_breaker import CircuitBreakerRegistry
+from app.core.probing.hedging import HedgePolicy
+from app.core.probing.latency_tracker import LatencyTracker
+from app.core.probing.phase_timer import PhaseTimer
+from app.core.probing.rate_limiter import ProbeRateLimiter
+from app.core.probing.response_extractor import ResponseExtractor, ExtractionError
+from app.core.storage.payload_cache_store import PayloadCacheStore
+from app.utils.config import get_settings
+
 # Known payload formats for auto-detection
 COMMON_PAYLOADS = [
     {"text": "test input"},
@@ -10,6 +23,26 @@ COMMON_PAYLOADS = [
     {"data": ["test input"]},
 ]
 
+# Request timeouts (seconds) per endpoint kind
+TIMEOUTS = {
+    "huggingface": 20,
+    "gradio": 20,
+    "hf_space": 20,
+    "rest": 15,
+}
+
+DETECT_TIMEOUT = 6
+
+# List-accepting request keys to try when checking batch support
+BATCH_KEYS = {
+    "huggingface": ["inputs"],
+    "gradio": ["data"],
+    "hf_space": ["inputs", "data"],
+    "rest": ["inputs", "data"],
+}
+
+BATCH_DETECT_INPUTS = ["test input", "another input", "third input"]
+
 
 class UniversalModelCaller:
     """
@@ -22,7 +55,8 @@ class UniversalModelCaller:
     }
     """
 
-    _payload_cache: Dict[str, Dict[str, Any]] = {}
+    # Compiled response extractors, learned per endpoint
+    _extractors: Dict[str, ResponseExtractor] = {}
 
     # -------------------------------------------------
     @classmethod
@@ -31,111 +65,596 @@ class UniversalModelCaller:
         model_url: str,
         payload: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        parsed = urlparse(model_url)
+        if not ProbeRateLimiter.acquire_blocking(model_url):
+            return cls.throttled_result(model_url)
+
+        breaker = CircuitBreakerRegistry.get(model_url)
+        if not breaker.allow():
+            return cls.circuit_open_result(model_url)
+
+        try:
+            kind = cls._route(model_url)
+
+            if payload is None:
+                payload = cls._default_payload(kind, model_url)
+
+            timeout, _ = LatencyTracker.timeout_for(model_url, TIMEOUTS[kind])
+            start = time.perf_counter()
+            response = requests.post(
+                model_url,
+                json=payload,
+                headers=cls._headers(kind),
+                timeout=timeout
+            )
+            # Only answered requests are timed: a timeout says nothing
+            # about the latency beyond it and would ratchet p99 up
+            latency_ms = (time.perf_counter() - start) * 1000
+            LatencyTracker.record(model_url, latency_ms)
+            response.raise_for_status()
+
+            result = cls._extract(model_url, kind, response.json())
+            result["latency_ms"] = round(latency_ms, 3)
+
+        except Exception as e:
+            breaker.record_failure(timed_out=cls._is_timeout(e))
+            return cls._failure(e)
+        except BaseException:
+            # Cancelled (deadline, fleet timeout, unregister): no verdict
+            breaker.abandon()
+            raise
+
+        breaker.record_success()
+        return result
+
+    # -------------------------------------------------
+    @classmethod
+    async def acall(
+        cls,
+        client: httpx.AsyncClient,
+        model_url: str,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of call() on a shared httpx.AsyncClient.
+        Same routing, payload detection and normalized output.
+        """
+        if not await ProbeRateLimiter.acquire(model_url):
+            return cls.throttled_result(model_url)
+
+        breaker = CircuitBreakerRegistry.get(model_url)
+        if not breaker.allow():
+            return cls.circuit_open_result(model_url)
 
         try:
-            # Hugging Face Inference API
-            if "huggingface.co" in parsed.netloc:
-                return cls._call_huggingface(model_url, payload)
+            kind = cls._route(model_url)
 
-            # Gradio endpoint
-            if "/run/predict" in model_url:
-                return cls._call_gradio(model_url, payload)
+            if payload is None:
+                payload = await cls.aresolve_payload(client, model_url)
 
-            # HuggingFace Space (*.hf.space)
-            if "hf.space" in parsed.netloc:
-                return cls._call_hf_space(model_url, payload)
+            if HedgePolicy.enabled():
+                data, phases = await cls._asend_hedged(client, model_url, kind, payload)
+            else:
+                data, phases = await cls._asend(client, model_url, kind, payload)
 
-            # Default REST / Dummy / Unknown
-            return cls._call_rest(model_url, payload)
+            result = cls._extract(model_url, kind, data)
+            result["latency_ms"] = phases["total_ms"]
 
         except Exception as e:
-            return {
-                "prediction": None,
-                "confidence": 0.0,
-                "error": str(e),
-            }
+            breaker.record_failure(timed_out=cls._is_timeout(e))
+            return cls._failure(e)
+        except BaseException:
+            # Cancelled (deadline, fleet timeout, unregister): no verdict
+            breaker.abandon()
+            raise
+
+        breaker.record_success()
+        return result
 
     # -------------------------------------------------
     @classmethod
-    def _call_rest(
+    async def acall_batch(
         cls,
+        client: httpx.AsyncClient,
         model_url: str,
-        payload: Optional[Dict[str, Any]]
+        batch_key: str,
+        inputs: List[Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Sends many inputs in one list request ({batch_key: inputs}) and
+        splits the response into one normalized record per input.
+        Returns None if the response is not a batch of the right size.
+        """
+        if not await ProbeRateLimiter.acquire(model_url):
+            return [cls.throttled_result(model_url) for _ in inputs]
+
+        breaker = CircuitBreakerRegistry.get(model_url)
+        if not breaker.allow():
+            return [cls.circuit_open_result(model_url) for _ in inputs]
+
+        try:
+            kind = cls._route(model_url)
+            data, phases = await cls._asend(
+                client, model_url, kind, {batch_key: inputs}, batch=True
+            )
+            items = cls._split_batch(kind, data, len(inputs))
+        except Exception as e:
+            breaker.record_failure(timed_out=cls._is_timeout(e))
+            return [cls._failure(e) for _ in inputs]
+        except BaseException:
+            breaker.abandon()
+            raise
+
+        breaker.record_success()
+        if items is None:
+            return None
+
+        results = [
+            cls._parse_batch_item(model_url, kind, item) for item in items
+        ]
+        # Items share one round trip — its time is not a per-item
+        # latency, so it is reported apart and stays out of latency stats
+        for result in results:
+            if "error" not in result:
+                result["batch_latency_ms"] = phases["total_ms"]
+                result["batch_size"] = len(inputs)
+        return results
+
+    # -------------------------------------------------
+    @staticmethod
+    def batch_key_known(model_url: str) -> bool:
+        """
+        True if batch support for the endpoint is already cached, so
+        adetect_batch_key() returns without sending any request.
+        """
+        ttl = get_settings().payload_cache_ttl_seconds
+        return PayloadCacheStore.get_batch(model_url, ttl) is not None
+
+    # -------------------------------------------------
+    @classmethod
+    async def adetect_batch_key(
+        cls,
+        client: httpx.AsyncClient,
+        model_url: str
+    ) -> Optional[str]:
+        """
+        Checks once per endpoint (cached with the payload format)
+        whether it accepts list inputs, and under which key.
+        """
+        ttl = get_settings().payload_cache_ttl_seconds
+        cached = PayloadCacheStore.get_batch(model_url, ttl)
+        if cached is not None:
+            return cached["key"]
+
+        kind = cls._route(model_url)
+        timeout, _ = LatencyTracker.timeout_for(model_url, DETECT_TIMEOUT)
+        size = len(BATCH_DETECT_INPUTS)
+
+        for key in BATCH_KEYS[kind]:
+            # A list the size of the batch is not proof: a top-k model
+            # answers every request with one row per class. A real batch
+            # endpoint answers two different input counts item for item.
+            accepted = False
+            for inputs in (BATCH_DETECT_INPUTS, BATCH_DETECT_INPUTS[:2]):
+                if not await ProbeRateLimiter.acquire(model_url):
+                    # Over budget — decide next time rather than caching "unsupported"
+                    return None
+                try:
+                    r = await client.post(
+                        model_url,
+                        json={key: inputs},
+                        headers=cls._headers(kind),
+                        timeout=timeout
+                    )
+                    accepted = (
+                        r.status_code == 200
+                        and cls._split_batch(kind, r.json(), len(inputs)) is not None
+                    )
+                except Exception:
+                    accepted = False
+                if not accepted:
+                    break
+
+            if accepted:
+                PayloadCacheStore.put_batch(model_url, key)
+                return key
+
+        PayloadCacheStore.put_batch(model_url, None)
+        return None
+
+    # -------------------------------------------------
+    @staticmethod
+    def payload_input(payload: Dict[str, Any]) -> Optional[Any]:
+        """
+        The single input value carried by a probe payload
+        ({"text": x}, {"inputs": x}, {"data": [x]}), or None.
+        """
+        if not isinstance(payload, dict) or len(payload) != 1:
+            return None
+
+        value = next(iter(payload.values()))
+        if isinstance(value, list):
+            return value[0] if len(value) == 1 else None
+        return value
+
+    # -------------------------------------------------
+    @staticmethod
+    def with_input(payload: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        """
+        The probe payload `payload` with its single input replaced by
+        `value`, keeping the endpoint's format (inverse of payload_input).
+        Payloads of any other shape are returned unchanged.
+        """
+        if not isinstance(payload, dict) or len(payload) != 1:
+            return payload
+
+        key, current = next(iter(payload.items()))
+        if isinstance(current, list):
+            return {key: [value]} if len(current) == 1 else payload
+        return {key: value}
+
+    # -------------------------------------------------
+    @staticmethod
+    def _split_batch(kind: str, data: Any, size: int) -> Optional[List[Any]]:
+        items = data.get("data") if kind == "gradio" and isinstance(data, dict) else data
+
+        if not isinstance(items, list) or len(items) != size:
+            return None
+
+        # HF returns one label/score list per input — a flat list is a
+        # single input's labels, not a batch
+        if kind == "huggingface" and not all(isinstance(i, list) for i in items):
+            return None
+
+        return items
+
+    # -------------------------------------------------
+    @classmethod
+    def _parse_batch_item(
+        cls,
+        model_url: str,
+        kind: str,
+        item: Any
     ) -> Dict[str, Any]:
-        if payload is None:
-            payload = cls._detect_payload(model_url)
+        try:
+            if kind == "gradio":
+                item = {"data": [item]}
+            return cls._extract(f"{model_url}#batch", kind, item)
+        except Exception as e:
+            return cls._failure(e)
+
+    # -------------------------------------------------
+    @classmethod
+    async def _asend(
+        cls,
+        client: httpx.AsyncClient,
+        model_url: str,
+        kind: str,
+        payload: Dict[str, Any],
+        batch: bool = False
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        One POST with phase tracing. Returns (json, phase timings).
 
-        response = requests.post(
+        Batch requests take the kind's fixed timeout and are not timed
+        into LatencyTracker: their latency grows with the batch size and
+        would inflate the single-request p99 the adaptive timeouts use.
+        """
+        if batch:
+            timeout = TIMEOUTS[kind]
+        else:
+            timeout, _ = LatencyTracker.timeout_for(model_url, TIMEOUTS[kind])
+        timer = PhaseTimer()
+        response = await client.post(
             model_url,
             json=payload,
-            timeout=15
+            headers=cls._headers(kind),
+            timeout=timeout,
+            extensions={"trace": timer.trace},
         )
+
+        # Failed, timed-out and cancelled requests never get here, so a
+        # timeout cannot feed its own value back into p99
+        timer.stop()
+        phases = timer.phases()
+        if not batch:
+            LatencyTracker.record(model_url, phases["total_ms"])
+            LatencyTracker.record_phases(model_url, phases)
         response.raise_for_status()
 
-        return cls._normalize(response.json())
+        return response.json(), phases
 
     # -------------------------------------------------
     @classmethod
-    def _call_hf_space(
+    async def _asend_hedged(
         cls,
+        client: httpx.AsyncClient,
         model_url: str,
-        payload: Optional[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+        kind: str,
+        payload: Dict[str, Any]
+    ) -> Tuple[Any, Dict[str, Any]]:
         """
-        Handles HuggingFace Space REST APIs (*.hf.space)
+        Sends the request; if it is still outstanding after the hedge
+        delay, sends a duplicate and returns whichever succeeds first.
         """
-        if payload is None:
-            payload = cls._detect_payload(model_url)
+        HedgePolicy.record_primary(model_url)
+        primary = asyncio.ensure_future(cls._asend(client, model_url, kind, payload))
+        hedge = None
 
-        response = requests.post(
-            model_url,
-            json=payload,
-            timeout=20
+        # Whatever ends this call (result, error, or the caller being
+        # cancelled mid-wait), no request is left running behind it
+        try:
+            delay = HedgePolicy.delay_for(model_url)
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not HedgePolicy.try_acquire(model_url):
+                return await primary
+
+            # The duplicate must fit the probe rate limit too — never wait for it
+            if not ProbeRateLimiter.try_acquire(model_url):
+                HedgePolicy.release(model_url)
+                return await primary
+
+            hedge = asyncio.ensure_future(cls._asend(client, model_url, kind, payload))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            HedgePolicy.record_win(model_url)
+                        return task.result()
+
+            # Both failed — surface the primary's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    # -------------------------------------------------
+    @classmethod
+    def timeout_report(cls, model_url: str) -> Dict[str, Any]:
+        """
+        Current request/detection timeouts for an endpoint
+        and where they come from.
+        """
+        kind = cls._route(model_url)
+        request_timeout, request_source = LatencyTracker.timeout_for(
+            model_url, TIMEOUTS[kind]
+        )
+        detect_timeout, detect_source = LatencyTracker.timeout_for(
+            model_url, DETECT_TIMEOUT
         )
-        response.raise_for_status()
 
-        return cls._normalize(response.json())
+        return {
+            "endpoint_kind": kind,
+            "request": {
+                "timeout_seconds": request_timeout,
+                "source": request_source,
+                "default_seconds": TIMEOUTS[kind],
+            },
+            "detection": {
+                "timeout_seconds": detect_timeout,
+                "source": detect_source,
+                "default_seconds": DETECT_TIMEOUT,
+            },
+            "latency": LatencyTracker.stats(model_url),
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def _route(model_url: str) -> str:
+        parsed = urlparse(model_url)
+
+        # Hugging Face Inference API
+        if "huggingface.co" in parsed.netloc:
+            return "huggingface"
+
+        # Gradio endpoint
+        if "/run/predict" in model_url:
+            return "gradio"
+
+        # HuggingFace Space (*.hf.space)
+        if "hf.space" in parsed.netloc:
+            return "hf_space"
+
+        # Default REST / Dummy / Unknown
+        return "rest"
+
+    # -------------------------------------------------
+    @staticmethod
+    def _headers(kind: str) -> Dict[str, str]:
+        if kind == "huggingface":
+            return {"Accept": "application/json"}
+        return {}
 
     # -------------------------------------------------
     @classmethod
-    def _detect_payload(cls, model_url: str) -> Dict[str, Any]:
-        if model_url in cls._payload_cache:
-            return cls._payload_cache[model_url]
+    def _default_payload(cls, kind: str, model_url: str) -> Dict[str, Any]:
+        if kind == "huggingface":
+            return {"inputs": "test input"}
+        if kind == "gradio":
+            return {"data": ["test input"]}
+        return cls._detect_payload(model_url)
 
-        for payload in COMMON_PAYLOADS:
-            try:
-                r = requests.post(model_url, json=payload, timeout=6)
-                if r.status_code == 200:
-                    cls._payload_cache[model_url] = payload
+    # -------------------------------------------------
+    @classmethod
+    async def aresolve_payload(
+        cls,
+        client: httpx.AsyncClient,
+        model_url: str,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Resolves the default payload for an endpoint once,
+        so concurrent probes can share it.
+        force=True bypasses the cache and re-detects the format.
+        """
+        kind = cls._route(model_url)
+        if kind in ("huggingface", "gradio"):
+            return cls._default_payload(kind, model_url)
+        return await cls._adetect_payload(client, model_url, force)
+
+    # -------------------------------------------------
+    @classmethod
+    def _detect_payload(cls, model_url: str, force: bool = False) -> Dict[str, Any]:
+        ttl = get_settings().payload_cache_ttl_seconds
+
+        if not force:
+            cached = PayloadCacheStore.get(model_url, ttl)
+            if cached is not None:
+                return cached
+
+        timeout, _ = LatencyTracker.timeout_for(model_url, DETECT_TIMEOUT)
+
+        def attempt(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if not ProbeRateLimiter.acquire_blocking(model_url):
+                return None
+            r = requests.post(model_url, json=payload, timeout=timeout)
+            return payload if r.status_code == 200 else None
+
+        # Race all candidate formats — first 200 response wins
+        pool = ThreadPoolExecutor(max_workers=len(COMMON_PAYLOADS))
+        try:
+            futures = [pool.submit(attempt, p) for p in COMMON_PAYLOADS]
+            for future in as_completed(futures):
+                try:
+                    payload = future.result()
+                except Exception:
+                    continue
+                if payload is not None:
+                    PayloadCacheStore.put(model_url, payload)
                     return payload
-            except Exception:
-                continue
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
-        # Safe fallback
-        fallback = {"text": "test"}
-        cls._payload_cache[model_url] = fallback
-        return fallback
+        # Safe fallback (not cached, so the next call re-detects)
+        return {"text": "test"}
 
     # -------------------------------------------------
-    @staticmethod
-    def _call_huggingface(
+    @classmethod
+    async def _adetect_payload(
+        cls,
+        client: httpx.AsyncClient,
         model_url: str,
-        payload: Optional[Dict[str, Any]]
+        force: bool = False
     ) -> Dict[str, Any]:
-        if payload is None:
-            payload = {"inputs": "test input"}
+        payload = await cls.arace_payload(client, model_url, force)
+        # Safe fallback (only the failure is cached, not this payload)
+        return payload if payload is not None else {"text": "test"}
 
-        response = requests.post(
-            model_url,
-            json=payload,
-            headers={"Accept": "application/json"},
-            timeout=20
+    # -------------------------------------------------
+    @classmethod
+    def payload_known(cls, model_url: str) -> bool:
+        """
+        True if resolving the payload sends no request: the format is
+        cached, the endpoint kind has a fixed one, or detection failed
+        within the last breaker cooldown.
+        """
+        settings = get_settings()
+        return (
+            cls._route(model_url) in ("huggingface", "gradio")
+            or PayloadCacheStore.get(model_url, settings.payload_cache_ttl_seconds) is not None
+            or PayloadCacheStore.failed_recently(model_url, settings.breaker_cooldown_seconds)
         )
-        response.raise_for_status()
 
-        data = response.json()
+    # -------------------------------------------------
+    @classmethod
+    async def arace_payload(
+        cls,
+        client: httpx.AsyncClient,
+        model_url: str,
+        force: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The endpoint's payload format, racing the candidates on a cache
+        miss; None if none of them got a 200. A failed race is remembered
+        for one breaker cooldown, so a dead endpoint is not re-raced on
+        every probe.
+        """
+        settings = get_settings()
+
+        if not force:
+            cached = PayloadCacheStore.get(model_url, settings.payload_cache_ttl_seconds)
+            if cached is not None:
+                return cached
+            if PayloadCacheStore.failed_recently(model_url, settings.breaker_cooldown_seconds):
+                return None
+
+        timeout, _ = LatencyTracker.timeout_for(model_url, DETECT_TIMEOUT)
+
+        throttled = []
+
+        async def attempt(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if not await ProbeRateLimiter.acquire(model_url):
+                throttled.append(payload)
+                return None
+            r = await client.post(model_url, json=payload, timeout=timeout)
+            return payload if r.status_code == 200 else None
+
+        # Race all candidate formats — first 200 response wins
+        tasks = [asyncio.ensure_future(attempt(p)) for p in COMMON_PAYLOADS]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    payload = await next_done
+                except Exception:
+                    continue
+                if payload is not None:
+                    PayloadCacheStore.put(model_url, payload)
+                    return payload
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Candidates that never went out say nothing about the endpoint
+        if not throttled:
+            PayloadCacheStore.put_failed(model_url)
+        return None
 
+    # -------------------------------------------------
+    @classmethod
+    def _extract(cls, extractor_key: str, kind: str, data: Any) -> Dict[str, Any]:
+        """
+        Applies the endpoint's compiled extractor. On the first response,
+        or when the shape changes, learns a new one; if no shape is
+        recognized, falls back to the generic parsers.
+        """
+        extractor = cls._extractors.get(extractor_key)
+        if extractor is not None:
+            try:
+                return extractor.extract(data)
+            except ExtractionError:
+                # Response shape changed — learn again below
+                cls._extractors.pop(extractor_key, None)
+
+        learned = ResponseExtractor.learn(data)
+        if learned is not None:
+            try:
+                result = learned.extract(data)
+                cls._extractors[extractor_key] = learned
+                return result
+            except ExtractionError:
+                pass
+
+        return cls._parse(kind, data)
+
+    # -------------------------------------------------
+    @classmethod
+    def _parse(cls, kind: str, data: Any) -> Dict[str, Any]:
+        if kind == "huggingface":
+            return cls._parse_huggingface(data)
+        if kind == "gradio":
+            return cls._parse_gradio(data)
+        return cls._normalize(data)
+
+    # -------------------------------------------------
+    @staticmethod
+    def _parse_huggingface(data: Any) -> Dict[str, Any]:
         if isinstance(data, list) and data:
             top = data[0]
             return {
@@ -147,21 +666,7 @@ class UniversalModelCaller:
 
     # -------------------------------------------------
     @staticmethod
-    def _call_gradio(
-        model_url: str,
-        payload: Optional[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        if payload is None:
-            payload = {"data": ["test input"]}
-
-        response = requests.post(
-            model_url,
-            json=payload,
-            timeout=20
-        )
-        response.raise_for_status()
-
-        data = response.json()
+    def _parse_gradio(data: Any) -> Dict[str, Any]:
         output = data.get("data", [{}])[0]
 
         return {
@@ -173,6 +678,52 @@ class UniversalModelCaller:
             "confidence": float(output.get("confidence", 0.5)),
         }
 
+    # -------------------------------------------------
+    @staticmethod
+    def _failure(error: Exception) -> Dict[str, Any]:
+        return {
+            "prediction": None,
+            "confidence": 0.0,
+            "error": str(error),
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def circuit_open_result(model_url: str) -> Dict[str, Any]:
+        return {
+            "prediction": None,
+            "confidence": 0.0,
+            "error": f"Circuit open for {model_url} — call skipped",
+            "circuit_open": True,
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def throttled_result(model_url: str) -> Dict[str, Any]:
+        return {
+            "prediction": None,
+            "confidence": 0.0,
+            "error": f"Probe rate limit exceeded for {model_url} — call shed",
+            "throttled": True,
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def deadline_result(model_url: str) -> Dict[str, Any]:
+        return {
+            "prediction": None,
+            "confidence": 0.0,
+            "error": f"Deadline reached before {model_url} answered — call cancelled",
+            "deadline_exceeded": True,
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def _is_timeout(error: Exception) -> bool:
+        return isinstance(
+            error, (httpx.TimeoutException, requests.exceptions.Timeout)
+        )
+
     # -------------------------------------------------
     @staticmethod
     def _normalize(data: Any) -> Dict[str, Any]:
@@ -60,6 +60,26 @@ class FeatureAttributor:
             rca["affected_segment"] = "confidence_distribution"
             severity = "high"
 
+        conf_hist = drift.get("confidence_histogram", {})
+        if conf_hist.get("drift_detected"):
+            reasons.append(
+                f"Confidence population shift "
+                f"(PSI={conf_hist.get('psi')}, JS={conf_hist.get('js_divergence')})"
+            )
+            rca["root_cause"] = "concept_drift"
+            rca["affected_segment"] = "confidence_distribution"
+            severity = "high"
+
+        change_points = drift.get("change_points", {})
+        if change_points.get("drift_detected"):
+            shifts = ", ".join(
+                f"{signal} {change['direction']}"
+                for signal, change in change_points.get("changes", {}).items()
+            )
+            reasons.append(f"Change point detected in live metrics ({shifts})")
+            rca["root_cause"] = "change_point"
+            severity = "high"
+
         conf_var = drift.get("confidence_variance", {})
         if conf_var.get("status") == "drift_detected":
             reasons.append(
@@ -1,12 +1,30 @@
 import json
 import hashlib
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 
 
 class BaselineStore:
     BASE_DIR = Path("baselines")
+    # Sorts before every timestamped file, so later saves still win on load
+    INITIAL_FILE = "baseline_00000000_000000.json"
+
+    _listeners: List[Callable[[str], None]] = []
+
+    @classmethod
+    def on_change(cls, listener: Callable[[str], None]) -> None:
+        """
+        Registers a callback invoked with the model URL whenever a
+        baseline is saved in this process.
+        """
+        cls._listeners.append(listener)
+
+    @classmethod
+    def _notify(cls, model_url: str) -> None:
+        for listener in cls._listeners:
+            listener(model_url)
 
     @classmethod
     def _model_dir(cls, model_url: str) -> Path:
@@ -21,8 +39,43 @@ class BaselineStore:
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         baseline_file = model_dir / f"baseline_{timestamp}.json"
 
-        with open(baseline_file, "w") as f:
+        tmp_file = cls._write_tmp(model_dir, metrics)
+        os.replace(tmp_file, baseline_file)
+        cls._notify(model_url)
+
+    @classmethod
+    def save_initial(cls, model_url: str, metrics: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Saves the first baseline unless one already exists.
+
+        Create-if-absent is atomic across threads and processes (hard
+        link of a fully written temp file), so concurrent first runs
+        cannot both become "the" baseline. Returns (created, baseline)
+        where baseline is whichever one won.
+        """
+        existing = cls.load(model_url)
+        if existing is not None:
+            return False, existing
+
+        model_dir = cls._model_dir(model_url)
+        model_dir.mkdir(parents=True, exist_ok=True)
+
+        tmp_file = cls._write_tmp(model_dir, metrics)
+        try:
+            os.link(tmp_file, model_dir / cls.INITIAL_FILE)
+            cls._notify(model_url)
+            return True, metrics
+        except FileExistsError:
+            return False, cls.load(model_url)
+        finally:
+            tmp_file.unlink()
+
+    @classmethod
+    def _write_tmp(cls, model_dir: Path, metrics: Dict[str, Any]) -> Path:
+        tmp_file = model_dir / f".baseline.{os.getpid()}.{id(metrics)}.tmp"
+        with open(tmp_file, "w") as f:
             json.dump(metrics, f, indent=2)
+        return tmp_file
 
     @classmethod
     def load(cls, model_url: str) -> Optional[Dict[str, Any]]:
@@ -39,6 +92,11 @@ class BaselineStore:
         with open(baselines[-1], "r") as f:
             return json.load(f)
 
+    @classmethod
+    def latest_version(cls, model_url: str) -> Optional[str]:
+        versions = cls.list_versions(model_url)
+        return versions[-1] if versions else None
+
     @classmethod
     def list_versions(cls, model_url: str) -> List[str]:
         model_dir = cls._model_dir(model_url)
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class PayloadCacheStore:
+    """
+    Disk-backed cache of auto-detected payload formats, keyed by endpoint.
+
+    Entries expire after a TTL. The file is re-read whenever another
+    worker has modified it, so detections are shared across processes
+    and survive restarts.
+    """
+
+    CACHE_FILE = Path("data/probing/payload_cache.json")
+
+    _entries: Dict[str, Dict[str, Any]] = {}
+    _mtime: float = 0.0
+
+    # -------------------------------------------------
+    @classmethod
+    def _refresh(cls) -> None:
+        try:
+            mtime = cls.CACHE_FILE.stat().st_mtime
+        except FileNotFoundError:
+            return
+
+        if mtime == cls._mtime:
+            return
+
+        try:
+            with open(cls.CACHE_FILE, "r") as f:
+                cls._entries = json.load(f)
+            cls._mtime = mtime
+        except (OSError, ValueError):
+            # Partially written or corrupt file — keep in-memory entries
+            pass
+
+    # -------------------------------------------------
+    @classmethod
+    def _write(cls) -> None:
+        cls.CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cls.CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_file, "w") as f:
+            json.dump(cls._entries, f, indent=2)
+
+        # Atomic swap so concurrent readers never see a partial file
+        os.replace(tmp_file, cls.CACHE_FILE)
+        cls._mtime = cls.CACHE_FILE.stat().st_mtime
+
+    # -------------------------------------------------
+    @classmethod
+    def get(cls, model_url: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        cls._refresh()
+
+        entry = cls._entries.get(model_url, {})
+        if "payload" not in entry:
+            return None
+
+        if time.time() - entry.get("detected_at", 0) > ttl_seconds:
+            return None
+
+        return entry["payload"]
+
+    # -------------------------------------------------
+    @classmethod
+    def put(cls, model_url: str, payload: Dict[str, Any]) -> None:
+        cls._refresh()
+        entry = cls._entries.setdefault(model_url, {})
+        entry.update({
+            "payload": payload,
+            "detected_at": time.time(),
+        })
+        entry.pop("detect_failed_at", None)
+        cls._write()
+
+    # -------------------------------------------------
+    @classmethod
+    def failed_recently(cls, model_url: str, ttl_seconds: float) -> bool:
+        """
+        True if detection found no working format within the last
+        `ttl_seconds`.
+        """
+        cls._refresh()
+        failed_at = cls._entries.get(model_url, {}).get("detect_failed_at")
+        return failed_at is not None and time.time() - failed_at <= ttl_seconds
+
+    # -------------------------------------------------
+    @classmethod
+    def put_failed(cls, model_url: str) -> None:
+        cls._refresh()
+        cls._entries.setdefault(model_url, {})["detect_failed_at"] = time.time()
+        cls._write()
+
+    # -------------------------------------------------
+    @classmethod
+    def get_batch(cls, model_url: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Cached batch-support result: {"supported": bool, "key": str | None},
+        or None if the endpoint has not been checked (or it expired).
+        """
+        cls._refresh()
+
+        entry = cls._entries.get(model_url, {})
+        if "batch_detected_at" not in entry:
+            return None
+
+        if time.time() - entry["batch_detected_at"] > ttl_seconds:
+            return None
+
+        key = entry.get("batch_key")
+        return {"supported": key is not None, "key": key}
+
+    # -------------------------------------------------
+    @classmethod
+    def put_batch(cls, model_url: str, batch_key: Optional[str]) -> None:
+        cls._refresh()
+        cls._entries.setdefault(model_url, {}).update({
+            "batch_key": batch_key,
+            "batch_detected_at": time.time(),
+        })
+        cls._write()
+
+    # -------------------------------------------------
+    @classmethod
+    def invalidate(cls, model_url: Optional[str] = None) -> None:
+        """
+        Drops one endpoint (or every endpoint) so the next call re-detects.
+        """
+        cls._refresh()
+        if model_url is None:
+            cls._entries = {}
+        else:
+            cls._entries.pop(model_url, None)
+        cls._write()
@@ -5,6 +5,9 @@ from fastapi import FastAPI
 from app.utils.config import get_settings
 from app.utils.logger import setup_logging
 from app.api.routes import monitoring   # ✅ Monitoring route
+from app.api.routes import model        # ✅ Model registry route
+from app.core.probing.async_probe_engine import AsyncProbeEngine
+from app.services.monitoring_scheduler import MonitoringScheduler
 
 settings = get_settings()
 
@@ -15,7 +18,10 @@ async def lifespan(app: FastAPI):
     logging.getLogger(__name__).info(
         f"Starting {settings.app_name} | env={settings.environment}"
     )
+    await MonitoringScheduler.start()
     yield
+    await MonitoringScheduler.stop()
+    await AsyncProbeEngine.aclose()
     logging.getLogger(__name__).info("Shutting down application")
 
 
@@ -28,6 +34,7 @@ app = FastAPI(
 
 # ✅ Register APIs
 app.include_router(monitoring.router)
+app.include_router(model.router)
 
 
 @app.get("/health", tags=["system"])
@@ -1,6 +1,10 @@
+import math
 from typing import Dict, Any, List
 import numpy as np
 
+from app.core.detection.histogram_drift import HistogramDrift
+from app.core.metrics.quantile_sketch import QuantileSketch
+
 
 class BaselineBuilder:
     @staticmethod
@@ -19,9 +23,11 @@ class BaselineBuilder:
                 "error_rate": 1.0,
                 "confidence_scores": [],
                 "features": {},
+                "avg_latency_ms": None,
+                "p95_latency_ms": None,
             }
 
-       errors = sum(1 for p in predictions if p.get("confidence", 1.0) < 0.2 or p.get("prediction") == "error")
+        errors = sum(1 for p in predictions if BaselineBuilder.is_error(p))
 
         return {
             "avg_confidence": float(np.mean(confidences)),
@@ -30,4 +36,115 @@ class BaselineBuilder:
             "error_rate": round(errors / len(confidences), 3),
             "confidence_scores": confidences,
             "features": {},
+            **BaselineBuilder.latency_stats(predictions),
+            "sketches": QuantileSketch.for_signals(
+                confidence=confidences,
+                latency_ms=[
+                    p["latency_ms"]
+                    for p in predictions
+                    if isinstance(p, dict) and p.get("latency_ms") is not None
+                ],
+            ),
+        }
+
+    @staticmethod
+    def compact(metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Baseline form of a metrics snapshot: the raw confidence list is
+        replaced by its sketch, so the stored size stays bounded, and
+        PSI bins are precomputed per signal.
+        """
+        baseline = dict(metrics)
+        sketches = dict(baseline.get("sketches") or {})
+        scores = baseline.pop("confidence_scores", None)
+
+        if "confidence" not in sketches and scores:
+            sketches.update(QuantileSketch.for_signals(confidence=scores))
+        baseline["sketches"] = sketches
+        baseline["histograms"] = BaselineBuilder.histograms(
+            {name: QuantileSketch.from_dict(data) for name, data in sketches.items()}
+        )
+        return baseline
+
+    @staticmethod
+    def histograms(sketches: Dict[str, QuantileSketch]) -> Dict[str, Any]:
+        return {
+            name: HistogramDrift.reference(sketch)
+            for name, sketch in sketches.items()
+            if sketch.n
+        }
+
+    @staticmethod
+    def merge(baselines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combines baselines (e.g. from different windows or workers)
+        into one: sample-weighted moments, pooled std, merged sketches.
+        """
+        parts = [b for b in baselines if b.get("total_samples", 0) > 0]
+        if not parts:
+            return BaselineBuilder.compact(BaselineBuilder.build([]))
+
+        parts = [BaselineBuilder.compact(b) for b in parts]
+        total = sum(b["total_samples"] for b in parts)
+        avg = sum(b["avg_confidence"] * b["total_samples"] for b in parts) / total
+        pooled = sum(
+            b["total_samples"] * (b["confidence_std"] ** 2 + (b["avg_confidence"] - avg) ** 2)
+            for b in parts
+        ) / total
+
+        sketches: Dict[str, QuantileSketch] = {}
+        for b in parts:
+            for name, data in b["sketches"].items():
+                sketch = QuantileSketch.from_dict(data)
+                if name in sketches:
+                    sketches[name].merge(sketch)
+                else:
+                    sketches[name] = sketch
+
+        latency = sketches.get("latency_ms")
+        timed = [b for b in parts if b.get("avg_latency_ms") is not None]
+        timed_total = sum(b["total_samples"] for b in timed)
+
+        return {
+            "avg_confidence": float(avg),
+            "confidence_std": float(math.sqrt(pooled)),
+            "total_samples": total,
+            "error_rate": round(
+                sum(b["error_rate"] * b["total_samples"] for b in parts) / total, 3
+            ),
+            "features": {},
+            "avg_latency_ms": (
+                round(
+                    sum(b["avg_latency_ms"] * b["total_samples"] for b in timed) / timed_total,
+                    3,
+                )
+                if timed_total
+                else None
+            ),
+            "p95_latency_ms": round(latency.quantile(0.95), 3) if latency else None,
+            "sketches": {name: sketch.to_dict() for name, sketch in sketches.items()},
+            "histograms": BaselineBuilder.histograms(sketches),
+        }
+
+    @staticmethod
+    def is_error(prediction: Dict[str, Any]) -> bool:
+        return (
+            prediction.get("confidence", 1.0) < 0.2
+            or prediction.get("prediction") == "error"
+        )
+
+    @staticmethod
+    def latency_stats(predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        latencies = [
+            p["latency_ms"]
+            for p in predictions
+            if isinstance(p, dict) and p.get("latency_ms") is not None
+        ]
+
+        if not latencies:
+            return {"avg_latency_ms": None, "p95_latency_ms": None}
+
+        return {
+            "avg_latency_ms": round(float(np.mean(latencies)), 3),
+            "p95_latency_ms": round(float(np.percentile(latencies, 95)), 3),
         }
@@ -0,0 +1,119 @@
+import math
+from typing import Dict, Any, Iterable, Optional
+
+from app.core.detection.drift_detector import DriftDetector
+from app.utils.config import get_settings
+
+
+class CadencePolicy:
+    """
+    Decides how often, and how hard, each scheduled model is probed.
+
+    - unhealthy (anomalies, drift, failed/partial run) → escalate at once
+      to the minimum interval and the maximum probe_runs
+    - healthy but noisy (high confidence coefficient of variation)
+      → hold the interval, add probe_runs
+    - healthy and quiet → back off the interval exponentially, up to
+      the registered interval, and shrink probe_runs toward the minimum
+
+    A model is never probed less often than it was registered for,
+    except when all models together exceed the global probe budget:
+    then every interval is stretched by the same factor.
+    """
+
+    # -------------------------------------------------
+    @classmethod
+    def initial(cls, interval_seconds: float) -> Dict[str, Any]:
+        return {
+            "interval_seconds": interval_seconds,
+            "registered_interval_seconds": interval_seconds,
+            "probe_runs": get_settings().cadence_default_probe_runs,
+            "state": "new",
+            "reason": "registered",
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def next(
+        cls,
+        cadence: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Cadence for the next run given the last one's result
+        (None when the investigation itself failed).
+        """
+        settings = get_settings()
+        interval = cadence["interval_seconds"]
+        registered = cadence["registered_interval_seconds"]
+        probe_runs = cadence["probe_runs"]
+
+        if not settings.cadence_adaptive_enabled:
+            return cadence
+
+        reason = cls._unhealthy_reason(result)
+        if reason is not None:
+            return {
+                "interval_seconds": min(registered, settings.cadence_min_interval_seconds),
+                "registered_interval_seconds": registered,
+                "probe_runs": settings.cadence_max_probe_runs,
+                "state": "escalated",
+                "reason": reason,
+            }
+
+        metrics = result.get("current_metrics", {})
+        avg_conf = metrics.get("avg_confidence") or 0.0
+        variation = metrics.get("confidence_std", 0.0) / avg_conf if avg_conf > 0 else 0.0
+
+        if variation > settings.cadence_noisy_variation:
+            return {
+                "interval_seconds": interval,
+                "registered_interval_seconds": registered,
+                "probe_runs": min(
+                    settings.cadence_max_probe_runs, math.ceil(probe_runs * 1.5)
+                ),
+                "state": "noisy",
+                "reason": f"confidence variation {variation:.3f}",
+            }
+
+        return {
+            "interval_seconds": min(registered, interval * settings.cadence_backoff_factor),
+            "registered_interval_seconds": registered,
+            "probe_runs": max(settings.cadence_min_probe_runs, probe_runs // 2),
+            "state": "stable",
+            "reason": "healthy",
+        }
+
+    # -------------------------------------------------
+    @staticmethod
+    def _unhealthy_reason(result: Optional[Dict[str, Any]]) -> Optional[str]:
+        if result is None:
+            return "investigation failed"
+        if result.get("anomalies"):
+            return "anomalies: " + ", ".join(result["anomalies"])
+        if DriftDetector.drift_detected(result.get("drift", {})):
+            return "drift detected"
+        if result.get("partial"):
+            return "partial result"
+        return None
+
+    # -------------------------------------------------
+    @classmethod
+    def stretch(cls, cadences: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Fleet probe demand vs the global budget (probes/minute), and
+        the factor every interval must be multiplied by to fit it.
+        """
+        budget = get_settings().scheduler_probe_budget_per_minute
+        demand = sum(
+            60.0 * c["probe_runs"] / c["interval_seconds"]
+            for c in cadences
+            if c["interval_seconds"] > 0
+        )
+        factor = demand / budget if budget > 0 and demand > budget else 1.0
+
+        return {
+            "budget_probes_per_minute": budget,
+            "demand_probes_per_minute": round(demand, 3),
+            "stretch_factor": round(factor, 4),
+        }
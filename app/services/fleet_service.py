@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import Dict, Any, List, AsyncIterator, Optional
+
+from app.core.detection.drift_detector import DriftDetector
+from app.services.investigation_service import InvestigationService
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+
+class FleetInvestigationService:
+    """
+    Investigates many models concurrently on a bounded pool.
+
+    Results are yielded in completion order, so one slow or failing
+    model never holds back the others; each model also gets its own
+    timeout. The last item is a fleet summary.
+    """
+
+    # -------------------------------------------------
+    @classmethod
+    async def _investigate(
+        cls,
+        model_url: str,
+        probe_runs: int,
+        semaphore: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        timeout = get_settings().fleet_model_timeout_seconds
+
+        async with semaphore:
+            started = time.perf_counter()
+            item: Dict[str, Any] = {"type": "result", "prediction_url": model_url}
+
+            try:
+                item["result"] = await asyncio.wait_for(
+                    InvestigationService().investigate(model_url, probe_runs=probe_runs),
+                    timeout=timeout,
+                )
+                item["status"] = "ok"
+
+            except asyncio.TimeoutError:
+                item["status"] = "timeout"
+                item["error"] = f"investigation exceeded {timeout}s"
+
+            except Exception as e:
+                logger.error(f"Fleet investigation failed | model={model_url} | {e}")
+                item["status"] = "error"
+                item["error"] = str(e)
+
+            item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            return item
+
+    # -------------------------------------------------
+    @classmethod
+    async def stream(
+        cls,
+        model_urls: List[str],
+        probe_runs: int = 5,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        settings = get_settings()
+        semaphore = asyncio.Semaphore(max_concurrency or settings.fleet_max_concurrency)
+        urls = list(dict.fromkeys(model_urls))
+        started = time.perf_counter()
+
+        tasks = [
+            asyncio.create_task(cls._investigate(url, probe_runs, semaphore))
+            for url in urls
+        ]
+
+        summary: Dict[str, Any] = {
+            "type": "summary",
+            "total": len(urls),
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "drifting": [],
+            "anomalous": [],
+        }
+        confidences: List[float] = []
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+
+                if item["status"] == "ok":
+                    summary["succeeded"] += 1
+                    result = item["result"]
+                    if DriftDetector.drift_detected(result.get("drift", {})):
+                        summary["drifting"].append(item["prediction_url"])
+                    if result.get("anomalies"):
+                        summary["anomalous"].append(item["prediction_url"])
+                    avg_conf = result.get("current_metrics", {}).get("avg_confidence")
+                    if avg_conf is not None:
+                        confidences.append(avg_conf)
+                elif item["status"] == "timeout":
+                    summary["timed_out"] += 1
+                else:
+                    summary["failed"] += 1
+
+                yield item
+
+            summary["fleet_avg_confidence"] = (
+                round(sum(confidences) / len(confidences), 6) if confidences else None
+            )
+            summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            yield summary
+
+        finally:
+            # Client went away (or the stream finished): stop leftover work
+            for task in tasks:
+                task.cancel()
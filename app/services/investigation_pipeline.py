@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.utils.logger import logger
+
+
+class Stage:
+    """
+    One step of an investigation.
+
+    `run(ctx)` reads and writes the shared context dict (sync or async).
+    `requires` names stages that must have finished "ok" first.
+    `skip_if(ctx)` may return a reason string to skip the stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Dict[str, Any]], Any],
+        requires: Iterable[str] = (),
+        skip_if: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.requires = tuple(requires)
+        self.skip_if = skip_if
+
+
+class StagePipeline:
+    """
+    Runs stages in order with dependency-aware skipping.
+
+    Every stage gets a report entry: status (ok / skipped / failed /
+    timeout), duration_ms, and a reason or error. Async stages with a
+    budget are cancelled when it runs out; sync stages that overrun
+    are flagged `over_budget`. With allow_partial, a failing stage
+    only skips its dependents instead of failing the investigation.
+
+    An optional overall `deadline` (time.monotonic() value) also caps
+    async stages, and stages that would start after it are skipped.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        budgets_ms: Optional[Dict[str, float]] = None,
+        allow_partial: bool = True,
+        deadline: Optional[float] = None,
+    ):
+        self.stages = stages
+        self.budgets_ms = budgets_ms or {}
+        self.allow_partial = allow_partial
+        self.deadline = deadline
+
+    # -------------------------------------------------
+    async def run(self, ctx: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        report: Dict[str, Dict[str, Any]] = {}
+
+        for stage in self.stages:
+            blocked = [r for r in stage.requires if report[r]["status"] != "ok"]
+            if blocked:
+                report[stage.name] = {
+                    "status": "skipped",
+                    "reason": f"{blocked[0]} {report[blocked[0]]['status']}",
+                    "duration_ms": 0.0,
+                }
+                continue
+
+            reason = stage.skip_if(ctx) if stage.skip_if else None
+            if reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+                reason = "deadline reached"
+            if reason:
+                report[stage.name] = {
+                    "status": "skipped",
+                    "reason": reason,
+                    "duration_ms": 0.0,
+                }
+                continue
+
+            report[stage.name] = await self._run_stage(stage, ctx)
+
+        return report
+
+    # -------------------------------------------------
+    async def _run_stage(self, stage: Stage, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        budget_ms = self.budgets_ms.get(stage.name)
+        if self.deadline is not None:
+            remaining_ms = max(0.0, (self.deadline - time.monotonic()) * 1000)
+            budget_ms = remaining_ms if budget_ms is None else min(budget_ms, remaining_ms)
+        entry: Dict[str, Any] = {"status": "ok"}
+        started = time.perf_counter()
+
+        try:
+            outcome = stage.run(ctx)
+            if inspect.isawaitable(outcome):
+                if budget_ms is not None:
+                    await asyncio.wait_for(outcome, timeout=budget_ms / 1000)
+                else:
+                    await outcome
+
+        except asyncio.TimeoutError as e:
+            if not self.allow_partial:
+                raise
+            if budget_ms is not None:
+                entry = {"status": "timeout", "error": f"exceeded {budget_ms} ms budget"}
+            else:
+                entry = {"status": "failed", "error": str(e) or "timeout"}
+
+        except Exception as e:
+            if not self.allow_partial:
+                raise
+            logger.error(f"Investigation stage failed | stage={stage.name} | {e}")
+            entry = {"status": "failed", "error": str(e)}
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        entry["duration_ms"] = round(duration_ms, 3)
+        if budget_ms is not None and entry["status"] == "ok" and duration_ms > budget_ms:
+            entry["over_budget"] = True
+
+        return entry
@@ -1,13 +1,26 @@
+import asyncio
+import time
+from collections import OrderedDict
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 from app.core.detection.anomaly_detector import AnomalyDetector
-from app.core.detection.drift_detector import DriftDetector
+from app.core.detection.change_detector import ChangeDetectorRegistry
+from app.core.detection.detector_registry import DetectorRegistry
+from app.core.detection.metric_checker import MetricChecker
+from app.core.metrics.rolling_window import RollingMetricsRegistry
+from app.core.metrics.time_aggregates import TimeAggregateRegistry
 from app.core.storage.baseline_store import BaselineStore
-from app.core.probing.universal_model_caller import UniversalModelCaller
+from app.core.probing.async_probe_engine import AsyncProbeEngine
+from app.core.probing.circuit_breaker import CircuitBreakerRegistry
+from app.core.probing.payload_generator import PayloadGenerator
+from app.core.probing.latency_tracker import LatencyTracker
 from app.services.baseline_builder import BaselineBuilder
 from app.core.rca.feature_attribution import FeatureAttributor
 from app.core.recommendation.rule_engine import RecommendationRuleEngine
+from app.services.investigation_pipeline import Stage, StagePipeline
+from app.services.sequential_sampler import SequentialSampler
+from app.utils.config import get_settings
 
 
 def make_json_safe(obj):
@@ -22,78 +35,429 @@ def make_json_safe(obj):
 
 
 class InvestigationService:
-    def __init__(self):
-        self.anomaly_detector = AnomalyDetector()
-        self.drift_detector = DriftDetector()
+    # Single-flight: concurrent investigations of the same model share
+    # one run. Keyed by (model_url, probe_runs, sampling); the per-model
+    # counters keep the most recently investigated models only.
+    _inflight: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
+    _coalesce_stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
 
-    def investigate(
+    async def investigate(
         self,
         model_url: str,
         probe_runs: int = 5,
+        deadline_ms: Optional[float] = None,
+        sampling: Optional[str] = None,
     ) -> Dict[str, Any]:
+        """
+        Runs an investigation, or joins the one already in flight for
+        this model. The shared run is only cancelled once every caller
+        waiting on it has gone away.
 
-        predictions: List[Dict[str, Any]] = []
-        confidence_scores: List[float] = []
+        With `deadline_ms`, the investigation answers within that time
+        from whatever samples arrived (see `completeness`). Deadline-
+        bound calls run on their own, since another caller's flight
+        would not respect the deadline.
 
-        # 🔁 Probe model multiple times — no forced payload
+        `sampling` is "fixed" (exactly probe_runs probes) or "sequential"
+        (a small first batch, then more batches until the estimates
+        settle); default: sampling_mode setting.
+        """
+        sampling = sampling or get_settings().sampling_mode
+
+        if deadline_ms is not None:
+            return await self._investigate(
+                model_url, probe_runs, time.monotonic() + deadline_ms / 1000, sampling
+            )
+
+        key = (model_url, probe_runs, sampling)
+        stats = self._stats(model_url)
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            task = asyncio.create_task(
+                self._investigate(model_url, probe_runs, sampling=sampling)
+            )
+            flight = {"task": task, "waiters": 0}
+            self._inflight[key] = flight
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            stats["executions"] += 1
+        else:
+            stats["coalesced"] += 1
+
+        flight["waiters"] += 1
+        try:
+            return await asyncio.shield(flight["task"])
+        except asyncio.CancelledError:
+            if not flight["task"].done() and flight["waiters"] == 1:
+                flight["task"].cancel()
+            raise
+        finally:
+            flight["waiters"] -= 1
+
+    @classmethod
+    def _stats(cls, model_url: str) -> Dict[str, int]:
+        stats = cls._coalesce_stats.get(model_url)
+        if stats is None:
+            stats = cls._coalesce_stats[model_url] = {"executions": 0, "coalesced": 0}
+            while len(cls._coalesce_stats) > get_settings().coalesce_stats_max_models:
+                cls._coalesce_stats.popitem(last=False)
+        cls._coalesce_stats.move_to_end(model_url)
+        return stats
+
+    @classmethod
+    def coalescing_stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            url: {
+                **stats,
+                "in_flight": any(key[0] == url for key in cls._inflight),
+            }
+            for url, stats in cls._coalesce_stats.items()
+        }
+
+    async def _investigate(
+        self,
+        model_url: str,
+        probe_runs: int,
+        deadline: Optional[float] = None,
+        sampling: str = "fixed",
+    ) -> Dict[str, Any]:
+        settings = get_settings()
+        started = time.monotonic()
+
+        pipeline = StagePipeline(
+            [
+                Stage("probe", self._probe),
+                Stage("metrics", self._metrics, requires=("probe",)),
+                Stage(
+                    "baseline", self._baseline,
+                    requires=("metrics",), skip_if=self._no_usable_samples,
+                ),
+                Stage(
+                    "drift", self._drift,
+                    requires=("baseline",), skip_if=self._first_run,
+                ),
+                Stage(
+                    "metric_checks", self._metric_checks,
+                    requires=("baseline",), skip_if=self._first_run,
+                ),
+                Stage("anomaly", self._anomaly, requires=("metrics",)),
+                Stage("rca", self._rca, requires=("anomaly",)),
+                Stage("recommendations", self._recommendations, requires=("rca",)),
+            ],
+            budgets_ms=settings.investigation_stage_budgets_ms,
+            allow_partial=settings.investigation_allow_partial,
+            deadline=deadline,
+        )
+
+        ctx: Dict[str, Any] = {
+            "model_url": model_url,
+            "probe_runs": probe_runs,
+            "probe_deadline": self._probe_deadline(started, deadline),
+            "sampling": sampling,
+        }
+        stages = await pipeline.run(ctx)
+
+        current_metrics = ctx.get("current_metrics", {})
+        predictions = ctx.get("predictions", [])
+
+        # 📦 Build result
+        result = {
+            "metrics": current_metrics,
+            "current_metrics": current_metrics,
+            "window_metrics": ctx.get("analysis_metrics", {}),
+            "baseline_exists": ctx.get("baseline") is not None,
+            "drift": ctx.get("drift", {}),
+            "metric_checks": ctx.get("metric_checks", {}),
+            "anomalies": ctx.get("anomalies", []),
+            "rca": ctx.get("rca", {}),
+            "recommendations": ctx.get("recommendations", []),
+            "samples_collected": len(predictions),
+            "probes_throttled": ctx.get("throttled", 0),
+            "circuit_breaker": CircuitBreakerRegistry.snapshot(model_url),
+            "latency_breakdown": LatencyTracker.phase_summary(model_url),
+            "detector_state": DetectorRegistry.snapshot(model_url),
+            "rolling_window": RollingMetricsRegistry.snapshot(model_url),
+            "stages": stages,
+            "partial": any(
+                stage["status"] in ("failed", "timeout") for stage in stages.values()
+            ),
+            "completeness": self._completeness(ctx, stages, started, deadline),
+            "sampling": ctx.get("sampling_report", {"mode": sampling}),
+        }
+
+        return make_json_safe(result)
+
+    @staticmethod
+    def _probe_deadline(started: float, deadline: Optional[float]) -> Optional[float]:
+        """
+        Probing gets the deadline minus a reserve for the analysis
+        stages that follow it.
+        """
+        if deadline is None:
+            return None
+
+        settings = get_settings()
+        total = deadline - started
+        reserve = max(
+            total * settings.deadline_analysis_reserve_fraction,
+            settings.deadline_analysis_reserve_min_ms / 1000,
+        )
+        return started + max(0.0, total - reserve)
+
+    @staticmethod
+    def _completeness(
+        ctx: Dict[str, Any],
+        stages: Dict[str, Dict[str, Any]],
+        started: float,
+        deadline: Optional[float],
+    ) -> Dict[str, Any]:
+        """
+        Which parts of the result are complete, and which were cut
+        short by the deadline (fewer samples, or not run at all).
+        """
+        cancelled = ctx.get("probes_cancelled", 0)
+        requested = ctx.get("probes_sent", ctx["probe_runs"])
+        degraded: Dict[str, str] = {}
+
+        for name, stage in stages.items():
+            if stage["status"] == "timeout" or stage.get("reason") == "deadline reached":
+                degraded[name] = "deadline reached"
+            elif stage["status"] == "ok" and name != "probe" and cancelled:
+                degraded[name] = f"based on {requested - cancelled}/{requested} probes"
+
+        if ctx.get("baseline_deferred"):
+            degraded["baseline"] = "first baseline not saved from a deadline-cut sample"
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        return {
+            "deadline_ms": (
+                round((deadline - started) * 1000, 3) if deadline is not None else None
+            ),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "deadline_met": deadline is None or time.monotonic() <= deadline,
+            "probes_requested": requested,
+            "probes_cancelled": cancelled,
+            "complete": [
+                name for name, stage in stages.items()
+                if stage["status"] == "ok" and name not in degraded
+            ],
+            "degraded": degraded,
+        }
+
+    # -------------------------------------------------
+    # STAGES
+    # -------------------------------------------------
+    @staticmethod
+    async def _probe(ctx: Dict[str, Any]) -> None:
+        # 🔁 Probe model multiple times concurrently — no forced payload
         # UniversalModelCaller auto-detects the correct payload
-        for _ in range(probe_runs):
-            try:
-                response = UniversalModelCaller.call(
+        # Sequential runs start small: clear-cut models settle before
+        # a fixed run would have finished
+        probe_runs = ctx["probe_runs"]
+        if ctx["sampling"] == "sequential":
+            probe_runs = min(probe_runs, get_settings().sequential_initial_batch_size)
+
+        # Probes carry PayloadGenerator's inputs (normal, edge-case,
+        # adversarial, noise) in the endpoint's own payload format
+        ctx["probe_inputs"] = [p["text"] for p in PayloadGenerator.generate()]
+
+        records = await AsyncProbeEngine.probe(
+            model_url=ctx["model_url"],
+            probe_runs=probe_runs,
+            deadline=ctx["probe_deadline"],
+            inputs=InvestigationService._probe_inputs(ctx, 0),
+        )
+
+        if ctx["sampling"] == "sequential":
+            records = await InvestigationService._sample_sequentially(ctx, records)
+
+        # Shed and deadline-cancelled probes never got an answer —
+        # they are not samples
+        ctx["predictions"] = InvestigationService._answered(records)
+        ctx["throttled"] = sum(1 for r in records if r.get("throttled"))
+        ctx["probes_cancelled"] = sum(1 for r in records if r.get("deadline_exceeded"))
+        ctx["probes_sent"] = len(records)
+
+    @staticmethod
+    def _probe_inputs(ctx: Dict[str, Any], sent: int) -> List[Any]:
+        # Later batches carry on through the inputs where the last stopped
+        inputs = ctx["probe_inputs"]
+        start = sent % len(inputs)
+        return inputs[start:] + inputs[:start]
+
+    @staticmethod
+    def _answered(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            r for r in records
+            if not r.get("throttled") and not r.get("deadline_exceeded")
+        ]
+
+    @staticmethod
+    async def _sample_sequentially(
+        ctx: Dict[str, Any],
+        records: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Keeps probing in sequential_batch_size batches until
+        SequentialSampler says the estimates are settled, the probe
+        budget (sequential_max_samples) is spent, or probing stops
+        yielding answers (deadline, rate limit, open circuit).
+        """
+        settings = get_settings()
+        model_url = ctx["model_url"]
+        baseline = DetectorRegistry.get(model_url).baseline
+        batch = records
+        batches = 1
+
+        while True:
+            report = SequentialSampler.assess(InvestigationService._answered(records), baseline)
+
+            if report["settled"]:
+                stopped = "settled"
+            elif len(records) >= settings.sequential_max_samples:
+                stopped = "max_samples"
+            elif any(r.get("deadline_exceeded") for r in batch):
+                stopped = "deadline"
+            elif all(r.get("throttled") or r.get("circuit_open") for r in batch):
+                stopped = "no_answers"
+            else:
+                batch = await AsyncProbeEngine.probe(
                     model_url=model_url,
+                    probe_runs=min(
+                        settings.sequential_batch_size,
+                        settings.sequential_max_samples - len(records),
+                    ),
+                    deadline=ctx["probe_deadline"],
+                    inputs=InvestigationService._probe_inputs(ctx, len(records)),
                 )
-                print(f"✅ Response: {response}")
-                predictions.append(response)
-                confidence_scores.append(response.get("confidence", 0.0))
-            except Exception as e:
-                print(f"❌ Model call failed: {e}")
+                records = records + batch
+                batches += 1
                 continue
 
+            ctx["sampling_report"] = {
+                "mode": "sequential",
+                "samples": len(InvestigationService._answered(records)),
+                "probes_sent": len(records),
+                "batches": batches,
+                "stopped": stopped,
+                **report,
+            }
+            return records
+
+    @staticmethod
+    def _metrics(ctx: Dict[str, Any]) -> None:
         # 📊 Current metrics
+        predictions = ctx["predictions"]
         current_metrics = BaselineBuilder.build(predictions)
-        current_metrics["confidence_scores"] = confidence_scores
+        current_metrics["confidence_scores"] = [
+            p.get("confidence", 0.0) for p in predictions
+        ]
+        ctx["current_metrics"] = current_metrics
+        ctx["usable_samples"] = sum(1 for p in predictions if not p.get("error"))
 
-        # 📦 Load baseline
-        baseline = BaselineStore.load(model_url)
+        # 🪟 Rolling window: this run's samples join everything seen
+        # before (probes + ingested); detection runs on the window.
+        # Change detectors and time aggregates see every sample. Replayed
+        # (cached) answers and open-circuit refusals are not observations
+        # of the model, so they stay out of these streams.
+        model_url = ctx["model_url"]
+        for p in predictions:
+            if p.get("cached") or p.get("circuit_open"):
+                continue
+            sample = (p.get("confidence", 0.0), BaselineBuilder.is_error(p), p.get("latency_ms"))
+            RollingMetricsRegistry.record(model_url, *sample)
+            ChangeDetectorRegistry.update(model_url, *sample)
+            TimeAggregateRegistry.record(model_url, *sample)
+        ctx["analysis_metrics"] = (
+            RollingMetricsRegistry.window_metrics(model_url)
+            if get_settings().rolling_window_enabled
+            else current_metrics
+        )
 
-        # 🧠 First run → save baseline
-        if baseline is None:
-            BaselineStore.save(model_url, current_metrics)
-            drift = {}
-        else:
-            drift = self.drift_detector.detect(
-                baseline=baseline,
-                current=current_metrics,
+    @staticmethod
+    def _no_usable_samples(ctx: Dict[str, Any]) -> Optional[str]:
+        if ctx["usable_samples"] == 0:
+            return "no successful predictions"
+        return None
+
+    @staticmethod
+    def _baseline(ctx: Dict[str, Any]) -> None:
+        # 📦 Per-model detectors + prepared baseline (kept across requests)
+        model_url = ctx["model_url"]
+        detectors = DetectorRegistry.get(model_url)
+        baseline = detectors.baseline
+
+        # 🧠 First run → save baseline (unless another worker just did),
+        # but never freeze a sample the deadline cut short
+        if baseline is None and ctx["probes_cancelled"]:
+            ctx["baseline_deferred"] = True
+        elif baseline is None:
+            created, _ = BaselineStore.save_initial(
+                model_url, BaselineBuilder.compact(ctx["current_metrics"])
             )
+            detectors = DetectorRegistry.get(model_url)
+            baseline = None if created else detectors.baseline
 
+        ctx["detectors"] = detectors
+        ctx["baseline"] = baseline
+
+    @staticmethod
+    def _first_run(ctx: Dict[str, Any]) -> Optional[str]:
+        if ctx.get("baseline_deferred"):
+            return "no baseline yet"
+        if ctx["baseline"] is None:
+            return "baseline recorded on this run"
+        return None
+
+    @staticmethod
+    def _drift(ctx: Dict[str, Any]) -> None:
+        drift = ctx["detectors"].drift_detector.detect(
+            baseline=ctx["baseline"],
+            current=ctx["analysis_metrics"],
+        )
+
+        # 📈 Online change points since the last snapshots
+        changes = ChangeDetectorRegistry.report(ctx["model_url"])
+        if changes is not None:
+            if changes["drift_detected"]:
+                drift.pop("status", None)
+            drift["change_points"] = changes
+        ctx["drift"] = drift
+
+    @staticmethod
+    def _metric_checks(ctx: Dict[str, Any]) -> None:
+        ctx["metric_checks"] = MetricChecker.check(ctx["baseline"], ctx["analysis_metrics"])
+
+    @staticmethod
+    def _anomaly(ctx: Dict[str, Any]) -> None:
         # 🚨 Anomaly detection
-        anomalies = self.anomaly_detector.detect(current_metrics)
+        metrics = ctx["analysis_metrics"]
+
+        # Nothing usable came back: rules only, keep it out of the
+        # IsolationForest history
+        if ctx["usable_samples"] == 0:
+            ctx["anomalies"] = sorted(
+                set(AnomalyDetector.detect_rules(ctx["current_metrics"])) | {"no_predictions"}
+            )
+            return
+
+        ctx["anomalies"] = DetectorRegistry.get(ctx["model_url"]).detect_anomalies(metrics)
 
+    @staticmethod
+    def _rca(ctx: Dict[str, Any]) -> None:
         # 🧠 Root Cause Analysis
-        rca = FeatureAttributor.analyze(
-            predictions=predictions,
-            drift=drift,
-            anomalies=anomalies,
+        ctx["rca"] = FeatureAttributor.analyze(
+            predictions=ctx["predictions"],
+            drift=ctx.get("drift", {}),
+            anomalies=ctx["anomalies"],
         )
 
+    @staticmethod
+    def _recommendations(ctx: Dict[str, Any]) -> None:
         # 💊 Recommendations
-        recommendations = RecommendationRuleEngine.generate(
-            rca=rca,
-            drift=drift,
-            anomalies=anomalies,
-            metrics=current_metrics,
+        ctx["recommendations"] = RecommendationRuleEngine.generate(
+            rca=ctx["rca"],
+            drift=ctx.get("drift", {}),
+            anomalies=ctx["anomalies"],
+            metrics=ctx["current_metrics"],
         )
-
-        # 📦 Build result
-        result = {
-            "metrics": current_metrics,
-            "current_metrics": current_metrics,
-            "baseline_exists": baseline is not None,
-            "drift": drift,
-            "anomalies": anomalies,
-            "rca": rca,
-            "recommendations": recommendations,
-            "samples_collected": len(predictions),
-        }
-
-        return make_json_safe(result)
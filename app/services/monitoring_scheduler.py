@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.services.cadence_policy import CadencePolicy
+from app.services.investigation_service import InvestigationService
+from app.services.result_cache import AnalysisResultCache
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+
+class MonitoringScheduler:
+    """
+    Server-side continuous monitoring.
+
+    Holds the registry of monitored models (persisted to disk so it
+    survives restarts), runs InvestigationService for each one on its
+    own jittered interval with bounded concurrency, and keeps the
+    latest results for readers. Probe load is set by the schedule,
+    not by how many dashboards are open.
+
+    Each model's interval and probe_runs adapt to its health through
+    CadencePolicy, within the global probe budget.
+    """
+
+    REGISTRY_FILE = Path("data/monitoring/models.json")
+    HISTORY_SIZE = 100
+
+    _models: Dict[str, Dict[str, Any]] = {}
+    _results: Dict[str, Dict[str, Any]] = {}
+    _history: Dict[str, deque] = {}
+    _running: Dict[str, asyncio.Task] = {}
+    _task: Optional[asyncio.Task] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    # -------------------------------------------------
+    # REGISTRY
+    # -------------------------------------------------
+    @classmethod
+    def _load(cls) -> None:
+        if not cls.REGISTRY_FILE.exists():
+            return
+        try:
+            with open(cls.REGISTRY_FILE, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Monitoring registry unreadable — starting empty")
+            return
+
+        for url, entry in stored.items():
+            cls.register(
+                url,
+                interval_seconds=entry.get("interval_seconds"),
+                model_name=entry.get("model_name"),
+                persist=False,
+            )
+
+    # -------------------------------------------------
+    @classmethod
+    def _save(cls) -> None:
+        cls.REGISTRY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cls.REGISTRY_FILE.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {
+                    url: {
+                        "model_name": m["model_name"],
+                        "interval_seconds": m["interval_seconds"],
+                    }
+                    for url, m in cls._models.items()
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_file, cls.REGISTRY_FILE)
+
+    # -------------------------------------------------
+    @classmethod
+    def register(
+        cls,
+        model_url: str,
+        interval_seconds: Optional[float] = None,
+        model_name: Optional[str] = None,
+        persist: bool = True,
+    ) -> Dict[str, Any]:
+        settings = get_settings()
+        interval = interval_seconds or settings.scheduler_default_interval_seconds
+
+        existing = cls._models.get(model_url, {})
+        # Re-registering (e.g. another dashboard) keeps the learned
+        # cadence; the new interval only moves its back-off ceiling
+        cadence = existing.get("cadence")
+        if cadence is None:
+            cadence = CadencePolicy.initial(interval)
+        else:
+            cadence = {
+                **cadence,
+                "interval_seconds": min(cadence["interval_seconds"], interval),
+                "registered_interval_seconds": interval,
+            }
+
+        cls._models[model_url] = {
+            "model_name": model_name or existing.get("model_name") or model_url,
+            "interval_seconds": interval,
+            "registered_at": existing.get("registered_at", datetime.utcnow().isoformat()),
+            # Run soon after registering, spread out to avoid bursts
+            "next_run": existing.get(
+                "next_run", time.monotonic() + random.uniform(0, min(interval, 2.0))
+            ),
+            "runs": existing.get("runs", 0),
+            "failures": existing.get("failures", 0),
+            "cadence": cadence,
+        }
+
+        if persist:
+            cls._save()
+
+        return cls.describe(model_url)
+
+    # -------------------------------------------------
+    @classmethod
+    def unregister(cls, model_url: str) -> bool:
+        if model_url not in cls._models:
+            return False
+
+        del cls._models[model_url]
+        task = cls._running.pop(model_url, None)
+        if task is not None:
+            task.cancel()
+        cls._save()
+        return True
+
+    # -------------------------------------------------
+    @classmethod
+    def describe(cls, model_url: str) -> Dict[str, Any]:
+        model = cls._models[model_url]
+        latest = cls._results.get(model_url)
+
+        return {
+            "prediction_url": model_url,
+            "model_name": model["model_name"],
+            "interval_seconds": model["interval_seconds"],
+            "registered_at": model["registered_at"],
+            "next_run_in_seconds": round(max(0.0, model["next_run"] - time.monotonic()), 3),
+            "running": model_url in cls._running,
+            "cadence": {
+                **model["cadence"],
+                "effective_interval_seconds": round(
+                    model["cadence"]["interval_seconds"] * cls._stretch_factor(), 3
+                ),
+            },
+            "runs": model["runs"],
+            "failures": model["failures"],
+            "last_generated_at": latest["generated_at"] if latest else None,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def models(cls) -> List[Dict[str, Any]]:
+        return [cls.describe(url) for url in cls._models]
+
+    # -------------------------------------------------
+    @classmethod
+    def _stretch_factor(cls) -> float:
+        return CadencePolicy.stretch(
+            m["cadence"] for m in cls._models.values()
+        )["stretch_factor"]
+
+    # -------------------------------------------------
+    @classmethod
+    def cadence(cls) -> Dict[str, Any]:
+        return {
+            **CadencePolicy.stretch(m["cadence"] for m in cls._models.values()),
+            "models": {url: cls.describe(url)["cadence"] for url in cls._models},
+        }
+
+    # -------------------------------------------------
+    # RESULTS
+    # -------------------------------------------------
+    @classmethod
+    def latest(cls, model_url: str) -> Optional[Dict[str, Any]]:
+        return cls._results.get(model_url)
+
+    # -------------------------------------------------
+    @classmethod
+    def history(cls, model_url: str) -> List[Dict[str, Any]]:
+        return list(cls._history.get(model_url, ()))
+
+    # -------------------------------------------------
+    @classmethod
+    def _store(cls, model_url: str, result: Dict[str, Any], probe_runs: int) -> None:
+        # Scheduled runs also keep /analyze answers fresh for the same
+        # probe_runs / sampling
+        generated_at = AnalysisResultCache.put(model_url, result, probe_runs)["generated_at"]
+        cls._results[model_url] = {"generated_at": generated_at, "result": result}
+
+        if model_url not in cls._history:
+            cls._history[model_url] = deque(maxlen=cls.HISTORY_SIZE)
+        cls._history[model_url].append({
+            "generated_at": generated_at,
+            "metrics": result.get("current_metrics", {}),
+            "anomalies": result.get("anomalies", []),
+        })
+
+    # -------------------------------------------------
+    # LOOP
+    # -------------------------------------------------
+    @classmethod
+    async def start(cls) -> None:
+        settings = get_settings()
+        if not settings.scheduler_enabled or cls._task is not None:
+            return
+
+        cls._load()
+        cls._semaphore = asyncio.Semaphore(settings.scheduler_max_concurrency)
+        cls._task = asyncio.create_task(cls._loop())
+        logger.info(f"Monitoring scheduler started | models={len(cls._models)}")
+
+    # -------------------------------------------------
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._task is None:
+            return
+
+        cls._task.cancel()
+        for task in list(cls._running.values()):
+            task.cancel()
+        await asyncio.gather(cls._task, *cls._running.values(), return_exceptions=True)
+
+        cls._task = None
+        cls._running.clear()
+        logger.info("Monitoring scheduler stopped")
+
+    # -------------------------------------------------
+    @classmethod
+    async def _loop(cls) -> None:
+        tick = get_settings().scheduler_tick_seconds
+
+        while True:
+            now = time.monotonic()
+            for url, model in list(cls._models.items()):
+                if url not in cls._running and model["next_run"] <= now:
+                    cls._running[url] = asyncio.create_task(cls._run(url))
+            await asyncio.sleep(tick)
+
+    # -------------------------------------------------
+    @classmethod
+    async def _run(cls, model_url: str) -> None:
+        settings = get_settings()
+        result = None
+        try:
+            probe_runs = cls._models[model_url]["cadence"]["probe_runs"]
+            async with cls._semaphore:
+                result = await InvestigationService().investigate(
+                    model_url, probe_runs=probe_runs
+                )
+            cls._store(model_url, result, probe_runs)
+            if model_url in cls._models:
+                cls._models[model_url]["runs"] += 1
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Scheduled investigation failed | model={model_url} | {e}")
+            if model_url in cls._models:
+                cls._models[model_url]["failures"] += 1
+
+        finally:
+            cls._running.pop(model_url, None)
+            model = cls._models.get(model_url)
+            if model is not None:
+                model["cadence"] = CadencePolicy.next(model["cadence"], result)
+                interval = model["cadence"]["interval_seconds"] * cls._stretch_factor()
+                jitter = random.uniform(-settings.scheduler_jitter, settings.scheduler_jitter)
+                model["next_run"] = time.monotonic() + interval * (1 + jitter)
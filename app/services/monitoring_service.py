@@ -1,9 +1,12 @@
 from typing import Dict, Any, List
 from app.schemas.monitoring import PredictionLog
 from app.utils.logger import logger
+from app.core.detection.change_detector import ChangeDetectorRegistry
 from app.core.detection.drift_detector import DriftDetector
 from app.core.probing.universal_model_caller import UniversalModelCaller
 from app.core.metrics.baseline_builder import BaselineBuilder
+from app.core.metrics.rolling_window import RollingMetricsRegistry
+from app.core.metrics.time_aggregates import TimeAggregateRegistry
 
 
 class MonitoringService:
@@ -14,6 +17,17 @@ class MonitoringService:
             f"Received prediction | model={data.model_id} | prediction={data.prediction}"
         )
 
+        # Feed the model's rolling window, change detectors and time
+        # aggregates (use the prediction URL as model_id to merge with
+        # probe samples)
+        error = data.prediction == "error" or (
+            data.confidence is not None and data.confidence < 0.2
+        )
+        ts = data.timestamp.timestamp()
+        RollingMetricsRegistry.record(data.model_id, data.confidence, error, ts=ts)
+        ChangeDetectorRegistry.update(data.model_id, data.confidence, error, ts=ts)
+        TimeAggregateRegistry.record(data.model_id, data.confidence, error, ts=ts)
+
         return {
             "status": "received",
             "model_id": data.model_id,
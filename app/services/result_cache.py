@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from app.services.investigation_service import InvestigationService
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+
+class AnalysisResultCache:
+    """
+    Cache of investigation results with stale-while-revalidate, keyed
+    like single-flight by (model_url, probe_runs, sampling): a fixed
+    5-probe answer is never served for a sequential or scheduled run.
+
+    - age <= ttl                  → served as is ("hit")
+    - ttl < age <= ttl + stale    → served at once while a single
+                                    background refresh runs ("stale")
+    - older / missing             → investigated inline ("miss")
+
+    A ttl of 0 disables caching. Read-heavy dashboards then cost the
+    monitored model at most one investigation per TTL.
+    """
+
+    _entries: "OrderedDict[Tuple[str, int, str], Dict[str, Any]]" = OrderedDict()
+    _refreshing: Dict[Tuple[str, int, str], asyncio.Task] = {}
+    _stats: Dict[str, int] = {"hits": 0, "stale": 0, "misses": 0, "refreshes": 0}
+
+    # -------------------------------------------------
+    @staticmethod
+    def _key(model_url: str, probe_runs: int, sampling: Optional[str]) -> Tuple[str, int, str]:
+        return model_url, probe_runs, sampling or get_settings().sampling_mode
+
+    # -------------------------------------------------
+    @classmethod
+    def put(
+        cls,
+        model_url: str,
+        result: Dict[str, Any],
+        probe_runs: int = 5,
+        sampling: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        settings = get_settings()
+        key = cls._key(model_url, probe_runs, sampling)
+        entry = {
+            "result": result,
+            "stored": time.monotonic(),
+            "generated_at": datetime.utcnow().isoformat(),
+        }
+        cls._entries[key] = entry
+        cls._entries.move_to_end(key)
+
+        while len(cls._entries) > settings.analyze_cache_max_entries:
+            cls._entries.popitem(last=False)
+
+        return entry
+
+    # -------------------------------------------------
+    @classmethod
+    def invalidate(cls, model_url: str) -> None:
+        for key in [k for k in cls._entries if k[0] == model_url]:
+            del cls._entries[key]
+
+    # -------------------------------------------------
+    @classmethod
+    def _refresh(cls, model_url: str, probe_runs: int, sampling: Optional[str]) -> None:
+        key = cls._key(model_url, probe_runs, sampling)
+        if key in cls._refreshing:
+            return
+
+        async def run():
+            try:
+                result = await InvestigationService().investigate(
+                    model_url, probe_runs, sampling=sampling
+                )
+                cls.put(model_url, result, probe_runs, sampling)
+            except Exception as e:
+                logger.error(f"Background analysis refresh failed | model={model_url} | {e}")
+            finally:
+                cls._refreshing.pop(key, None)
+
+        cls._stats["refreshes"] += 1
+        cls._refreshing[key] = asyncio.create_task(run())
+
+    # -------------------------------------------------
+    @classmethod
+    async def get(
+        cls,
+        model_url: str,
+        probe_runs: int = 5,
+        refresh: bool = False,
+        deadline_ms: Optional[float] = None,
+        sampling: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Returns (result, freshness) where freshness carries
+        generated_at, age_seconds and cache status.
+
+        `deadline_ms` bounds the inline investigation on a miss;
+        results degraded by it are returned but not cached.
+        """
+        settings = get_settings()
+        ttl = settings.analyze_cache_ttl_seconds
+        key = cls._key(model_url, probe_runs, sampling)
+        entry = cls._entries.get(key)
+        age = time.monotonic() - entry["stored"] if entry else None
+
+        if entry is not None and not refresh and ttl > 0 and age <= ttl:
+            status = "hit"
+            cls._entries.move_to_end(key)
+        elif (
+            entry is not None
+            and not refresh
+            and ttl > 0
+            and age <= ttl + settings.analyze_cache_stale_seconds
+        ):
+            status = "stale"
+            cls._entries.move_to_end(key)
+            cls._refresh(model_url, probe_runs, sampling)
+        else:
+            status = "miss"
+            result = await InvestigationService().investigate(
+                model_url, probe_runs, deadline_ms=deadline_ms, sampling=sampling
+            )
+            if result["completeness"]["degraded"]:
+                entry = {"result": result, "generated_at": datetime.utcnow().isoformat()}
+            else:
+                entry = cls.put(model_url, result, probe_runs, sampling)
+            age = 0.0
+
+        cls._stats[{"hit": "hits", "stale": "stale", "miss": "misses"}[status]] += 1
+
+        return entry["result"], {
+            "generated_at": entry["generated_at"],
+            "age_seconds": round(age, 3),
+            "cache": status,
+        }
+
+    # -------------------------------------------------
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        settings = get_settings()
+        return {
+            **cls._stats,
+            "entries": len(cls._entries),
+            "refreshing": [
+                {"model_url": url, "probe_runs": runs, "sampling": sampling}
+                for url, runs, sampling in cls._refreshing
+            ],
+            "ttl_seconds": settings.analyze_cache_ttl_seconds,
+            "stale_seconds": settings.analyze_cache_stale_seconds,
+        }
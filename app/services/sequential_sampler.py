@@ -0,0 +1,91 @@
+import math
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from scipy.stats import norm, t
+
+from app.core.detection.anomaly_detector import AnomalyDetector
+from app.core.detection.drift_detector import DriftDetector
+from app.services.baseline_builder import BaselineBuilder
+from app.utils.config import get_settings
+
+
+class SequentialSampler:
+    """
+    Stopping rule for adaptive sample sizes.
+
+    After each probe batch, checks whether the estimates are settled:
+    - avg_confidence: t-interval half-width <= sequential_confidence_ci
+    - error_rate: Wilson interval half-width <= sequential_error_rate_ci,
+      or the whole interval on one side of the high_error_rate threshold
+      (the anomaly decision is already certain)
+    - drift (if a baseline exists): the KS p-value is clearly on one
+      side of the significance level, i.e. below alpha / margin or
+      above alpha * margin
+    """
+
+    # -------------------------------------------------
+    @classmethod
+    def assess(
+        cls,
+        predictions: List[Dict[str, Any]],
+        baseline: Optional[Dict[str, Any]],
+        significance_level: float = 0.05,
+    ) -> Dict[str, Any]:
+        settings = get_settings()
+        level = settings.sequential_ci_level
+        margin = settings.sequential_drift_margin
+
+        confidences = np.asarray(
+            [p.get("confidence", 0.0) for p in predictions], dtype=float
+        )
+        n = len(confidences)
+
+        if n >= 2:
+            conf_half = float(
+                t.ppf(0.5 + level / 2, n - 1) * confidences.std(ddof=1) / math.sqrt(n)
+            )
+        else:
+            conf_half = math.inf
+
+        err_settled = False
+        if n >= 1:
+            z = float(norm.ppf(0.5 + level / 2))
+            p = sum(1 for pred in predictions if BaselineBuilder.is_error(pred)) / n
+            err_center = (p + z * z / (2 * n)) / (1 + z * z / n)
+            err_half = (
+                z / (1 + z * z / n)
+                * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+            )
+            threshold = AnomalyDetector.HIGH_ERROR_RATE_THRESHOLD
+            err_settled = (
+                err_half <= settings.sequential_error_rate_ci
+                or err_center + err_half < threshold
+                or err_center - err_half > threshold
+            )
+        else:
+            err_half = math.inf
+
+        drift_p = None
+        drift_settled = True
+        if baseline is not None:
+            test = DriftDetector.confidence_test(baseline, {"confidence_scores": confidences})
+            if test is not None:
+                drift_p = test["p_value"]
+                drift_settled = (
+                    drift_p < significance_level / margin
+                    or drift_p > significance_level * margin
+                )
+            elif n <= 1:
+                drift_settled = False
+
+        return {
+            "confidence_ci_half_width": round(conf_half, 6) if n >= 2 else None,
+            "error_rate_ci_half_width": round(err_half, 6) if n >= 1 else None,
+            "drift_p_value": round(drift_p, 6) if drift_p is not None else None,
+            "settled": (
+                conf_half <= settings.sequential_confidence_ci
+                and err_settled
+                and drift_settled
+            ),
+        }
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -15,6 +16,119 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = Field(default="INFO")
 
+    # Probing
+    probe_max_connections: int = Field(default=100)
+    probe_concurrency_per_endpoint: int = Field(default=8)
+    payload_cache_ttl_seconds: int = Field(default=86400)
+    probe_batch_size: int = Field(default=8)
+    breaker_failure_threshold: int = Field(default=3)
+    breaker_cooldown_seconds: float = Field(default=30.0)
+    breaker_trial_timeout_seconds: float = Field(default=60.0)
+    adaptive_timeout_multiplier: float = Field(default=3.0)
+    adaptive_timeout_min_seconds: float = Field(default=1.0)
+    adaptive_timeout_max_seconds: float = Field(default=30.0)
+    adaptive_timeout_min_samples: int = Field(default=20)
+    probe_hedging_enabled: bool = Field(default=False)
+    probe_hedge_percentile: float = Field(default=95.0)
+    probe_hedge_max_ratio: float = Field(default=0.1)
+
+    # Response cache for deterministic probes (opt-in)
+    response_cache_enabled: bool = Field(default=False)
+    response_cache_ttl_seconds: float = Field(default=300.0)
+    response_cache_max_entries: int = Field(default=10000)
+    response_cache_verify_every: int = Field(default=10)
+
+    # Probe rate limits (requests/second; 0 = unlimited)
+    probe_rate_limit_per_endpoint: float = Field(default=10.0)
+    probe_burst_per_endpoint: float = Field(default=20.0)
+    probe_rate_limit_per_host: float = Field(default=50.0)
+    probe_burst_per_host: float = Field(default=100.0)
+    probe_rate_limit_mode: str = Field(default="queue")  # "queue" or "shed"
+    probe_rate_limit_max_wait_seconds: float = Field(default=5.0)
+    # Per model URL or host overrides, e.g. {"api.example.com": 2.0}
+    probe_rate_limits: Dict[str, float] = Field(default_factory=dict)
+
+    # Continuous monitoring scheduler
+    scheduler_enabled: bool = Field(default=True)
+    scheduler_default_interval_seconds: float = Field(default=60.0)
+    scheduler_max_concurrency: int = Field(default=4)
+    scheduler_jitter: float = Field(default=0.1)  # ± fraction of the interval
+    scheduler_tick_seconds: float = Field(default=1.0)
+    scheduler_probe_budget_per_minute: float = Field(default=600.0)
+
+    # Adaptive probe cadence
+    cadence_adaptive_enabled: bool = Field(default=True)
+    cadence_min_interval_seconds: float = Field(default=10.0)
+    cadence_backoff_factor: float = Field(default=2.0)
+    cadence_default_probe_runs: int = Field(default=5)
+    cadence_min_probe_runs: int = Field(default=3)
+    cadence_max_probe_runs: int = Field(default=20)
+    cadence_noisy_variation: float = Field(default=0.15)  # confidence std / mean
+
+    # Fleet batch investigation
+    fleet_max_concurrency: int = Field(default=16)
+    fleet_model_timeout_seconds: float = Field(default=120.0)
+    fleet_max_urls: int = Field(default=1000)
+
+    # Single-flight investigations (per-model coalescing counters)
+    coalesce_stats_max_models: int = Field(default=1000)
+
+    # /monitoring/analyze result cache (stale-while-revalidate; ttl 0 = off)
+    analyze_cache_ttl_seconds: float = Field(default=5.0)
+    analyze_cache_stale_seconds: float = Field(default=60.0)
+    analyze_cache_max_entries: int = Field(default=1000)
+
+    # Per-model detector state
+    detector_registry_max_models: int = Field(default=500)
+    anomaly_history_size: int = Field(default=200)
+    anomaly_min_fit_samples: int = Field(default=20)
+    anomaly_refit_every: int = Field(default=10)
+
+    # Investigation pipeline
+    investigation_allow_partial: bool = Field(default=True)
+    # Per-stage budgets in ms, e.g. {"probe": 8000, "drift": 50}
+    investigation_stage_budgets_ms: Dict[str, float] = Field(default_factory=dict)
+    # Share of a request deadline held back from probing for analysis
+    deadline_analysis_reserve_fraction: float = Field(default=0.1)
+    deadline_analysis_reserve_min_ms: float = Field(default=50.0)
+
+    # Sampling: "fixed" (probe_runs) or "sequential" (until settled)
+    sampling_mode: str = Field(default="fixed")
+    sequential_initial_batch_size: int = Field(default=3)
+    sequential_batch_size: int = Field(default=5)
+    sequential_max_samples: int = Field(default=50)
+    sequential_ci_level: float = Field(default=0.95)
+    sequential_confidence_ci: float = Field(default=0.02)  # ± on avg_confidence
+    sequential_error_rate_ci: float = Field(default=0.05)  # ± on error_rate
+    sequential_drift_margin: float = Field(default=4.0)  # KS p outside [a/m, a*m]
+
+    # Rolling per-model windows feeding drift / anomaly detection
+    rolling_window_enabled: bool = Field(default=True)
+    rolling_window_capacity: int = Field(default=1000)
+    rolling_window_samples: int = Field(default=200)
+    rolling_window_seconds: Optional[float] = Field(default=None)
+    rolling_registry_max_models: int = Field(default=1000)
+
+    # Mergeable quantile sketches stored in baselines
+    quantile_sketch_k: int = Field(default=200)
+
+    # Online change detection (CUSUM per model and signal)
+    change_detection_enabled: bool = Field(default=True)
+    change_warmup_samples: int = Field(default=30)
+    change_drift_allowance: float = Field(default=0.5)  # k, in std units
+    change_threshold: float = Field(default=5.0)  # h, in std units
+    change_alert_seconds: float = Field(default=900.0)
+    change_persist_interval_seconds: float = Field(default=10.0)
+    change_registry_max_models: int = Field(default=1000)
+
+    # Minute → hour → day aggregates for window-vs-window drift
+    aggregates_enabled: bool = Field(default=True)
+    aggregate_sketch_k: int = Field(default=32)
+    aggregate_minutes_retained: int = Field(default=120)
+    aggregate_hours_retained: int = Field(default=48)
+    aggregate_days_retained: int = Field(default=30)
+    aggregate_registry_max_models: int = Field(default=200)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
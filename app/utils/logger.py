@@ -15,4 +15,5 @@ def setup_logging(level: str = "INFO"):
     # Reduce noise from common libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.error").setLevel(logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
 
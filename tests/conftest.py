@@ -0,0 +1,18 @@
+import pytest
+
+from app.core.detection.change_detector import ChangeDetectorRegistry
+from app.core.storage.baseline_store import BaselineStore
+from app.core.storage.payload_cache_store import PayloadCacheStore
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """
+    Points the disk-backed stores at a temporary directory.
+    """
+    monkeypatch.setattr(PayloadCacheStore, "CACHE_FILE", tmp_path / "payload_cache.json")
+    monkeypatch.setattr(PayloadCacheStore, "_entries", {})
+    monkeypatch.setattr(PayloadCacheStore, "_mtime", 0.0)
+    monkeypatch.setattr(ChangeDetectorRegistry, "CHANGE_DIR", tmp_path / "change_detectors")
+    monkeypatch.setattr(BaselineStore, "BASE_DIR", tmp_path / "baselines")
+    return tmp_path
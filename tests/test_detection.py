@@ -0,0 +1,242 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from scipy.stats import ks_2samp, kstwobign, wasserstein_distance
+
+from app.core.detection.change_detector import Cusum
+from app.core.detection.feature_drift import FeatureDriftEngine, FeatureMatrix
+from app.core.detection.histogram_drift import HistogramDrift
+from app.core.metrics.quantile_sketch import QuantileSketch
+from app.utils.config import get_settings
+
+
+def _sketch(values, k: int = 200, seed: int = 0) -> QuantileSketch:
+    # Seeded compactions keep the error-bound assertions deterministic
+    sketch = QuantileSketch(k=k)
+    sketch._rng = random.Random(seed)
+    return sketch.update_many(values)
+
+
+def _ecdf(samples: np.ndarray, points: np.ndarray) -> np.ndarray:
+    return np.searchsorted(np.sort(samples), points, side="right") / samples.size
+
+
+# -------------------------------------------------
+# KLL quantile sketch
+# -------------------------------------------------
+def test_sketch_is_exact_before_first_compaction():
+    values = np.random.default_rng(0).normal(size=100)
+    sketch = QuantileSketch.of(values, k=200)
+
+    assert sketch.exact
+    assert sketch.rank_error == 0.0
+    assert sketch.quantile(0.5) == pytest.approx(np.sort(values)[49])
+    assert np.allclose(sketch.cdf(values), _ecdf(values, values))
+
+
+def test_sketch_cdf_stays_within_rank_error():
+    values = np.random.default_rng(1).lognormal(size=50_000)
+    sketch = _sketch(values)
+    points = np.quantile(values, np.linspace(0.01, 0.99, 99))
+
+    errors = np.abs(sketch.cdf(points) - _ecdf(values, points))
+
+    assert not sketch.exact
+    assert sketch.n == values.size
+    assert sketch.rank_error < 0.02
+    # rank_error is a ~95% bound per query, not a hard maximum
+    assert np.mean(errors <= sketch.rank_error) >= 0.85
+    assert errors.max() <= 1.5 * sketch.rank_error
+
+
+def test_sketch_merge_matches_sketch_of_union():
+    rng = np.random.default_rng(2)
+    a_values, b_values = rng.normal(size=20_000), rng.normal(1.0, 2.0, size=30_000)
+    union = np.concatenate([a_values, b_values])
+
+    merged = _sketch(a_values, seed=1).merge(_sketch(b_values, seed=2))
+    points = np.quantile(union, np.linspace(0.01, 0.99, 99))
+
+    assert merged.n == union.size
+    assert merged.error_var > 0
+    assert np.abs(merged.cdf(points) - _ecdf(union, points)).max() <= 1.5 * merged.rank_error
+
+
+def test_sketch_round_trips_through_dict():
+    sketch = _sketch(np.random.default_rng(3).uniform(size=5_000), k=64)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+
+    assert restored.n == sketch.n
+    assert restored.rank_error == sketch.rank_error
+    assert restored.quantile(0.9) == sketch.quantile(0.9)
+
+
+def test_sketch_ks_statistic_matches_exact_ks():
+    rng = np.random.default_rng(4)
+    a_values, b_values = rng.normal(size=20_000), rng.normal(0.1, 1.0, size=20_000)
+    a, b = _sketch(a_values, seed=1), _sketch(b_values, seed=2)
+
+    exact = ks_2samp(a_values, b_values).statistic
+
+    assert QuantileSketch.ks_statistic(a, b) == pytest.approx(
+        exact, abs=a.rank_error + b.rank_error
+    )
+    assert QuantileSketch.ks_statistic(a, a) == 0.0
+
+
+# -------------------------------------------------
+# Vectorised feature drift
+# -------------------------------------------------
+def test_feature_ks_and_wasserstein_match_scipy():
+    rng = np.random.default_rng(5)
+    baseline = {
+        "normal": rng.normal(size=300),
+        "shifted": rng.normal(size=300),
+        "ties": rng.integers(0, 5, size=300),
+        "short": rng.uniform(size=40),
+    }
+    current = {
+        "normal": rng.normal(size=250),
+        "shifted": rng.normal(0.5, 1.0, size=250),
+        "ties": rng.integers(1, 6, size=120),
+        "short": rng.uniform(0.2, 1.2, size=250),
+    }
+    base, curr = FeatureMatrix.from_features(baseline), FeatureMatrix.from_features(current)
+
+    stats = FeatureDriftEngine._distribution_stats(base.matrix, curr.matrix)
+
+    for i, name in enumerate(baseline):
+        # The matrix holds float32 — compare against scipy on the same values
+        b = np.asarray(baseline[name], dtype=np.float32).astype(float)
+        c = np.asarray(current[name], dtype=np.float32).astype(float)
+        ks = ks_2samp(b, c).statistic
+        effective_n = b.size * c.size / (b.size + c.size)
+
+        assert stats["ks_statistic"][i] == pytest.approx(ks, abs=1e-9), name
+        assert stats["wasserstein"][i] == pytest.approx(wasserstein_distance(b, c), rel=1e-5), name
+        assert stats["ks_p_value"][i] == pytest.approx(kstwobign.sf(ks * math.sqrt(effective_n))), name
+
+
+def test_feature_drift_flags_and_ranks_shifted_features():
+    rng = np.random.default_rng(6)
+    baseline = {f"f{i}": rng.normal(10.0, 1.0, size=200) for i in range(20)}
+    current = {f"f{i}": rng.normal(10.0, 1.0, size=200) for i in range(20)}
+    current["f3"] = rng.normal(11.0, 1.0, size=200)
+    current["f7"] = rng.normal(14.0, 1.0, size=200)
+
+    drifted = FeatureDriftEngine.compare(
+        baseline, current, mean_shift_threshold=0.2, significance_level=1e-4
+    )
+
+    assert [d["feature"] for d in drifted] == ["f7", "f3"]
+    assert drifted[0]["drift_score"] > 0.2
+    assert drifted[1]["drift_score"] < 0.2 and drifted[1]["ks_p_value"] < 1e-4
+
+
+# -------------------------------------------------
+# PSI / Jensen-Shannon binning
+# -------------------------------------------------
+def test_histogram_reference_uses_baseline_deciles():
+    values = np.random.default_rng(7).uniform(size=100)
+    reference = HistogramDrift.reference(QuantileSketch.of(values))
+
+    assert len(reference["edges"]) == HistogramDrift.BINS - 1
+    assert np.allclose(reference["frequencies"], 0.1)
+    assert sum(reference["frequencies"]) == pytest.approx(1.0)
+
+
+def test_histogram_drift_is_near_zero_for_same_distribution():
+    rng = np.random.default_rng(8)
+    reference = HistogramDrift.reference(_sketch(rng.beta(5, 2, size=20_000)))
+
+    result = HistogramDrift.compare(reference, rng.beta(5, 2, size=20_000))
+
+    assert result["psi"] < 0.01
+    assert result["js_divergence"] < 0.005
+    assert result["samples"] == 20_000
+
+
+def test_histogram_psi_and_js_match_hand_computation():
+    reference = {"edges": [0.5], "frequencies": [0.5, 0.5]}
+
+    # A value on an edge belongs to the lower bin
+    result = HistogramDrift.compare(reference, [0.1, 0.5, 0.5, 0.9])
+
+    expected, actual = np.array([0.5, 0.5]), np.array([0.75, 0.25])
+    psi = np.sum((actual - expected) * np.log(actual / expected))
+    mixture = (expected + actual) / 2
+    js = 0.5 * (
+        np.sum(expected * np.log2(expected / mixture))
+        + np.sum(actual * np.log2(actual / mixture))
+    )
+
+    assert result["psi"] == pytest.approx(psi, abs=1e-6)
+    assert result["js_divergence"] == pytest.approx(js, abs=1e-6)
+
+
+def test_histogram_empty_bins_are_floored_for_psi_only():
+    reference = {"edges": [0.5], "frequencies": [0.5, 0.5]}
+
+    result = HistogramDrift.compare(reference, [0.1, 0.2, 0.3])
+
+    floor = HistogramDrift.EPSILON
+    psi = 0.5 * math.log(1.0 / 0.5) + (floor - 0.5) * math.log(floor / 0.5)
+    assert result["psi"] == pytest.approx(psi, abs=1e-6)
+    # JS needs no floor: the mixture is non-zero wherever either side is
+    js = 0.5 * (0.5 * math.log2(0.5 / 0.75) + 0.5 * math.log2(0.5 / 0.25) + math.log2(1.0 / 0.75))
+    assert result["js_divergence"] == pytest.approx(js, abs=1e-6)
+    assert HistogramDrift.compare(reference, [float("nan")]) is None
+
+
+# -------------------------------------------------
+# CUSUM change points
+# -------------------------------------------------
+def _warm_cusum(level: float = 0.8) -> Cusum:
+    detector = Cusum("confidence")
+    for t in range(get_settings().change_warmup_samples):
+        assert detector.update(level + (0.01 if t % 2 else -0.01), t) is None
+    return detector
+
+
+def test_cusum_stays_quiet_on_stationary_signal():
+    detector = _warm_cusum()
+    rng = np.random.default_rng(9)
+
+    alarms = [
+        detector.update(0.8 + rng.normal(0, 0.01), 100 + t) for t in range(1_000)
+    ]
+
+    assert not any(alarms)
+
+
+def test_cusum_ignores_single_outlier():
+    detector = _warm_cusum()
+
+    assert detector.update(0.0, 100) is None
+    assert all(detector.update(0.8, 101 + t) is None for t in range(50))
+    assert detector.down == 0.0
+
+
+def test_cusum_alarms_and_dates_level_shift():
+    detector = _warm_cusum()
+    for t in range(100, 120):
+        assert detector.update(0.8, t) is None
+
+    change = None
+    t = 120
+    while change is None and t < 200:
+        change = detector.update(0.7, t)
+        t += 1
+
+    assert change is not None
+    assert change["direction"] == "decrease"
+    assert change["estimated_change_at"] == 120
+    assert change["detected_at"] == t - 1
+    assert change["reference_mean"] == pytest.approx(0.8)
+    assert change["statistic"] > get_settings().change_threshold
+
+    # The detector restarts and re-learns the new level
+    assert detector.count == 0
+    assert detector.last_change is change
@@ -0,0 +1,910 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import pytest
+import requests
+
+from app.core.detection.change_detector import ChangeDetectorRegistry
+from app.core.metrics.rolling_window import RollingMetricsRegistry
+from app.core.metrics.time_aggregates import TimeAggregates, TimeAggregateRegistry
+from app.core.probing.async_probe_engine import AsyncProbeEngine
+from app.core.probing.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from app.core.probing.hedging import HedgePolicy
+from app.core.probing.latency_tracker import LatencyTracker
+from app.core.probing.rate_limiter import ProbeRateLimiter
+from app.core.probing.response_cache import ResponseCache
+from app.core.probing.response_extractor import ResponseExtractor, ExtractionError
+from app.core.probing.universal_model_caller import UniversalModelCaller, COMMON_PAYLOADS
+from app.services.cadence_policy import CadencePolicy
+from app.services.investigation_pipeline import Stage, StagePipeline
+from app.services.investigation_service import InvestigationService
+from app.services.monitoring_scheduler import MonitoringScheduler
+from app.services.result_cache import AnalysisResultCache
+from app.utils.config import get_settings
+
+
+def _open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def _expire_cooldown(breaker: CircuitBreaker) -> None:
+    breaker.opened_at = time.monotonic() - breaker.cooldown_seconds
+
+
+# -------------------------------------------------
+# Circuit breaker state transitions
+# -------------------------------------------------
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure(timed_out=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.rejecting()
+    assert not breaker.allow()
+    assert breaker.snapshot()["consecutive_timeouts"] == 1
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    _open_breaker(breaker)
+    _expire_cooldown(breaker)
+
+    assert not breaker.rejecting()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_trial_success_closes():
+    breaker = CircuitBreaker(failure_threshold=1)
+    _open_breaker(breaker)
+    _expire_cooldown(breaker)
+    breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_trial_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=3)
+    _open_breaker(breaker)
+    _expire_cooldown(breaker)
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.rejecting()
+
+
+def test_breaker_late_success_does_not_close_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1)
+    _open_breaker(breaker)
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_abandoned_trial_frees_slot():
+    breaker = CircuitBreaker(failure_threshold=1)
+    _open_breaker(breaker)
+    _expire_cooldown(breaker)
+    assert breaker.allow()
+
+    breaker.abandon()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_breaker_stale_trial_times_out():
+    breaker = CircuitBreaker(failure_threshold=1, trial_timeout_seconds=5)
+    _open_breaker(breaker)
+    _expire_cooldown(breaker)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker._trial_started = time.monotonic() - 5
+
+    assert breaker.allow()
+
+
+def test_cancelled_trial_call_does_not_blacklist_endpoint():
+    model_url = f"http://breaker-{uuid.uuid4().hex}.test/predict"
+    stall = {"on": True}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if stall["on"]:
+            await asyncio.sleep(10)
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    async def scenario():
+        breaker = CircuitBreakerRegistry.get(model_url)
+        _open_breaker(breaker)
+        _expire_cooldown(breaker)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            trial = asyncio.create_task(
+                UniversalModelCaller.acall(client, model_url, {"text": "x"})
+            )
+            await asyncio.sleep(0.05)
+            trial.cancel()
+            try:
+                await trial
+            except asyncio.CancelledError:
+                pass
+
+            stall["on"] = False
+            return await UniversalModelCaller.acall(client, model_url, {"text": "x"})
+
+    result = asyncio.run(scenario())
+
+    assert not result.get("circuit_open")
+    assert result["prediction"] == "positive"
+    assert CircuitBreakerRegistry.get(model_url).state == CircuitBreaker.CLOSED
+
+
+def test_payload_detection_is_the_half_open_trial(stores, monkeypatch):
+    model_url = f"http://dead-{uuid.uuid4().hex}.test/predict"
+    sent = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        raise httpx.ConnectError("refused", request=request)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(AsyncProbeEngine, "_client", client)
+            breaker = CircuitBreakerRegistry.get(model_url)
+            _open_breaker(breaker)
+            _expire_cooldown(breaker)
+
+            first = await AsyncProbeEngine.probe(model_url, probe_runs=5)
+            detection_requests = len(sent)
+            rejected = await AsyncProbeEngine.probe(model_url, probe_runs=5)
+            assert len(sent) == detection_requests
+
+            # The failed race is remembered: the next trial is one request
+            _expire_cooldown(breaker)
+            await AsyncProbeEngine.probe(model_url, probe_runs=5)
+            return first, rejected, detection_requests, breaker
+
+    first, rejected, detection_requests, breaker = asyncio.run(scenario())
+
+    assert detection_requests == len(COMMON_PAYLOADS)
+    assert all(r.get("circuit_open") for r in first + rejected)
+    assert len(sent) == detection_requests + 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+# -------------------------------------------------
+# Rate limiting
+# -------------------------------------------------
+class _FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return {"prediction": "positive", "confidence": 0.9}
+
+
+def _count_sync_posts(monkeypatch) -> List[str]:
+    sent = []
+
+    def post(url, **kwargs):
+        sent.append(url)
+        return _FakeResponse()
+
+    monkeypatch.setattr(requests, "post", post)
+    return sent
+
+
+def test_sync_call_takes_a_rate_limit_token(monkeypatch):
+    sent = _count_sync_posts(monkeypatch)
+    model_url = f"http://sync-{uuid.uuid4().hex}.test/predict"
+    ProbeRateLimiter.configure(model_url, rate=0.01, burst=1)
+
+    first = UniversalModelCaller.call(model_url, {"text": "x"})
+    second = UniversalModelCaller.call(model_url, {"text": "x"})
+
+    assert first["prediction"] == "positive"
+    assert second.get("throttled")
+    assert len(sent) == 1
+
+
+def test_sync_payload_detection_takes_rate_limit_tokens(stores, monkeypatch):
+    sent = _count_sync_posts(monkeypatch)
+    model_url = f"http://sync-detect-{uuid.uuid4().hex}.test/predict"
+    ProbeRateLimiter.configure(model_url, rate=0.01, burst=1)
+    ProbeRateLimiter.try_acquire(model_url)
+
+    UniversalModelCaller._detect_payload(model_url)
+
+    assert sent == []
+
+
+# -------------------------------------------------
+# Latency tracking
+# -------------------------------------------------
+def test_timed_out_requests_do_not_feed_latency_histogram():
+    model_url = f"http://latency-{uuid.uuid4().hex}.test/predict"
+    timeouts = {"on": True}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if timeouts["on"]:
+            raise httpx.ReadTimeout("stalled", request=request)
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            failed = await UniversalModelCaller.acall(client, model_url, {"text": "x"})
+            timeouts["on"] = False
+            answered = await UniversalModelCaller.acall(client, model_url, {"text": "x"})
+            return failed, answered
+
+    failed, answered = asyncio.run(scenario())
+
+    assert "error" in failed
+    assert answered["prediction"] == "positive"
+    assert LatencyTracker.histogram(model_url).samples == 1
+
+
+# -------------------------------------------------
+# Response extraction
+# -------------------------------------------------
+def test_extractor_keeps_falsy_prediction_key():
+    extractor = ResponseExtractor.learn({"prediction": 0, "confidence": 0.8})
+
+    assert extractor.prediction_key == "prediction"
+    assert extractor.extract({"prediction": 0, "confidence": 0.8})["prediction"] == 0
+    assert extractor.extract({"prediction": 1, "confidence": 0.6})["prediction"] == 1
+
+
+def test_extractor_rejects_unlearned_prediction_key():
+    extractor = ResponseExtractor.learn({"confidence": 0.8})
+    assert extractor.prediction_key is None
+
+    with pytest.raises(ExtractionError):
+        extractor.extract({"label": "positive", "confidence": 0.8})
+
+
+# -------------------------------------------------
+# Streaming accumulators
+# -------------------------------------------------
+def test_cached_and_refused_records_stay_out_of_streams(stores):
+    model_url = f"http://streams-{uuid.uuid4().hex}.test/predict"
+    ctx = {
+        "model_url": model_url,
+        "predictions": [
+            {"prediction": "positive", "confidence": 0.9, "latency_ms": 12.0},
+            {"prediction": "positive", "confidence": 0.9, "latency_ms": 12.0, "cached": True},
+            UniversalModelCaller.circuit_open_result(model_url),
+        ],
+    }
+
+    InvestigationService._metrics(ctx)
+
+    assert RollingMetricsRegistry.snapshot(model_url)["buffered"] == 1
+    assert TimeAggregateRegistry.window(model_url, 60).signals["confidence"].count == 1
+    assert ChangeDetectorRegistry._get(model_url)["confidence"].count == 1
+
+
+# -------------------------------------------------
+# Time aggregates
+# -------------------------------------------------
+def test_minute_window_includes_last_closed_minute():
+    aggregates = TimeAggregates()
+    start = 1_700_000_000 - 1_700_000_000 % 3600
+
+    for ts in (start + 5, start + 30, start + 61, start + 125):
+        aggregates.record({"confidence": 0.9, "error": 0.0, "latency_ms": None}, ts)
+
+    # Just after the 3rd minute opened: last full minute + the open one
+    window = aggregates.window(60, now=start + 126)
+    assert window.signals["confidence"].count == 2
+
+    hour = aggregates.window(3600, now=start + 126)
+    assert hour.signals["confidence"].count == 4
+
+
+def test_window_skips_buckets_older_than_span():
+    aggregates = TimeAggregates()
+    start = 1_700_000_000 - 1_700_000_000 % 3600
+
+    aggregates.record({"confidence": 0.5, "error": 0.0, "latency_ms": None}, start)
+    aggregates.record({"confidence": 0.9, "error": 0.0, "latency_ms": None}, start + 600)
+
+    window = aggregates.window(60, now=start + 601)
+    assert window.signals["confidence"].count == 1
+    assert window.signals["confidence"].mean == 0.9
+
+
+# -------------------------------------------------
+# Response cache
+# -------------------------------------------------
+def _probe_with_cache(monkeypatch, handler, model_url: str, rounds: int) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    # (requests sent, records) per probe round
+    sent = []
+
+    async def counting(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return await handler(request)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(counting)) as client:
+            monkeypatch.setattr(AsyncProbeEngine, "_client", client)
+            results = []
+            for _ in range(rounds):
+                before = len(sent)
+                records = await AsyncProbeEngine.probe(
+                    model_url, probe_runs=4, batch_size=1, use_cache=True
+                )
+                results.append((len(sent) - before, records))
+            return results
+
+    return asyncio.run(scenario())
+
+
+def test_deterministic_endpoint_is_served_from_cache(stores, monkeypatch):
+    model_url = f"http://fixed-{uuid.uuid4().hex}.test/predict"
+    ResponseCache.reset(model_url)
+    monkeypatch.setattr(get_settings(), "response_cache_verify_every", 6)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    rounds = _probe_with_cache(monkeypatch, handler, model_url, rounds=2)
+    (_, first), (sent, second) = rounds
+    stats = ResponseCache.snapshot_all()[model_url]
+
+    assert not any(r.get("cached") for r in first)
+    # Lookup 6 of 8 is a verification miss and goes to the model
+    assert sent == 1
+    assert [bool(r.get("cached")) for r in second].count(True) == stats["hits"] == 3
+    assert stats["deterministic"]
+    assert {r["prediction"] for r in second} == {"positive"}
+
+
+def test_changing_answers_turn_the_cache_off(stores, monkeypatch):
+    model_url = f"http://sampled-{uuid.uuid4().hex}.test/predict"
+    ResponseCache.reset(model_url)
+    monkeypatch.setattr(get_settings(), "response_cache_verify_every", 1)
+    answers = iter(range(1000))
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"prediction": "positive", "confidence": next(answers) / 1000})
+
+    rounds = _probe_with_cache(monkeypatch, handler, model_url, rounds=3)
+    stats = ResponseCache.snapshot_all()[model_url]
+
+    assert not stats["deterministic"]
+    assert stats["mismatches"] == 1
+    assert stats["entries"] == 0
+    assert not any(r.get("cached") for _, records in rounds for r in records)
+    # Once off, the endpoint is no longer looked up: every probe is sent
+    assert stats["lookups"] == 4
+    assert rounds[2][0] == 4
+
+
+# -------------------------------------------------
+# Hedged requests
+# -------------------------------------------------
+def test_cancelled_hedged_call_cancels_primary(monkeypatch):
+    model_url = f"http://hedge-{uuid.uuid4().hex}.test/predict"
+    monkeypatch.setattr(HedgePolicy, "delay_for", classmethod(lambda cls, url: 5.0))
+    primary = {"cancelled": False}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary["cancelled"] = True
+            raise
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            call = asyncio.create_task(
+                UniversalModelCaller._asend_hedged(client, model_url, "rest", {"text": "x"})
+            )
+            await asyncio.sleep(0.05)
+            call.cancel()
+            try:
+                await call
+            except asyncio.CancelledError:
+                pass
+            await asyncio.sleep(0.05)
+            return primary["cancelled"]
+
+    assert asyncio.run(scenario())
+
+
+# -------------------------------------------------
+# Batched requests
+# -------------------------------------------------
+def test_batch_round_trip_is_not_a_per_item_latency():
+    model_url = f"http://batch-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[
+            {"label": "positive", "score": 0.9},
+            {"label": "negative", "score": 0.7},
+        ])
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await UniversalModelCaller.acall_batch(client, model_url, "inputs", ["a", "b"])
+
+    results = asyncio.run(scenario())
+
+    assert [r["prediction"] for r in results] == ["positive", "negative"]
+    assert all("latency_ms" not in r and r["batch_size"] == 2 for r in results)
+    assert LatencyTracker.histogram(model_url).samples == 0
+
+
+def test_top_k_rows_are_not_mistaken_for_a_batch(stores):
+    model_url = f"http://top-k-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[
+            {"label": "pos", "score": 0.7},
+            {"label": "neu", "score": 0.2},
+            {"label": "neg", "score": 0.1},
+        ])
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await UniversalModelCaller.adetect_batch_key(client, model_url)
+
+    assert asyncio.run(scenario()) is None
+    assert UniversalModelCaller.batch_key_known(model_url)
+
+
+def test_batch_key_detected_when_answers_track_input_count(stores):
+    model_url = f"http://batch-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        inputs = json.loads(request.content).get("inputs")
+        if not isinstance(inputs, list):
+            return httpx.Response(422)
+        return httpx.Response(200, json=[{"label": "pos", "score": 0.7} for _ in inputs])
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await UniversalModelCaller.adetect_batch_key(client, model_url)
+
+    assert asyncio.run(scenario()) == "inputs"
+
+
+# -------------------------------------------------
+# Investigation probes
+# -------------------------------------------------
+def test_probes_carry_generated_inputs_in_detected_format(stores, monkeypatch):
+    model_url = f"http://inputs-{uuid.uuid4().hex}.test/predict"
+    bodies = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if set(body) != {"inputs"} or isinstance(body["inputs"], list):
+            return httpx.Response(422)
+        bodies.append(body)
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(AsyncProbeEngine, "_client", client)
+            ctx = {
+                "model_url": model_url,
+                "probe_runs": 5,
+                "probe_deadline": None,
+                "sampling": "fixed",
+            }
+            await InvestigationService._probe(ctx)
+            return ctx
+
+    ctx = asyncio.run(scenario())
+
+    # First body is the format-detection request
+    probes = [body["inputs"] for body in bodies[1:]]
+    assert len(ctx["predictions"]) == 5
+    assert sorted(probes) == sorted(ctx["probe_inputs"][:5])
+    assert len(set(probes)) == 5
+
+
+# -------------------------------------------------
+# Investigation pipeline
+# -------------------------------------------------
+def test_skip_if_reason_skips_stage_and_its_dependents():
+    ran = []
+    pipeline = StagePipeline([
+        Stage("probe", lambda ctx: ran.append("probe")),
+        Stage("baseline", lambda ctx: ran.append("baseline"), requires=("probe",),
+              skip_if=lambda ctx: "no successful predictions"),
+        Stage("drift", lambda ctx: ran.append("drift"), requires=("baseline",)),
+        Stage("anomaly", lambda ctx: ran.append("anomaly"), requires=("probe",),
+              skip_if=lambda ctx: None),
+    ])
+
+    report = asyncio.run(pipeline.run({}))
+
+    assert ran == ["probe", "anomaly"]
+    assert report["baseline"] == {
+        "status": "skipped", "reason": "no successful predictions", "duration_ms": 0.0,
+    }
+    assert report["drift"]["reason"] == "baseline skipped"
+    assert report["anomaly"]["status"] == "ok"
+
+
+def _investigate(monkeypatch, handler, **kwargs) -> Dict[str, Any]:
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(AsyncProbeEngine, "_client", client)
+            return await InvestigationService().investigate(**kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_first_run_skips_drift_until_a_baseline_exists(stores, monkeypatch):
+    model_url = f"http://first-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    first = _investigate(monkeypatch, handler, model_url=model_url, sampling="fixed")
+    second = _investigate(monkeypatch, handler, model_url=model_url, sampling="fixed")
+
+    assert first["stages"]["baseline"]["status"] == "ok"
+    for stage in ("drift", "metric_checks"):
+        assert first["stages"][stage] == {
+            "status": "skipped", "reason": "baseline recorded on this run", "duration_ms": 0.0,
+        }
+        assert second["stages"][stage]["status"] == "ok"
+    assert not first["partial"]
+
+
+def test_unanswered_probes_skip_the_baseline(stores, monkeypatch):
+    model_url = f"http://down-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    result = _investigate(monkeypatch, handler, model_url=model_url, sampling="fixed")
+
+    assert result["stages"]["baseline"]["reason"] == "no successful predictions"
+    assert result["stages"]["drift"]["reason"] == "baseline skipped"
+    assert not result["baseline_exists"]
+
+
+def test_deadline_returns_partial_result_in_time(stores, monkeypatch):
+    model_url = f"http://slow-{uuid.uuid4().hex}.test/predict"
+    answered = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if set(body) != {"inputs"} or isinstance(body["inputs"], list):
+            return httpx.Response(422)
+        answered.append(body)
+        # After format detection, every other probe hangs
+        if len(answered) > 1 and len(answered) % 2 == 0:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    started = time.monotonic()
+    result = _investigate(
+        monkeypatch, handler,
+        model_url=model_url, probe_runs=6, deadline_ms=500, sampling="fixed",
+    )
+    elapsed = time.monotonic() - started
+
+    completeness = result["completeness"]
+    assert elapsed < 0.5
+    # Measured from the start of the run, just after the request began
+    assert 450 < completeness["deadline_ms"] <= 500
+    assert completeness["deadline_met"]
+    assert (completeness["probes_requested"], completeness["probes_cancelled"]) == (6, 3)
+    assert result["samples_collected"] == 3
+    assert completeness["degraded"]["metrics"] == "based on 3/6 probes"
+    assert "probe" in completeness["complete"]
+    assert not result["partial"]
+
+
+# -------------------------------------------------
+# Sequential sampling
+# -------------------------------------------------
+def _probe_deterministic_model(monkeypatch, sampling: str, probe_runs: int) -> Dict[str, Any]:
+    model_url = f"http://steady-{uuid.uuid4().hex}.test/predict"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"prediction": "positive", "confidence": 0.9})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(AsyncProbeEngine, "_client", client)
+            ctx = {
+                "model_url": model_url,
+                "probe_runs": probe_runs,
+                "probe_deadline": None,
+                "sampling": sampling,
+            }
+            await InvestigationService._probe(ctx)
+            return ctx
+
+    return asyncio.run(scenario())
+
+
+def test_sequential_sampling_settles_before_fixed_run(stores, monkeypatch):
+    fixed = _probe_deterministic_model(monkeypatch, "fixed", probe_runs=20)
+    sequential = _probe_deterministic_model(monkeypatch, "sequential", probe_runs=20)
+
+    assert fixed["probes_sent"] == 20
+    assert sequential["sampling_report"]["stopped"] == "settled"
+    assert sequential["probes_sent"] < fixed["probes_sent"]
+    assert sequential["sampling_report"]["batches"] > 1
+
+
+# -------------------------------------------------
+# Result cache
+# -------------------------------------------------
+def _fake_investigations(monkeypatch) -> List[Tuple[str, int, Optional[str]]]:
+    calls = []
+
+    async def investigate(self, model_url, probe_runs=5, deadline_ms=None, sampling=None):
+        calls.append((model_url, probe_runs, sampling))
+        return {"probe_runs": probe_runs, "sampling": sampling, "completeness": {"degraded": False}}
+
+    monkeypatch.setattr(InvestigationService, "investigate", investigate)
+    return calls
+
+
+def test_result_cache_separates_probe_runs_and_sampling(monkeypatch):
+    calls = _fake_investigations(monkeypatch)
+    model_url = f"http://cached-{uuid.uuid4().hex}.test/predict"
+
+    # A scheduled 12-probe run must not answer a default /analyze
+    AnalysisResultCache.put(model_url, {"probe_runs": 12}, probe_runs=12)
+
+    async def scenario():
+        fixed, fixed_meta = await AnalysisResultCache.get(model_url, 5, sampling="fixed")
+        sequential, seq_meta = await AnalysisResultCache.get(model_url, 5, sampling="sequential")
+        again, again_meta = await AnalysisResultCache.get(model_url, 5, sampling="fixed")
+        scheduled, scheduled_meta = await AnalysisResultCache.get(model_url, 12)
+        return fixed_meta, seq_meta, again_meta, scheduled_meta, sequential
+
+    fixed_meta, seq_meta, again_meta, scheduled_meta, sequential = asyncio.run(scenario())
+
+    assert (fixed_meta["cache"], seq_meta["cache"]) == ("miss", "miss")
+    assert sequential["sampling"] == "sequential"
+    assert again_meta["cache"] == "hit"
+    assert scheduled_meta["cache"] == "hit"
+    assert calls == [(model_url, 5, "fixed"), (model_url, 5, "sequential")]
+
+
+def test_stale_refresh_keeps_sampling(monkeypatch):
+    calls = _fake_investigations(monkeypatch)
+    model_url = f"http://stale-{uuid.uuid4().hex}.test/predict"
+    entry = AnalysisResultCache.put(model_url, {}, probe_runs=5, sampling="sequential")
+    entry["stored"] -= get_settings().analyze_cache_ttl_seconds + 1
+
+    async def scenario():
+        _, meta = await AnalysisResultCache.get(model_url, 5, sampling="sequential")
+        await asyncio.gather(*AnalysisResultCache._refreshing.values())
+        return meta
+
+    assert asyncio.run(scenario())["cache"] == "stale"
+    assert calls == [(model_url, 5, "sequential")]
+
+
+# -------------------------------------------------
+# Single-flight investigations
+# -------------------------------------------------
+def _slow_investigations(monkeypatch) -> Dict[str, Any]:
+    runs = {"started": 0, "cancelled": 0}
+
+    async def _investigate(self, model_url, probe_runs, deadline=None, sampling="fixed"):
+        runs["started"] += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            runs["cancelled"] += 1
+            raise
+        return {"model_url": model_url, "run": runs["started"]}
+
+    monkeypatch.setattr(InvestigationService, "_investigate", _investigate)
+    return runs
+
+
+def test_concurrent_investigations_share_one_run(monkeypatch):
+    runs = _slow_investigations(monkeypatch)
+    model_url = f"http://shared-{uuid.uuid4().hex}.test/predict"
+    service = InvestigationService()
+
+    async def scenario():
+        return await asyncio.gather(
+            *(service.investigate(model_url, sampling="fixed") for _ in range(5))
+        )
+
+    results = asyncio.run(scenario())
+
+    assert runs["started"] == 1
+    assert all(result is results[0] for result in results)
+    stats = InvestigationService.coalescing_stats()[model_url]
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 4, False)
+
+
+def test_cancelled_waiter_leaves_shared_run_to_the_others(monkeypatch):
+    runs = _slow_investigations(monkeypatch)
+    model_url = f"http://shared-{uuid.uuid4().hex}.test/predict"
+    service = InvestigationService()
+
+    async def scenario():
+        leaver = asyncio.create_task(service.investigate(model_url, sampling="fixed"))
+        stayer = asyncio.create_task(service.investigate(model_url, sampling="fixed"))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    result = asyncio.run(scenario())
+
+    assert result["model_url"] == model_url
+    assert (runs["started"], runs["cancelled"]) == (1, 0)
+
+
+def test_last_waiter_cancelling_cancels_shared_run(monkeypatch):
+    runs = _slow_investigations(monkeypatch)
+    model_url = f"http://shared-{uuid.uuid4().hex}.test/predict"
+
+    async def scenario():
+        waiter = asyncio.create_task(InvestigationService().investigate(model_url, sampling="fixed"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return dict(InvestigationService._inflight)
+
+    inflight = asyncio.run(scenario())
+
+    assert runs["cancelled"] == 1
+    assert not any(key[0] == model_url for key in inflight)
+
+
+def test_coalescing_stats_keep_recent_models_only(monkeypatch):
+    _slow_investigations(monkeypatch)
+    monkeypatch.setattr(get_settings(), "coalesce_stats_max_models", 2)
+    monkeypatch.setattr(InvestigationService, "_coalesce_stats", OrderedDict())
+    urls = [f"http://model-{i}-{uuid.uuid4().hex}.test/predict" for i in range(3)]
+    service = InvestigationService()
+
+    async def scenario():
+        for url in urls:
+            await service.investigate(url, sampling="fixed")
+
+    asyncio.run(scenario())
+
+    assert list(InvestigationService.coalescing_stats()) == urls[1:]
+
+
+# -------------------------------------------------
+# Probe cadence
+# -------------------------------------------------
+def _healthy(confidence_std: float = 0.01) -> Dict[str, Any]:
+    return {
+        "current_metrics": {"avg_confidence": 0.9, "confidence_std": confidence_std},
+        "anomalies": [],
+        "drift": {},
+        "partial": False,
+    }
+
+
+def test_cadence_escalates_at_once_and_backs_off_gradually():
+    cadence = CadencePolicy.initial(60.0)
+
+    escalated = CadencePolicy.next(cadence, {**_healthy(), "anomalies": ["latency_spike"]})
+    assert escalated["state"] == "escalated"
+    assert escalated["interval_seconds"] == get_settings().cadence_min_interval_seconds
+    assert escalated["probe_runs"] == get_settings().cadence_max_probe_runs
+
+    steps = [escalated]
+    for _ in range(3):
+        steps.append(CadencePolicy.next(steps[-1], _healthy()))
+
+    # Back-off stops at the registered interval
+    assert [c["interval_seconds"] for c in steps] == [10.0, 20.0, 40.0, 60.0]
+    assert [c["probe_runs"] for c in steps] == [20, 10, 5, 3]
+    assert CadencePolicy.next(steps[-1], None)["reason"] == "investigation failed"
+
+
+def test_healthy_model_never_backs_off_past_registered_interval():
+    cadence = CadencePolicy.initial(45.0)
+    for _ in range(20):
+        cadence = CadencePolicy.next(cadence, _healthy())
+
+    assert cadence["state"] == "stable"
+    assert cadence["interval_seconds"] == 45.0
+    # Escalation never slows a model registered below the minimum interval
+    fast = CadencePolicy.next(CadencePolicy.initial(5.0), None)
+    assert fast["interval_seconds"] == 5.0
+
+
+def test_noisy_model_keeps_interval_and_adds_probes():
+    cadence = CadencePolicy.next(CadencePolicy.initial(60.0), _healthy(confidence_std=0.3))
+
+    assert cadence["state"] == "noisy"
+    assert (cadence["interval_seconds"], cadence["probe_runs"]) == (60.0, 8)
+
+
+def test_fleet_over_budget_stretches_every_interval(monkeypatch):
+    monkeypatch.setattr(get_settings(), "scheduler_probe_budget_per_minute", 180.0)
+    escalated = {"interval_seconds": 10.0, "probe_runs": 20}
+
+    over = CadencePolicy.stretch([escalated] * 3)
+    under = CadencePolicy.stretch([escalated])
+
+    assert over["demand_probes_per_minute"] == 360.0
+    assert over["stretch_factor"] == 2.0
+    assert under["stretch_factor"] == 1.0
+
+
+def test_scheduler_applies_budget_stretch_to_escalated_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(MonitoringScheduler, "REGISTRY_FILE", tmp_path / "models.json")
+    monkeypatch.setattr(MonitoringScheduler, "_models", {})
+    monkeypatch.setattr(get_settings(), "scheduler_probe_budget_per_minute", 180.0)
+    urls = [f"http://fleet-{i}.test/predict" for i in range(3)]
+    for url in urls:
+        MonitoringScheduler.register(url, interval_seconds=60.0)
+        model = MonitoringScheduler._models[url]
+        model["cadence"] = CadencePolicy.next(model["cadence"], None)
+
+    report = MonitoringScheduler.cadence()
+
+    assert report["stretch_factor"] == 2.0
+    assert {c["effective_interval_seconds"] for c in report["models"].values()} == {20.0}
+
+
+def test_re_registering_keeps_the_learned_cadence(tmp_path, monkeypatch):
+    monkeypatch.setattr(MonitoringScheduler, "REGISTRY_FILE", tmp_path / "models.json")
+    monkeypatch.setattr(MonitoringScheduler, "_models", {})
+    model_url = "http://watched.test/predict"
+    MonitoringScheduler.register(model_url, interval_seconds=60.0)
+    model = MonitoringScheduler._models[model_url]
+    model["cadence"] = CadencePolicy.next(model["cadence"], None)
+
+    MonitoringScheduler.register(model_url, interval_seconds=60.0)
+
+    assert MonitoringScheduler.describe(model_url)["cadence"]["state"] == "escalated"
+
+    # A new interval moves the back-off ceiling, not the learned state
+    MonitoringScheduler.register(model_url, interval_seconds=5.0)
+    cadence = MonitoringScheduler.describe(model_url)["cadence"]
+    assert (cadence["state"], cadence["interval_seconds"]) == ("escalated", 5.0)
+    assert cadence["registered_interval_seconds"] == 5.0
+
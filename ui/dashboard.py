@@ -8,7 +8,10 @@ from streamlit_autorefresh import st_autorefresh
 # ----------------------------------
 # CONFIG
 # ----------------------------------
-API_URL = "http://localhost:8000/monitoring/analyze"
+API_BASE = "http://localhost:8000"
+REGISTER_URL = f"{API_BASE}/models/register"
+RESULTS_URL = f"{API_BASE}/monitoring/results"
+MONITOR_INTERVAL_SECONDS = 10
 REFRESH_INTERVAL_MS = 2000
 MAX_POINTS = 50
 CONFIDENCE_ALERT_THRESHOLD = 0.6
@@ -432,6 +435,7 @@ defaults = {
     "latency_ms": 0.0,
     "samples_collected": 0,
     "baseline_conf": None,
+    "last_generated_at": None,
     "last_drift": {},
     "last_rca": {},
     "last_recommendations": [],
@@ -475,10 +479,20 @@ prediction_url = st.text_input(
 
 b1, b2, b3 = st.columns(3)
 with b1:
-    if st.button("▶  Start Monitoring"):
-        st.session_state.running = True
+    if st.button("▶  Start Monitoring") and prediction_url.strip():
+        try:
+            requests.post(REGISTER_URL, json={
+                "model_name": prediction_url,
+                "prediction_url": prediction_url,
+                "interval_seconds": MONITOR_INTERVAL_SECONDS,
+            }, timeout=10).raise_for_status()
+            st.session_state.running = True
+        except Exception as e:
+            st.markdown(f'<div class="alert-card alert-critical"><span class="alert-icon">🔴</span><span>Could not register model: {e}</span></div>', unsafe_allow_html=True)
 with b2:
-    if st.button("⏹  Stop Monitoring"):
+    # Only pauses this dashboard — the model stays registered on the
+    # server for every other client (POST /models/unregister removes it)
+    if st.button("⏹  Stop Monitoring", help="Pause this dashboard; server-side monitoring continues"):
         st.session_state.running = False
 with b3:
     if st.button("📤  Export CSV") and st.session_state.timestamps:
@@ -495,17 +509,18 @@ if not prediction_url.strip():
     st.stop()
 
 # ----------------------------------
-# API CALL
+# API CALL (reads results of server-side scheduled analysis)
 # ----------------------------------
 if st.session_state.running:
     try:
-        start = time.time()
-        r = requests.post(API_URL, json={"prediction_url": prediction_url}, timeout=10)
-        st.session_state.latency_ms = round((time.time() - start) * 1000, 2)
+        r = requests.get(RESULTS_URL, params={"prediction_url": prediction_url}, timeout=10)
+        data = r.json() if r.status_code == 200 else None
 
-        if r.status_code == 200:
-            data = r.json()
+        # Only new scheduled runs add points; re-reads of the same run are skipped
+        if data and data.get("generated_at") != st.session_state.last_generated_at:
+            st.session_state.last_generated_at = data.get("generated_at")
             metrics = data.get("current_metrics") or data.get("metrics", {})
+            st.session_state.latency_ms = round(metrics.get("avg_latency_ms") or 0.0, 2)
             st.session_state.last_drift = data.get("drift", {})
             st.session_state.last_rca = data.get("rca", {})
             st.session_state.last_recommendations = data.get("recommendations", [])
@@ -513,7 +528,7 @@ if st.session_state.running:
             st.session_state.err_rate = metrics.get("error_rate", 0.0)
             conf_dist = metrics.get("confidence_distribution", [])
 
-            st.session_state.timestamps.append(time.strftime("%H:%M:%S"))
+            st.session_state.timestamps.append(data["generated_at"][11:19])
             st.session_state.confidence.append(st.session_state.avg_conf)
             st.session_state.error.append(st.session_state.err_rate)
             st.session_state.latency.append(st.session_state.latency_ms)